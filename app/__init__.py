@@ -24,6 +24,28 @@ def create_app():
         migrate.init_app(app, db)
         login_manager.init_app(app)
         login_manager.login_view = 'auth.login'
+        from app.services.cache_metricas import init_cache_metricas
+        init_cache_metricas(app)
+        from app.services.alertas_inventario import init_alertas_inventario
+        init_alertas_inventario(app)
+        from app.services.promociones import init_indice_promociones
+        init_indice_promociones(app)
+        from app.services.ciclo_promociones import init_programador_promociones
+        init_programador_promociones(app)
+        from app.services.busqueda import init_busqueda
+        init_busqueda(app)
+        from app.services.cache_catalogo import init_cache_catalogo
+        init_cache_catalogo(app)
+        from app.services.cache_http import init_cache_http
+        init_cache_http(app)
+        from app.services.imagenes import init_imagenes
+        init_imagenes(app)
+        from app.services.estaticos import init_estaticos
+        init_estaticos(app)
+        from app.services.resenas import init_resenas
+        init_resenas(app)
+        from app.services.compresion import init_compresion
+        init_compresion(app)
     except Exception as e:
         print(f"Error al inicializar extensiones: {e}")
         raise
@@ -48,6 +70,14 @@ def create_app():
      # Empleado
     from app.routes.notificaciones import bp as notificaciones_bp
     app.register_blueprint(notificaciones_bp, url_prefix='/notificaciones')  # Notificaciones       
+    from app.routes.facturas import bp as facturas_bp
+    app.register_blueprint(facturas_bp, url_prefix='/facturas')  # Cola de facturas
+    from app.routes.imagenes import bp as imagenes_bp
+    app.register_blueprint(imagenes_bp, url_prefix='/imagenes')  # Variantes de imágenes subidas
+    from app.routes.estaticos import bp as estaticos_bp
+    app.register_blueprint(estaticos_bp, url_prefix='/estaticos')  # CSS, JS e imágenes compilados
+    from app.routes.api import bp as api_bp
+    app.register_blueprint(api_bp, url_prefix='/api/v1')  # Catálogo JSON de solo lectura (quiosco, apps)
     
     # Importación de modelos dentro del contexto de la aplicación
     with app.app_context():
@@ -68,6 +98,11 @@ def create_app():
             from app.models.carrito import Carrito
             from app.models.detalle_carrito import DetalleCarrito
             from app.models.guardados import Guardado
+            from app.models.trabajos_factura import TrabajoFactura
+            from app.models.resumen_ventas_diario import ResumenVentaDiario
+            from app.models.alertas_inventario import AlertaInventario
+            from app.models.versiones_catalogo import VersionCatalogo
+            from app.models.bajas_catalogo import BajaCatalogo
         except Exception as e:
             print(f"Error al cargar modelos: {e}")
             raise
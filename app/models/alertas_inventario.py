@@ -0,0 +1,11 @@
+from app import db
+
+class AlertaInventario(db.Model):
+    __tablename__ = 'alertas_inventario'
+    id_alerta = db.Column(db.Integer, primary_key=True)
+    clave = db.Column(db.String(50), nullable=False, unique=True)  # 'stock_bajo', 'movimientos_recientes'
+    activa = db.Column(db.Boolean, nullable=False, default=False)
+    valor = db.Column(db.Integer, nullable=False, default=0)  # Último valor observado
+    valor_notificado = db.Column(db.Integer)  # Valor incluido en la última notificación enviada
+    fecha_cambio = db.Column(db.DateTime)  # Última vez que pasó de activa a inactiva o viceversa
+    fecha_notificacion = db.Column(db.DateTime)
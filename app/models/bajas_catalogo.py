@@ -0,0 +1,13 @@
+from app import db
+
+class BajaCatalogo(db.Model):
+    __tablename__ = 'bajas_catalogo'
+    id_baja = db.Column(db.Integer, primary_key=True)
+    tabla = db.Column(db.String(50), nullable=False)  # 'categorias', 'productos', 'servicios', 'promociones'
+    id_item = db.Column(db.Integer)  # NULL: borrado masivo, los clientes deben sincronizar todo de nuevo
+    version = db.Column(db.Integer, nullable=False)  # Versión 'catalogo' en que se borró
+
+    __table_args__ = (
+        # Sincronización delta: bajas de una tabla posteriores a una versión
+        db.Index('ix_bajas_catalogo_tabla_version', 'tabla', 'version'),
+    )
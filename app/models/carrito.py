@@ -8,5 +8,12 @@ class Carrito(db.Model):
     fecha_creacion = db.Column(db.DateTime, default=db.func.current_timestamp())
     estado = db.Column(Enum('activo', 'completado', 'abandonado', name='estado_carrito_enum'), default='activo')
 
+    __table_args__ = (
+        # Cada usuario tiene a lo sumo un carrito activo; los completados no se consultan por usuario
+        db.Index('ix_carrito_usuario_activo', 'id_usuario',
+                 postgresql_where=db.text("estado = 'activo'"),
+                 sqlite_where=db.text("estado = 'activo'")),
+    )
+
     # Relaciones usando cadenas
     detalles = db.relationship('DetalleCarrito', backref='carrito', lazy=True)
@@ -5,6 +5,12 @@ class Categoria(db.Model):
     id_categoria = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     descripcion = db.Column(db.Text)
+    version_catalogo = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Versión 'catalogo' de su último cambio (sincronización delta de /api/v1)
+
+    __table_args__ = (
+        # Cambios posteriores a una versión (sincronización delta)
+        db.Index('ix_categorias_version_catalogo', 'version_catalogo'),
+    )
 
     # Relaciones usando cadenas
     productos = db.relationship('Producto', backref='categoria', lazy=True)
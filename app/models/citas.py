@@ -11,5 +11,14 @@ class Cita(db.Model):
     estado = db.Column(Enum('pendiente', 'confirmada', 'cancelada', 'completada', name='estado_enum'), default='pendiente')
     notas = db.Column(db.Text)
 
+    __table_args__ = (
+        db.Index('ix_citas_empleado_estado_fecha', 'id_empleado', 'estado', 'fecha_hora'),
+        db.Index('ix_citas_usuario_fecha', 'id_usuario', 'fecha_hora'),
+        # Citas pendientes sin empleado asignado (gestión de citas del admin)
+        db.Index('ix_citas_pendientes_sin_asignar', 'fecha_hora',
+                 postgresql_where=db.text("estado = 'pendiente' AND id_empleado IS NULL"),
+                 sqlite_where=db.text("estado = 'pendiente' AND id_empleado IS NULL")),
+    )
+
     # Relaciones usando cadenas
     asignaciones = db.relationship('Asignacion', backref='cita', lazy=True)
@@ -8,3 +8,8 @@ class DetalleCarrito(db.Model):
     id_servicio = db.Column(db.Integer, db.ForeignKey('servicios.id_servicio'), nullable=True) 
     cantidad = db.Column(db.Integer, nullable=False)
     precio_unitario = db.Column(db.Numeric(10, 2), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_detalle_carrito_carrito', 'id_carrito'),
+    )
+
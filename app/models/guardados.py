@@ -7,3 +7,9 @@ class Guardado(db.Model):
     id_producto = db.Column(db.Integer, db.ForeignKey('productos.id_producto'))
     id_servicio = db.Column(db.Integer, db.ForeignKey('servicios.id_servicio'))
     fecha_guardado = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.Index('ix_guardados_usuario_producto', 'id_usuario', 'id_producto'),
+        db.Index('ix_guardados_usuario_servicio', 'id_usuario', 'id_servicio'),
+    )
+
@@ -9,3 +9,10 @@ class InventarioMovimiento(db.Model):
     cantidad = db.Column(db.Integer, nullable=False)
     fecha_movimiento = db.Column(db.DateTime, default=db.func.current_timestamp())
     motivo = db.Column(db.String(255))
+
+    __table_args__ = (
+        db.Index('ix_inventario_movimientos_tipo_fecha', 'tipo_movimiento', 'fecha_movimiento'),
+        db.Index('ix_inventario_movimientos_fecha', 'fecha_movimiento'),
+        db.Index('ix_inventario_movimientos_motivo', 'motivo'),  # Borrado de una compra por 'Venta ID: N'
+    )
+
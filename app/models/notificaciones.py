@@ -8,4 +8,12 @@ class Notificacion(db.Model):
     mensaje = db.Column(db.Text, nullable=False)
     tipo = db.Column(Enum('cita', 'promocion', 'inventario', name='tipo_notificacion_enum'), nullable=False)
     fecha_envio = db.Column(db.DateTime, default=db.func.current_timestamp())
-    leida = db.Column(db.Boolean, default=False)
\ No newline at end of file
+    leida = db.Column(db.Boolean, default=False)
+
+    __table_args__ = (
+        db.Index('ix_notificaciones_usuario_fecha', 'id_usuario', 'fecha_envio'),
+        # Solo las no leídas: el índice se mantiene pequeño aunque la tabla crezca
+        db.Index('ix_notificaciones_no_leidas', 'id_usuario',
+                 postgresql_where=db.text('leida = false'),
+                 sqlite_where=db.text('leida = 0')),
+    )
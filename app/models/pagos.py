@@ -9,3 +9,8 @@ class Pago(db.Model):
     monto = db.Column(db.Numeric(10, 2), nullable=False)
     fecha_pago = db.Column(db.DateTime, default=db.func.current_timestamp())
     estado = db.Column(Enum('completado', 'pendiente', name='estado_pago_enum'), default='completado')
+
+    __table_args__ = (
+        db.Index('ix_pagos_venta', 'id_venta'),
+    )
+
@@ -13,7 +13,28 @@ class Producto(db.Model):
     stock_minimo = db.Column(db.Integer, default=5)
     estado = db.Column(Enum('activo', 'inactivo', 'en_promocion', name='estado_producto_enum'), default='activo')
     imagen_url = db.Column(db.Text)
+    imagen_hash = db.Column(db.String(32))  # Imagen subida (app/services/imagenes.py); tiene prioridad sobre imagen_url
     fecha_creacion = db.Column(db.DateTime, default=db.func.current_timestamp())
+    version_catalogo = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Versión 'catalogo' de su último cambio (sincronización delta de /api/v1)
+    # Resumen de reseñas, se actualiza en la misma transacción que cada reseña (app/services/resenas.py)
+    resenas_cantidad = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    resenas_suma = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Suma de calificaciones
+    resenas_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Reseñas de 1 estrella
+    resenas_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    resenas_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    resenas_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    resenas_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        # Cambios posteriores a una versión (sincronización delta)
+        db.Index('ix_productos_version_catalogo', 'version_catalogo'),
+        # Listado de items en promoción sin comparar fechas
+        db.Index('ix_productos_estado', 'estado'),
+        # Órdenes del catálogo paginado por keyset: (columna de orden, id)
+        db.Index('ix_productos_nombre', 'nombre', 'id_producto'),
+        db.Index('ix_productos_precio', 'precio', 'id_producto'),
+        db.Index('ix_productos_categoria', 'id_categoria'),
+    )
 
     # Relaciones usando cadenas
     detalle_ventas = db.relationship('DetalleVenta', backref='producto', lazy=True)
@@ -1,6 +1,22 @@
 
+from datetime import datetime
+from sqlalchemy import Enum
 from app import db
 
+
+def estado_promocion(fecha_inicio, fecha_fin, ahora=None):
+    """Estado que corresponde a una promoción con esas fechas en `ahora` (UTC)."""
+    ahora = ahora or datetime.utcnow()
+    if fecha_inicio > ahora:
+        return 'futura'
+    return 'activa' if fecha_fin >= ahora else 'expirada'
+
+
+def _estado_inicial(contexto):
+    parametros = contexto.get_current_parameters()
+    return estado_promocion(parametros['fecha_inicio'], parametros['fecha_fin'])
+
+
 class Promocion(db.Model):
     __tablename__ = 'promociones'
     id_promocion = db.Column(db.Integer, primary_key=True)
@@ -11,4 +27,22 @@ class Promocion(db.Model):
     fecha_fin = db.Column(db.DateTime, nullable=False)
     id_servicio = db.Column(db.Integer, db.ForeignKey('servicios.id_servicio'))
     id_producto = db.Column(db.Integer, db.ForeignKey('productos.id_producto'))
+    # Lo mantiene al día el programador de app/services/ciclo_promociones.py
+    estado = db.Column(
+        Enum('futura', 'activa', 'expirada', name='estado_promocion_enum'),
+        nullable=False, default=_estado_inicial, server_default='futura'
+    )
+    version_catalogo = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Versión 'catalogo' de su último cambio (sincronización delta de /api/v1)
+
+    __table_args__ = (
+        # Cambios posteriores a una versión (sincronización delta)
+        db.Index('ix_promociones_version_catalogo', 'version_catalogo'),
+        db.Index('ix_promociones_producto_vigencia', 'id_producto', 'fecha_fin', 'fecha_inicio'),
+        db.Index('ix_promociones_servicio_vigencia', 'id_servicio', 'fecha_fin', 'fecha_inicio'),
+        # Listados de promociones vigentes: casi todas las históricas quedan fuera por fecha_fin
+        db.Index('ix_promociones_vigencia', 'fecha_fin', 'fecha_inicio'),
+        # Próximas transiciones del programador: futuras por inicio, activas por fin
+        db.Index('ix_promociones_estado_inicio', 'estado', 'fecha_inicio'),
+        db.Index('ix_promociones_estado_fin', 'estado', 'fecha_fin'),
+    )
 
@@ -9,3 +9,11 @@ class Reseña(db.Model):
     calificacion = db.Column(db.Integer, nullable=False)
     comentario = db.Column(db.Text)
     fecha_resena = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        # Página de reseñas de un item por keyset: (fecha, id) de la más reciente a la más antigua
+        db.Index('ix_resenas_producto_fecha', 'id_producto', 'fecha_resena', 'id_resena'),
+        db.Index('ix_resenas_servicio_fecha', 'id_servicio', 'fecha_resena', 'id_resena'),
+        db.Index('ix_resenas_usuario', 'id_usuario'),
+    )
+
@@ -0,0 +1,15 @@
+from sqlalchemy import Enum
+from app import db
+
+class ResumenVentaDiario(db.Model):
+    __tablename__ = 'resumen_ventas_diario'
+    id_resumen = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.Date, nullable=False)
+    tipo = db.Column(Enum('producto', 'servicio', name='tipo_resumen_enum'), nullable=False)
+    id_item = db.Column(db.Integer, nullable=False)  # id_producto o id_servicio según el tipo
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Subtotal sin IVA
+
+    __table_args__ = (
+        db.UniqueConstraint('fecha', 'tipo', 'id_item', name='uq_resumen_ventas_diario'),
+    )
@@ -0,0 +1,20 @@
+from sqlalchemy import Enum
+from app import db
+
+class TrabajoFactura(db.Model):
+    __tablename__ = 'trabajos_factura'
+    id_trabajo = db.Column(db.Integer, primary_key=True)
+    id_venta = db.Column(db.Integer, db.ForeignKey('ventas.id_venta'))
+    id_usuario = db.Column(db.Integer, db.ForeignKey('usuarios.id_usuario'))  # Quien puede descargarla
+    estado = db.Column(Enum('pendiente', 'procesando', 'completado', 'error', name='estado_trabajo_enum'), default='pendiente')
+    datos = db.Column(db.JSON, nullable=False)  # Factura empaquetada con datos_factura
+    nombre_archivo = db.Column(db.String(255), nullable=False)
+    pdf = db.Column(db.LargeBinary)
+    error = db.Column(db.Text)
+    fecha_creacion = db.Column(db.DateTime, default=db.func.current_timestamp())
+    fecha_inicio = db.Column(db.DateTime)
+    fecha_fin = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_trabajos_factura_venta', 'id_venta'),
+    )
@@ -7,6 +7,11 @@ class Venta(db.Model):
     fecha_venta = db.Column(db.DateTime, default=db.func.current_timestamp())
     total = db.Column(db.Numeric(10, 2), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_ventas_fecha', 'fecha_venta'),
+        db.Index('ix_ventas_usuario_fecha', 'id_usuario', 'fecha_venta'),
+    )
+
     # Relaciones usando cadenas
     detalle_ventas = db.relationship('DetalleVenta', backref='venta', lazy=True)
     pagos = db.relationship('Pago', backref='venta', lazy=True)
\ No newline at end of file
@@ -0,0 +1,13 @@
+from app import db
+
+class VersionCatalogo(db.Model):
+    __tablename__ = 'versiones_catalogo'
+    # Una fila por tabla de referencia ('categorias', 'servicios', 'productos'), el contador de
+    # los ETag del catálogo ('catalogo') y, sin secuencias, el de las escrituras ('catalogo:secuencia')
+    clave = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Versión de cada escritura del catálogo en Postgres (version_catalogo, bajas_catalogo.version);
+# nextval no bloquea, a diferencia de incrementar una fila de versiones_catalogo
+secuencia_version_catalogo = db.Sequence('secuencia_version_catalogo', metadata=db.metadata)
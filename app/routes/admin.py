@@ -1,13 +1,11 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, Response, stream_with_context
 from app import db
 from app.models.users import Usuario
 from app.models.productos import Producto
-from app.models.categorias import Categoria
 from app.models.servicios import Servicio
 from app.models.citas import Cita
 from app.models.asignaciones import Asignacion
-from app.models.inventario_movimientos import InventarioMovimiento
-from app.models.promociones import Promocion
+from app.models.promociones import Promocion, estado_promocion
 from app.models.notificaciones import Notificacion
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import joinedload
@@ -17,6 +15,18 @@ import logging
 from sqlalchemy import func
 from datetime import datetime, timedelta
 import json
+import hashlib
+import click
+from app.services.exportar_facturas import zip_facturas
+from app.services.exportar_ventas import consulta_exportacion, exportar, RECURSOS, FORMATOS
+from app.services.metricas import metricas_dashboard_en_cache, inicios_periodo
+from app.services.resumen_ventas import ingresos_por_periodo, reconstruir_resumen, serie_ingresos, GRANULARIDADES
+from app.services.alertas_inventario import evaluar_alertas_inventario
+from app.services.diagnostico import explicar, consultas_frecuentes
+from app.services.ciclo_promociones import sincronizar_estados
+from app.services.cache_catalogo import categorias_catalogo, productos_catalogo, servicios_catalogo
+from app.services.imagenes import ImagenInvalida, guardar_imagen
+from app.services.resenas import reconstruir_resumen_resenas
 
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -25,6 +35,20 @@ bp = Blueprint('admin', __name__, url_prefix='/admin')
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Límite del rango de la serie de ingresos (unos cinco años de datos diarios)
+MAX_DIAS_SERIE = 1830
+
+def _imagen_subida():
+    """Hash de la imagen subida en el campo 'imagen' del formulario, o None si no se subió ninguna."""
+    archivo = request.files.get('imagen')
+    if not archivo or not archivo.filename:
+        return None
+    try:
+        return guardar_imagen(archivo.stream)
+    except OSError as e:
+        logger.error(f"Error al guardar la imagen subida: {str(e)}")
+        raise ImagenInvalida("No se pudo guardar la imagen. Intenta de nuevo.") from e
+
 @bp.route('/dashboard')
 @login_required
 def admin_dashboard():
@@ -32,126 +56,79 @@ def admin_dashboard():
         flash("Acceso denegado. Solo para administradores.", "danger")
         return redirect(url_for('auth.login'))
     
-    # Contadores básicos
-    usuarios_count = Usuario.query.count()
-    productos_count = Producto.query.count()
-    servicios_count = Servicio.query.count()
-    citas_pendientes_count = Cita.query.filter_by(estado='pendiente').count()
-
-    # Fechas actuales
-    today = datetime.now().date()
-    start_week = today - timedelta(days=today.weekday())  # Inicio de la semana (lunes)
-    start_month = today.replace(day=1)
-    start_year = today.replace(month=1, day=1)
-
-    # Inicializar diccionarios con valores por defecto
-    ingresos = {'hoy': 0.0, 'semana': 0.0, 'mes': 0.0, 'ano': 0.0}
-    ingresos_productos = {'hoy': 0.0, 'semana': 0.0, 'mes': 0.0, 'ano': 0.0}
-    ingresos_servicios = {'hoy': 0.0, 'semana': 0.0, 'mes': 0.0, 'ano': 0.0}
-
-    # Métricas de inventario
-    stock_total = Producto.query.with_entities(func.sum(Producto.stock)).scalar() or 0
-    stock_bajo = Producto.query.filter(Producto.stock <= Producto.stock_minimo).count()
-    movimientos_recientes = InventarioMovimiento.query.filter(
-        InventarioMovimiento.fecha_movimiento >= (datetime.now() - timedelta(days=7))
-    ).count()
+    # Las alertas de inventario se evalúan al escribir, no al ver el panel
+    metricas = metricas_dashboard_en_cache()
+    logger.debug(f"Ingresos calculados: {metricas['ingresos']}")
+    logger.debug(f"Inventario - Stock total: {metricas['stock_total']}, Stock bajo: {metricas['stock_bajo']}, Movimientos recientes: {metricas['movimientos_recientes']}")
 
-    try:
-        # Calcular ingresos por productos
-        ingresos_productos_query = db.session.query(
-            func.sum(Producto.precio * func.abs(InventarioMovimiento.cantidad)).label('total')
-        ).join(InventarioMovimiento, InventarioMovimiento.id_producto == Producto.id_producto).filter(
-            InventarioMovimiento.tipo_movimiento == 'salida'
-        )
-        ingresos_productos['hoy'] = ingresos_productos_query.filter(
-            func.date(InventarioMovimiento.fecha_movimiento) == today
-        ).scalar() or 0.0
-        ingresos_productos['semana'] = ingresos_productos_query.filter(
-            func.date(InventarioMovimiento.fecha_movimiento).between(start_week, today)
-        ).scalar() or 0.0
-        ingresos_productos['mes'] = ingresos_productos_query.filter(
-            func.date(InventarioMovimiento.fecha_movimiento).between(start_month, today)
-        ).scalar() or 0.0
-        ingresos_productos['ano'] = ingresos_productos_query.filter(
-            func.date(InventarioMovimiento.fecha_movimiento).between(start_year, today)
-        ).scalar() or 0.0
-
-        # Calcular ingresos por servicios
-        ingresos_servicios_query = db.session.query(
-            func.sum(Servicio.precio).label('total')
-        ).join(Cita, Cita.id_servicio == Servicio.id_servicio).filter(
-            Cita.estado == 'completada'
-        )
-        ingresos_servicios['hoy'] = ingresos_servicios_query.filter(
-            func.date(Cita.fecha_hora) == today
-        ).scalar() or 0.0
-        ingresos_servicios['semana'] = ingresos_servicios_query.filter(
-            func.date(Cita.fecha_hora).between(start_week, today)
-        ).scalar() or 0.0
-        ingresos_servicios['mes'] = ingresos_servicios_query.filter(
-            func.date(Cita.fecha_hora).between(start_month, today)
-        ).scalar() or 0.0
-        ingresos_servicios['ano'] = ingresos_servicios_query.filter(
-            func.date(Cita.fecha_hora).between(start_year, today)
-        ).scalar() or 0.0
-
-        # Calcular ingresos totales
-        ingresos = {
-            'hoy': ingresos_productos['hoy'] + ingresos_servicios['hoy'],
-            'semana': ingresos_productos['semana'] + ingresos_servicios['semana'],
-            'mes': ingresos_productos['mes'] + ingresos_servicios['mes'],
-            'ano': ingresos_productos['ano'] + ingresos_servicios['ano']
-        }
-
-        # Notificación si hay stock bajo
-        if stock_bajo > 0:
-            notificacion = Notificacion(
-                id_usuario=current_user.id_usuario,
-                mensaje=f"Hay {stock_bajo} productos con stock bajo (menor o igual a stock mínimo).",
-                tipo='inventario'
-            )
-            db.session.add(notificacion)
-            db.session.commit()
+    tipo_filtro = request.args.get('tipo_filtro', 'total')
+    return render_template('dashboard_admin.html', 
+                          **metricas,
+                          user=current_user,
+                          tipo_filtro=tipo_filtro)
 
-        # Notificación si hay movimientos recientes
-        if movimientos_recientes > 0:
-            notificacion = Notificacion(
-                id_usuario=current_user.id_usuario,
-                mensaje=f"Se han registrado {movimientos_recientes} movimientos de inventario en los últimos 7 días.",
-                tipo='inventario'
-            )
-            db.session.add(notificacion)
-            db.session.commit()
+@bp.route('/api/metricas')
+@login_required
+def api_metricas():
+    """Métricas del panel en JSON; las usa la gráfica del dashboard."""
+    if current_user.rol != 'admin':
+        return jsonify({'success': False, 'message': 'Acceso denegado. Solo para administradores.'}), 403
+    try:
+        return jsonify(metricas_dashboard_en_cache())
+    except Exception as e:
+        logger.error(f"Error al calcular métricas del dashboard: {str(e)}")
+        return jsonify({'success': False, 'message': 'No se pudieron calcular las métricas.'}), 500
 
-        logger.debug(f"Ingresos calculados: {ingresos}")
-        logger.debug(f"Inventario - Stock total: {stock_total}, Stock bajo: {stock_bajo}, Movimientos recientes: {movimientos_recientes}")
+@bp.route('/exportar_facturas')
+@login_required
+def exportar_facturas():
+    if current_user.rol != 'admin':
+        flash("Acceso denegado. Solo para administradores.", "danger")
+        return redirect(url_for('auth.login'))
+    try:
+        desde = datetime.strptime(request.args.get('desde', ''), '%Y-%m-%d')
+        hasta = datetime.strptime(request.args.get('hasta', ''), '%Y-%m-%d')
+    except ValueError:
+        flash("Debes indicar un rango de fechas válido (YYYY-MM-DD).", "danger")
+        return redirect(url_for('admin.admin_dashboard'))
+    if desde > hasta:
+        flash("La fecha inicial debe ser anterior a la final.", "danger")
+        return redirect(url_for('admin.admin_dashboard'))
 
-    except Exception as e:
-        logger.error(f"Error al calcular ingresos o inventario: {str(e)}")
-        # Mantener valores por defecto en caso de error
+    # Rango semiabierto: incluye todo el día final
+    response = Response(
+        stream_with_context(zip_facturas(desde, hasta + timedelta(days=1))),
+        mimetype='application/zip'
+    )
+    response.headers['Content-Disposition'] = f"attachment; filename=facturas_{desde:%Y%m%d}_{hasta:%Y%m%d}.zip"
+    return response
 
-    tipo_filtro = request.args.get('tipo_filtro', 'total')
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        if tipo_filtro == 'productos':
-            return jsonify(ingresos_productos)
-        elif tipo_filtro == 'servicios':
-            return jsonify(ingresos_servicios)
-        else:
-            return jsonify(ingresos)
+@bp.route('/exportar_ventas')
+@login_required
+def exportar_ventas():
+    """Exporta ventas, detalles o pagos en CSV o NDJSON, enviando las filas a medida que se leen."""
+    if current_user.rol != 'admin':
+        return jsonify({'success': False, 'message': 'Acceso denegado. Solo para administradores.'}), 403
+    recurso = request.args.get('recurso', 'ventas')
+    formato = request.args.get('formato', 'csv')
+    if recurso not in RECURSOS or formato not in FORMATOS:
+        return jsonify({'success': False, 'message': f"Usa recurso={'|'.join(RECURSOS)} y formato={'|'.join(FORMATOS)}."}), 400
+    try:
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d') if request.args.get('desde') else None
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d') + timedelta(days=1) if request.args.get('hasta') else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Las fechas deben tener el formato YYYY-MM-DD.'}), 400
 
-    return render_template('dashboard_admin.html', 
-                          usuarios_count=usuarios_count, 
-                          productos_count=productos_count, 
-                          servicios_count=servicios_count, 
-                          citas_pendientes_count=citas_pendientes_count,
-                          ingresos=ingresos,
-                          ingresos_productos=ingresos_productos,
-                          ingresos_servicios=ingresos_servicios,
-                          stock_total=stock_total,
-                          stock_bajo=stock_bajo,
-                          movimientos_recientes=movimientos_recientes,
-                          user=current_user,
-                          tipo_filtro=tipo_filtro)
+    consulta = consulta_exportacion(
+        recurso, desde, hasta,
+        id_producto=request.args.get('id_producto', type=int),
+        id_servicio=request.args.get('id_servicio', type=int)
+    )
+    response = Response(stream_with_context(exportar(consulta, formato)), mimetype=FORMATOS[formato])
+    response.headers['Content-Disposition'] = f"attachment; filename={recurso}_{datetime.now():%Y%m%d_%H%M%S}.{formato}"
+    # Evitar que un proxy acumule la respuesta completa antes de reenviarla
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @bp.route('/gestion_usuarios')
 @login_required
@@ -262,8 +239,7 @@ def gestion_productos():
         flash("Acceso denegado. Solo para administradores.", "danger")
         return redirect(url_for('auth.login'))
     productos = Producto.query.all()
-    categorias = Categoria.query.all()
-    return render_template('gestion_productos.html', productos=productos, categorias=categorias)
+    return render_template('gestion_productos.html', productos=productos, categorias=categorias_catalogo())
 
 @bp.route('/agregar_producto', methods=['GET', 'POST'])
 @login_required
@@ -283,14 +259,15 @@ def agregar_producto():
         imagen_url = request.form.get('imagen_url')
         if not all([id_categoria, nombre, tipo, precio, stock]):
             flash("Los campos obligatorios (categoría, nombre, tipo, precio, stock) son requeridos.", "danger")
-            return render_template('agregar_producto.html', producto=None, categorias=Categoria.query.all())
+            return render_template('agregar_producto.html', producto=None, categorias=categorias_catalogo())
         try:
             precio = float(precio)
             stock = int(stock)
             stock_minimo = int(stock_minimo) if stock_minimo else 5
             if precio < 0 or stock < 0 or stock_minimo < 0:
                 flash("El precio, stock y stock mínimo no pueden ser negativos.", "danger")
-                return render_template('agregar_producto.html', producto=None, categorias=Categoria.query.all())
+                return render_template('agregar_producto.html', producto=None, categorias=categorias_catalogo())
+            imagen_hash = _imagen_subida()
             producto = Producto(
                 id_categoria=id_categoria,
                 nombre=nombre,
@@ -300,20 +277,24 @@ def agregar_producto():
                 stock=stock,
                 stock_minimo=stock_minimo,
                 estado=estado if estado else 'activo',
-                imagen_url=imagen_url
+                imagen_url=imagen_url,
+                imagen_hash=imagen_hash
             )
             db.session.add(producto)
             db.session.commit()
             flash("Producto agregado con éxito.", "success")
             return redirect(url_for('admin.gestion_productos'))
+        except ImagenInvalida as e:
+            flash(str(e), "danger")
+            return render_template('agregar_producto.html', producto=None, categorias=categorias_catalogo())
         except ValueError:
             flash("El precio debe ser un número decimal y el stock/stock mínimo un número entero.", "danger")
-            return render_template('agregar_producto.html', producto=None, categorias=Categoria.query.all())
+            return render_template('agregar_producto.html', producto=None, categorias=categorias_catalogo())
         except IntegrityError:
             db.session.rollback()
             flash("Error: El producto ya existe o hay un problema de datos.", "danger")
-            return render_template('agregar_producto.html', producto=None, categorias=Categoria.query.all())
-    return render_template('agregar_producto.html', producto=None, categorias=Categoria.query.all())
+            return render_template('agregar_producto.html', producto=None, categorias=categorias_catalogo())
+    return render_template('agregar_producto.html', producto=None, categorias=categorias_catalogo())
 
 @bp.route('/editar_producto/<int:id_producto>', methods=['GET', 'POST'])
 @login_required
@@ -334,14 +315,15 @@ def editar_producto(id_producto):
         imagen_url = request.form.get('imagen_url')
         if not all([id_categoria, nombre, tipo, precio, stock]):
             flash("Los campos obligatorios (categoría, nombre, tipo, precio, stock) son requeridos.", "danger")
-            return render_template('editar_producto.html', producto=producto, categorias=Categoria.query.all())
+            return render_template('editar_producto.html', producto=producto, categorias=categorias_catalogo())
         try:
             precio = float(precio)
             stock = int(stock)
             stock_minimo = int(stock_minimo) if stock_minimo else producto.stock_minimo
             if precio < 0 or stock < 0 or stock_minimo < 0:
                 flash("El precio, stock y stock mínimo no pueden ser negativos.", "danger")
-                return render_template('editar_producto.html', producto=producto, categorias=Categoria.query.all())
+                return render_template('editar_producto.html', producto=producto, categorias=categorias_catalogo())
+            imagen_hash = _imagen_subida()
             producto.id_categoria = id_categoria
             producto.nombre = nombre
             producto.descripcion = descripcion
@@ -351,17 +333,22 @@ def editar_producto(id_producto):
             producto.stock_minimo = stock_minimo
             producto.estado = estado if estado else producto.estado
             producto.imagen_url = imagen_url
+            if imagen_hash:
+                producto.imagen_hash = imagen_hash
             db.session.commit()
             flash("Producto actualizado con éxito.", "success")
             return redirect(url_for('admin.gestion_productos'))
+        except ImagenInvalida as e:
+            flash(str(e), "danger")
+            return render_template('editar_producto.html', producto=producto, categorias=categorias_catalogo())
         except ValueError:
             flash("El precio debe ser un número decimal y el stock/stock mínimo un número entero.", "danger")
-            return render_template('editar_producto.html', producto=producto, categorias=Categoria.query.all())
+            return render_template('editar_producto.html', producto=producto, categorias=categorias_catalogo())
         except IntegrityError:
             db.session.rollback()
             flash("Error: No se pudo actualizar el producto.", "danger")
-            return render_template('editar_producto.html', producto=producto, categorias=Categoria.query.all())
-    return render_template('editar_producto.html', producto=producto, categorias=Categoria.query.all())
+            return render_template('editar_producto.html', producto=producto, categorias=categorias_catalogo())
+    return render_template('editar_producto.html', producto=producto, categorias=categorias_catalogo())
 
 @bp.route('/eliminar_producto/<int:id_producto>', methods=['GET', 'POST'])
 @login_required
@@ -387,8 +374,7 @@ def gestion_servicios():
     if current_user.rol != 'admin':
         flash("Acceso denegado. Solo para administradores.", "danger")
         return redirect(url_for('auth.login'))
-    servicios = Servicio.query.all()
-    return render_template('gestion_servicios.html', servicios=servicios)
+    return render_template('gestion_servicios.html', servicios=servicios_catalogo())
 
 @bp.route('/agregar_servicio', methods=['GET', 'POST'])
 @login_required
@@ -418,12 +404,16 @@ def agregar_servicio():
                 precio=precio,
                 duracion=duracion,
                 estado=estado if estado else 'activo',
-                imagen_url=imagen_url
+                imagen_url=imagen_url,
+                imagen_hash=_imagen_subida()
             )
             db.session.add(servicio)
             db.session.commit()
             flash("Servicio agregado con éxito.", "success")
             return redirect(url_for('admin.gestion_servicios'))
+        except ImagenInvalida as e:
+            flash(str(e), "danger")
+            return render_template('agregar_servicio.html')
         except ValueError:
             flash("El precio debe ser un número decimal y la duración un número entero.", "danger")
             return render_template('agregar_servicio.html')
@@ -456,15 +446,21 @@ def editar_servicio(id_servicio):
             if precio < 0 or duracion <= 0:
                 flash("El precio no puede ser negativo y la duración debe ser mayor a 0.", "danger")
                 return render_template('editar_servicio.html', servicio=servicio)
+            imagen_hash = _imagen_subida()
             servicio.nombre = nombre
             servicio.descripcion = descripcion
             servicio.precio = precio
             servicio.duracion = duracion
             servicio.estado = estado if estado else servicio.estado
             servicio.imagen_url = imagen_url
+            if imagen_hash:
+                servicio.imagen_hash = imagen_hash
             db.session.commit()
             flash("Servicio actualizado con éxito.", "success")
             return redirect(url_for('admin.gestion_servicios'))
+        except ImagenInvalida as e:
+            flash(str(e), "danger")
+            return render_template('editar_servicio.html', servicio=servicio)
         except ValueError:
             flash("El precio debe ser un número decimal y la duración un número entero.", "danger")
             return render_template('editar_servicio.html', servicio=servicio)
@@ -579,74 +575,12 @@ def gestion_ingresos():
         flash("Acceso denegado. Solo para administradores.", "danger")
         return redirect(url_for('auth.login'))
 
-    # Fechas actuales
-    today = datetime.now().date()
-    start_week = today - timedelta(days=today.weekday())  # Inicio de la semana (lunes)
-    start_month = today.replace(day=1)
-    start_year = today.replace(month=1, day=1)
-
-    # Calcular ingresos por productos con join explícito
+    # Ingresos por periodo leídos del resumen diario de ventas
     try:
-        ingresos_productos = {
-            'hoy': db.session.query(func.sum(Producto.precio * func.abs(InventarioMovimiento.cantidad)))
-                .join(InventarioMovimiento)
-                .filter(InventarioMovimiento.id_producto == Producto.id_producto)
-                .filter(InventarioMovimiento.tipo_movimiento == 'salida')
-                .filter(func.date(InventarioMovimiento.fecha_movimiento) == today)
-                .scalar() or 0.0,
-            'semana': db.session.query(func.sum(Producto.precio * func.abs(InventarioMovimiento.cantidad)))
-                .join(InventarioMovimiento)
-                .filter(InventarioMovimiento.id_producto == Producto.id_producto)
-                .filter(InventarioMovimiento.tipo_movimiento == 'salida')
-                .filter(func.date(InventarioMovimiento.fecha_movimiento).between(start_week, today))
-                .scalar() or 0.0,
-            'mes': db.session.query(func.sum(Producto.precio * func.abs(InventarioMovimiento.cantidad)))
-                .join(InventarioMovimiento)
-                .filter(InventarioMovimiento.id_producto == Producto.id_producto)
-                .filter(InventarioMovimiento.tipo_movimiento == 'salida')
-                .filter(func.date(InventarioMovimiento.fecha_movimiento).between(start_month, today))
-                .scalar() or 0.0,
-            'ano': db.session.query(func.sum(Producto.precio * func.abs(InventarioMovimiento.cantidad)))
-                .join(InventarioMovimiento)
-                .filter(InventarioMovimiento.id_producto == Producto.id_producto)
-                .filter(InventarioMovimiento.tipo_movimiento == 'salida')
-                .filter(func.date(InventarioMovimiento.fecha_movimiento).between(start_year, today))
-                .scalar() or 0.0
-        }
+        ingresos_productos, ingresos_servicios = ingresos_por_periodo(*inicios_periodo())
     except Exception as e:
-        logger.error(f"Error al calcular ingresos por productos: {str(e)}")
+        logger.error(f"Error al calcular ingresos: {str(e)}")
         ingresos_productos = {'hoy': 0.0, 'semana': 0.0, 'mes': 0.0, 'ano': 0.0}
-
-    # Calcular ingresos por servicios con join explícito
-    try:
-        ingresos_servicios = {
-            'hoy': db.session.query(func.sum(Servicio.precio))
-                .join(Cita)
-                .filter(Cita.id_servicio == Servicio.id_servicio)
-                .filter(Cita.estado == 'completada')
-                .filter(func.date(Cita.fecha_hora) == today)
-                .scalar() or 0.0,
-            'semana': db.session.query(func.sum(Servicio.precio))
-                .join(Cita)
-                .filter(Cita.id_servicio == Servicio.id_servicio)
-                .filter(Cita.estado == 'completada')
-                .filter(func.date(Cita.fecha_hora).between(start_week, today))
-                .scalar() or 0.0,
-            'mes': db.session.query(func.sum(Servicio.precio))
-                .join(Cita)
-                .filter(Cita.id_servicio == Servicio.id_servicio)
-                .filter(Cita.estado == 'completada')
-                .filter(func.date(Cita.fecha_hora).between(start_month, today))
-                .scalar() or 0.0,
-            'ano': db.session.query(func.sum(Servicio.precio))
-                .join(Cita)
-                .filter(Cita.id_servicio == Servicio.id_servicio)
-                .filter(Cita.estado == 'completada')
-                .filter(func.date(Cita.fecha_hora).between(start_year, today))
-                .scalar() or 0.0
-        }
-    except Exception as e:
-        logger.error(f"Error al calcular ingresos por servicios: {str(e)}")
         ingresos_servicios = {'hoy': 0.0, 'semana': 0.0, 'mes': 0.0, 'ano': 0.0}
 
     # Determinar el tipo de filtro
@@ -677,9 +611,43 @@ def gestion_ingresos():
                           ingresos_productos=ingresos_productos, 
                           ingresos_servicios=ingresos_servicios, 
                           titulo_grafica=titulo_grafica,
+                          tipo_filtro=tipo_filtro,
                           stock_total=stock_total,
                           stock_bajo=stock_bajo)
 
+@bp.route('/api/ingresos')
+@login_required
+def api_ingresos():
+    """Serie de ingresos por día, semana o mes para la gráfica de gestión de ingresos."""
+    if current_user.rol != 'admin':
+        return jsonify({'success': False, 'message': 'Acceso denegado. Solo para administradores.'}), 403
+    granularidad = request.args.get('granularidad', 'dia')
+    if granularidad not in GRANULARIDADES:
+        return jsonify({'success': False, 'message': f"Granularidad inválida. Usa una de: {', '.join(GRANULARIDADES)}."}), 400
+    hoy = datetime.now().date()
+    try:
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else hoy
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else hasta - timedelta(days=29)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Las fechas deben tener el formato YYYY-MM-DD.'}), 400
+    if desde > hasta:
+        return jsonify({'success': False, 'message': 'La fecha inicial debe ser anterior a la final.'}), 400
+    if (hasta - desde).days > MAX_DIAS_SERIE:
+        return jsonify({'success': False, 'message': f'El rango no puede superar {MAX_DIAS_SERIE} días.'}), 400
+
+    try:
+        serie = serie_ingresos(desde, hasta, granularidad)
+    except Exception as e:
+        logger.error(f"Error al calcular la serie de ingresos: {str(e)}")
+        return jsonify({'success': False, 'message': 'No se pudo calcular la serie de ingresos.'}), 500
+
+    # ETag del contenido: si la gráfica ya tiene esta serie, responder 304 sin cuerpo
+    cuerpo = json.dumps(serie, sort_keys=True)
+    response = Response(cuerpo, mimetype='application/json')
+    response.set_etag(hashlib.sha256(cuerpo.encode('utf-8')).hexdigest()[:32])
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
 @bp.route('/gestion_promociones', methods=['GET'])
 @login_required
 def gestion_promociones():
@@ -693,14 +661,10 @@ def gestion_promociones():
             joinedload(Promocion.producto),
             joinedload(Promocion.servicio)
         ).all()
-        productos = Producto.query.all()
-        servicios = Servicio.query.all()
-        
         return render_template('gestion_promociones.html', 
                               promociones=promociones, 
-                              productos=productos, 
-                              servicios=servicios,
-                              now=datetime.utcnow())  # Usa utcnow() para consistencia
+                              productos=productos_catalogo(), 
+                              servicios=servicios_catalogo())
     except Exception as e:
         logger.error(f"Error en gestion_promociones: {str(e)}")
         flash(f"Error al cargar promociones: {str(e)}", "danger")
@@ -781,7 +745,7 @@ def agregar_promocion():
                 'descuento': f"{promocion.descuento}%",
                 'fecha_inicio': promocion.fecha_inicio.strftime('%d/%m/%Y'),
                 'fecha_fin': promocion.fecha_fin.strftime('%d/%m/%Y'),
-                'estado': 'Activa' if promocion.fecha_inicio <= datetime.now() <= promocion.fecha_fin else 'Futura' if promocion.fecha_inicio > datetime.now() else 'Expirada'
+                'estado': promocion.estado.capitalize()
             }
         })
     
@@ -846,6 +810,7 @@ def editar_promocion(id_promocion):
         promocion.fecha_fin = fecha_fin
         promocion.id_producto = id_producto
         promocion.id_servicio = id_servicio
+        promocion.estado = estado_promocion(fecha_inicio, fecha_fin)
         db.session.commit()
         # Notificación de promoción editada
         notificacion = Notificacion(
@@ -867,7 +832,7 @@ def editar_promocion(id_promocion):
                 'descuento': f"{promocion.descuento}%",
                 'fecha_inicio': promocion.fecha_inicio.strftime('%d/%m/%Y'),
                 'fecha_fin': promocion.fecha_fin.strftime('%d/%m/%Y'),
-                'estado': 'Activa' if promocion.fecha_inicio <= datetime.now() <= promocion.fecha_fin else 'Futura' if promocion.fecha_inicio > datetime.now() else 'Expirada'
+                'estado': promocion.estado.capitalize()
             }
         })
     
@@ -912,3 +877,38 @@ def eliminar_promocion(id_promocion):
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
     
+
+@bp.cli.command('reconstruir-resumen')
+@click.option('--desde', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Primer día a recalcular (por defecto, todo el historial).')
+@click.option('--hasta', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='Día final, inclusive.')
+def reconstruir_resumen_ventas(desde, hasta):
+    """Recalcula el resumen diario de ventas a partir de las ventas registradas."""
+    filas = reconstruir_resumen(desde, hasta + timedelta(days=1) if hasta else None)
+    click.echo(f"Filas del resumen recalculadas: {filas}")
+
+@bp.cli.command('reconstruir-resenas')
+def reconstruir_resenas():
+    """Recalcula el resumen de reseñas (cantidad, suma e histograma) de productos y servicios."""
+    actualizados = reconstruir_resumen_resenas()
+    click.echo(f"Resumen de reseñas recalculado: {actualizados['producto']} productos, {actualizados['servicio']} servicios.")
+
+@bp.cli.command('sincronizar-promociones')
+def sincronizar_promociones():
+    """Aplica ahora los cambios de estado de promociones, productos y servicios pendientes."""
+    cambios = sincronizar_estados()
+    click.echo(f"Filas actualizadas: {cambios}")
+
+@bp.cli.command('evaluar-alertas')
+def evaluar_alertas():
+    """Evalúa las alertas de inventario (útil como tarea programada)."""
+    notificadas = evaluar_alertas_inventario()
+    click.echo(f"Alertas notificadas: {', '.join(notificadas) if notificadas else 'ninguna'}")
+
+@bp.cli.command('explicar-consultas')
+@click.option('--analizar', is_flag=True, help='Ejecuta las consultas (EXPLAIN ANALYZE en PostgreSQL).')
+def explicar_consultas(analizar):
+    """Muestra el plan de ejecución de las consultas más frecuentes."""
+    for nombre, consulta in consultas_frecuentes().items():
+        click.echo(f"== {nombre}")
+        for linea in explicar(consulta, analizar):
+            click.echo(f"   {linea}")
@@ -0,0 +1,36 @@
+# app/routes/api.py
+from flask import Blueprint, jsonify, request
+import logging
+from app import db
+from app.services.api_catalogo import (
+    POR_PAGINA, RECURSOS, ParametroInvalido, campos_pedidos, pagina_recurso, respuesta_json, version_pedida
+)
+from app.services.cache_catalogo import CLAVE_CATALOGO
+from app.services.cache_http import condicional
+from app.services.catalogo import CursorInvalido
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+logger = logging.getLogger(__name__)
+
+@bp.route('/<any(categorias, productos, servicios, promociones):recurso>')
+@condicional(CLAVE_CATALOGO)
+def listar(recurso):
+    """Catálogo de solo lectura para el quiosco y apps: ?campos=, ?limite=, ?cursor= y ?since=<versión>."""
+    try:
+        pagina = pagina_recurso(
+            recurso, campos_pedidos(recurso, request.args.get('campos')),
+            desde=version_pedida(request.args.get('since')), cursor=request.args.get('cursor'),
+            limite=request.args.get('limite', POR_PAGINA, type=int)
+        )
+    except (ParametroInvalido, CursorInvalido) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error en /api/v1/{recurso}: {str(e)}")
+        return jsonify({'success': False, 'message': f'Ocurrió un error: {str(e)}'}), 500
+    return respuesta_json({'success': True, **pagina})
+
+@bp.route('/')
+def indice():
+    """Recursos disponibles y sus campos, para que los clientes armen ?campos=."""
+    return jsonify({'success': True, 'recursos': {nombre: list(recurso.campos) for nombre, recurso in RECURSOS.items()}})
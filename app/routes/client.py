@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, send_file
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from app import db
 from app.models.servicios import Servicio
 from app.models.productos import Producto
@@ -13,23 +13,26 @@ from app.models.users import Usuario
 from app.models.reseñas import Reseña
 from app.models.guardados import Guardado
 from app.models.notificaciones import Notificacion
-from app.models.promociones import Promocion
+from app.models.trabajos_factura import TrabajoFactura
 from flask_login import login_required, current_user, logout_user
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from sqlalchemy.orm import joinedload
 from werkzeug.security import check_password_hash, generate_password_hash
 from decimal import Decimal
-import os
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.graphics.shapes import Circle
-from reportlab.graphics import renderPDF
-from reportlab.lib.colors import white
-from reportlab.platypus import SimpleDocTemplate
-from PIL import Image, ImageDraw
-import io
+from app.services.facturas import respuesta_factura, respuesta_factura_archivo, datos_factura, pdf_desde_datos
+from app.services.facturas_ventas import IVA_RATE, datos_cliente, lineas_factura, datos_factura_venta, nombre_archivo_venta
+from app.services.resumen_ventas import registrar_en_resumen, descontar_del_resumen
+from app.services.cache_facturas import ruta_en_cache, guardar_en_cache, invalidar_factura
+from app.services.cola_facturas import encolar_factura
+from app.services.busqueda import buscar
+from app.services.cache_catalogo import CLAVE_CATALOGO, categorias_catalogo, servicios_catalogo
+from app.services.cache_http import condicional
+from app.services.imagenes import urls_imagen
+from app.services.catalogo import CursorInvalido, filtros_catalogo, pagina_catalogo, POR_PAGINA
+from app.services.precios import precio_efectivo, precios_efectivos, tabla_precios
+from app.services.promociones import promocion_vigente
+from app.services.resenas import calificacion_item, pagina_resenas, registrar_resena
 import logging
 
 bp = Blueprint('client', __name__, url_prefix='/client')
@@ -38,9 +41,6 @@ bp = Blueprint('client', __name__, url_prefix='/client')
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# IVA (16% como estándar, ajustable)
-IVA_RATE = Decimal("0.16")
-
 # Contexto para todas las rutas del cliente
 @bp.context_processor
 def inject_carrito():
@@ -49,23 +49,30 @@ def inject_carrito():
         return dict(carrito=carrito)
     return dict(carrito=None)
 
+def _pagina_catalogo(tipo):
+    """Página del catálogo según los filtros de la URL y la tabla de precios de sus items."""
+    filtros = filtros_catalogo(request.args)
+    items, siguiente = pagina_catalogo(
+        tipo, filtros, cursor=request.args.get('cursor'),
+        limite=request.args.get('limite', POR_PAGINA, type=int)
+    )
+    bases = {getattr(item, f'id_{tipo}'): item.precio for item in items}
+    precios = tabla_precios(**{f'{tipo}s': bases}, momento=datetime.utcnow())
+    return filtros, items, siguiente, precios
+
 @bp.route('/servicios')
 @login_required
+@condicional(CLAVE_CATALOGO)
 def servicios():
     if current_user.rol != 'cliente':
         flash("Acceso denegado. Solo para clientes.", "danger")
         return redirect(url_for('auth.login'))
     try:
-        filter_promotions = request.args.get('filter') == 'promotions'
-        now = datetime.utcnow()
-        if filter_promotions:
-            servicios = Servicio.query.join(Promocion, Servicio.id_servicio == Promocion.id_servicio).filter(
-                Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-            ).all()
-        else:
-            servicios = Servicio.query.all()
-        promociones = Promocion.query.filter(Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now).all()
-        return render_template('servicios.html', servicios=servicios, promociones=promociones, filter_promotions=filter_promotions)
+        filtros, servicios, siguiente, precios = _pagina_catalogo('servicio')
+        return render_template('servicios.html', servicios=servicios, precios=precios, siguiente=siguiente,
+                               filtros=filtros, filter_promotions=filtros['solo_promocion'])
+    except CursorInvalido:
+        return redirect(url_for('client.servicios'))
     except Exception as e:
         logger.error(f"Error al cargar servicios: {str(e)}")
         flash(f"Ocurrió un error al cargar los servicios: {str(e)}. Por favor, intenta de nuevo.", "danger")
@@ -73,26 +80,107 @@ def servicios():
 
 @bp.route('/productos')
 @login_required
+@condicional(CLAVE_CATALOGO)
 def productos():
     if current_user.rol != 'cliente':
         flash("Acceso denegado. Solo para clientes.", "danger")
         return redirect(url_for('auth.login'))
     try:
-        filter_promotions = request.args.get('filter') == 'promotions'
-        now = datetime.utcnow()
-        if filter_promotions:
-            productos = Producto.query.join(Promocion, Producto.id_producto == Promocion.id_producto).filter(
-                Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-            ).all()
-        else:
-            productos = Producto.query.all()
-        promociones = Promocion.query.filter(Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now).all()
-        return render_template('productos.html', productos=productos, promociones=promociones, filter_promotions=filter_promotions)
+        filtros, productos, siguiente, precios = _pagina_catalogo('producto')
+        categorias = categorias_catalogo()
+        return render_template('productos.html', productos=productos, precios=precios, siguiente=siguiente,
+                               filtros=filtros, categorias=categorias, filter_promotions=filtros['solo_promocion'])
+    except CursorInvalido:
+        return redirect(url_for('client.productos'))
     except Exception as e:
         logger.error(f"Error al cargar productos: {str(e)}")
         flash(f"Ocurrió un error al cargar los productos: {str(e)}. Por favor, intenta de nuevo.", "danger")
         return redirect(url_for('auth.login'))
 
+def _item_catalogo_json(item, tipo, precio):
+    datos = {
+        'id': getattr(item, f'id_{tipo}'),
+        'nombre': item.nombre,
+        'descripcion': item.descripcion,
+        'precio': str(item.precio),
+        'precio_efectivo': str(precio.precio),
+        'descuento': str(precio.descuento),
+        'promocion': precio.nombre_promocion,
+        'imagen_url': item.imagen_url,
+        'imagenes': urls_imagen(item.imagen_hash),
+    }
+    resumen = calificacion_item(item)
+    datos.update(calificacion=resumen.promedio, resenas=resumen.cantidad)
+    if tipo == 'producto':
+        datos.update(tipo=item.tipo, id_categoria=item.id_categoria, stock=item.stock)
+    else:
+        datos['duracion'] = item.duracion
+    return datos
+
+def _api_catalogo(tipo):
+    if current_user.rol != 'cliente':
+        return jsonify({'success': False, 'message': 'Acceso denegado. Solo para clientes.'}), 403
+    try:
+        _, items, siguiente, precios = _pagina_catalogo(tipo)
+    except CursorInvalido as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error al cargar el catálogo de {tipo}s: {str(e)}")
+        return jsonify({'success': False, 'message': f'Ocurrió un error: {str(e)}'}), 500
+    por_id = getattr(precios, f'{tipo}s')
+    return jsonify({
+        'success': True,
+        'items': [_item_catalogo_json(item, tipo, por_id[getattr(item, f'id_{tipo}')]) for item in items],
+        'siguiente': siguiente,
+        # Tarjetas ya renderizadas para el scroll infinito, con el mismo HTML que la página
+        'html': render_template(f'tarjetas_{tipo}s.html', **{f'{tipo}s': items, 'precios': precios})
+    })
+
+@bp.route('/api/productos')
+@login_required
+@condicional(CLAVE_CATALOGO)
+def api_productos():
+    return _api_catalogo('producto')
+
+@bp.route('/api/servicios')
+@login_required
+@condicional(CLAVE_CATALOGO)
+def api_servicios():
+    return _api_catalogo('servicio')
+
+@bp.route('/buscar')
+@login_required
+def buscar_catalogo():
+    if current_user.rol != 'cliente':
+        return jsonify({'success': False, 'message': 'Acceso denegado. Solo para clientes.'}), 403
+    consulta = request.args.get('q', '').strip()
+    tipo = request.args.get('tipo') if request.args.get('tipo') in ('producto', 'servicio') else None
+    if not consulta:
+        return jsonify({'success': True, 'q': consulta, 'resultados': []})
+    try:
+        resultados = buscar(consulta, limite=request.args.get('limite', 10, type=int), tipo=tipo)
+        precios = precios_efectivos(
+            (r.id for r in resultados if r.tipo == 'producto'),
+            (r.id for r in resultados if r.tipo == 'servicio')
+        )
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error en la búsqueda '{consulta}': {str(e)}")
+        return jsonify({'success': False, 'message': f'Ocurrió un error: {str(e)}'}), 500
+    salida = []
+    for resultado in resultados:
+        precio = getattr(precios, f'{resultado.tipo}s').get(resultado.id)
+        salida.append({
+            'tipo': resultado.tipo,
+            'id': resultado.id,
+            'nombre': resultado.nombre,
+            'rango': resultado.rango,
+            'precio': str(precio.precio) if precio else None,
+            'promocion': precio.nombre_promocion if precio else None,
+            'url': url_for('client.resenas', item_type=resultado.tipo, item_id=resultado.id),
+        })
+    return jsonify({'success': True, 'q': consulta, 'resultados': salida})
+
 @bp.route('/citas')
 @login_required
 def citas():
@@ -100,7 +188,7 @@ def citas():
         flash("Acceso denegado. Solo para clientes.", "danger")
         return redirect(url_for('auth.login'))
     servicio_id = request.args.get('servicio_id')
-    servicios = Servicio.query.all()
+    servicios = servicios_catalogo()
     return render_template('citas.html', servicios=servicios, servicio_id=servicio_id)
 
 @bp.route('/agregar_carrito/<int:item_id>', methods=['GET'])
@@ -127,29 +215,18 @@ def agregar_carrito(item_id):
         
         # Verificar promoción activa
         now = datetime.utcnow()
-        promocion = None
-        precio_unitario = None
+        precio = None
         if producto:
             if not hasattr(producto, 'precio') or producto.precio is None:
                 raise ValueError("El producto no tiene precio definido.")
             if not hasattr(producto, 'stock') or producto.stock is None or producto.stock <= 0:
                 flash("No hay stock disponible.", "danger")
                 return redirect(url_for('client.productos'))
-            promocion = Promocion.query.filter_by(id_producto=item_id).filter(
-                Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-            ).first()
-            precio_unitario = producto.precio
-            if promocion:
-                precio_unitario = Decimal(str(producto.precio)) * (1 - Decimal(str(promocion.descuento)) / 100)
+            precio = precio_efectivo(producto.precio, id_producto=item_id, momento=now)
         elif servicio:
             if not hasattr(servicio, 'precio') or servicio.precio is None:
                 raise ValueError("El servicio no tiene precio definido.")
-            promocion = Promocion.query.filter_by(id_servicio=item_id).filter(
-                Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-            ).first()
-            precio_unitario = servicio.precio
-            if promocion:
-                precio_unitario = Decimal(str(servicio.precio)) * (1 - Decimal(str(promocion.descuento)) / 100)
+            precio = precio_efectivo(servicio.precio, id_servicio=item_id, momento=now)
         else:
             raise ValueError("Item no encontrado o no es un producto ni un servicio.")
 
@@ -158,14 +235,14 @@ def agregar_carrito(item_id):
             id_producto=item_id if producto else None,
             id_servicio=item_id if servicio else None,
             cantidad=1,
-            precio_unitario=precio_unitario
+            precio_unitario=precio.precio
         )
         db.session.add(detalle)
         db.session.flush()
         logger.debug(f"Detalle creado con id_detalle_carrito={detalle.id_detalle_carrito}")
         db.session.commit()
         logger.debug(f"Detalle agregado al carrito {carrito.id_carrito} para item {item_id}")
-        flash(f"Item agregado al carrito{' con promoción aplicada' if promocion else ''}.", "success")
+        flash(f"Item agregado al carrito{' con promoción aplicada' if precio.en_promocion else ''}.", "success")
         return redirect(url_for('client.productos' if producto else 'client.servicios'))
     except IntegrityError as e:
         db.session.rollback()
@@ -190,7 +267,10 @@ def carrito():
             joinedload(Carrito.detalles).joinedload(DetalleCarrito.producto),
             joinedload(Carrito.detalles).joinedload(DetalleCarrito.servicio)
         ).filter_by(id_usuario=current_user.id_usuario, estado='activo').first()
-        promociones = Promocion.query.filter(Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now).all()
+        detalles = carrito.detalles if carrito else []
+        precios = precios_efectivos(
+            (d.id_producto for d in detalles), (d.id_servicio for d in detalles), momento=now
+        )
         logger.debug(f"Carrito cargado: {carrito}")
         if carrito:
             logger.debug(f"Detalles cargados: {[d.id_detalle_carrito for d in carrito.detalles]}")
@@ -200,7 +280,7 @@ def carrito():
             logger.debug("No se encontró carrito activo")
         if not carrito:
             flash("No tienes un carrito activo.", "info")
-        return render_template('carrito.html', carrito=carrito, promociones=promociones)
+        return render_template('carrito.html', carrito=carrito, precios=precios)
     except Exception as e:
         logger.error(f"Error al cargar carrito: {str(e)}")
         flash(f"Ocurrió un error al cargar el carrito: {str(e)}. Por favor, intenta de nuevo.", "danger")
@@ -315,6 +395,7 @@ def procesar_compra():
                     )
                     db.session.add(detalle_venta)
                     detalles_venta.append(detalle_venta)
+            registrar_en_resumen(venta.fecha_venta, detalles_venta)
 
             # Crear registro de pago
             metodo_pago = request.form.get('metodo_pago')
@@ -340,113 +421,24 @@ def procesar_compra():
                 db.session.delete(detalle)
             db.session.commit()
 
-            # Generar factura con ReportLab
-            nombre_archivo = f'factura_{current_user.id_usuario}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-            ruta_archivo = os.path.join(os.path.dirname(__file__), '..', 'static', nombre_archivo)
-            c = canvas.Canvas(ruta_archivo, pagesize=letter)
-            c.setFont("Helvetica-Bold", 16)
-
-            # Logo circular con tamaño ajustado
-            logo_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'images', 'casa-bella-logo.jpeg')
-            if os.path.exists(logo_path):
-                def create_circular_image(image_path, size=80):
-                    img = Image.open(image_path)
-                    img = img.convert("RGBA")
-                    img.thumbnail((size, size), Image.Resampling.LANCZOS)
-                    mask = Image.new('L', (size, size), 0)
-                    draw = ImageDraw.Draw(mask)
-                    draw.ellipse((0, 0, size, size), fill=255)
-                    output = Image.new('RGBA', (size, size), (255, 255, 255, 0))
-                    output.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
-                    output.putalpha(mask)
-                    img_buffer = io.BytesIO()
-                    output.save(img_buffer, format='PNG')
-                    img_buffer.seek(0)
-                    return img_buffer
-                
-                circular_logo = create_circular_image(logo_path, 80)
-                logo_x = 50
-                logo_y = 720
-                logo_size = 80
-                c.drawImage(ImageReader(circular_logo), logo_x, logo_y, logo_size, logo_size)
-
-            c.setFont("Helvetica-Bold", 18)
-            c.drawString(150, 760, "Casa Bella")
-            c.setFont("Helvetica", 14)
-            c.drawString(150, 740, "Salón de Belleza y Distribuidora")
-            
-            c.setStrokeColorRGB(0.2, 0.4, 0.8)
-            c.setLineWidth(2)
-            c.line(50, 710, 550, 710)
-
-            c.setFont("Helvetica-Bold", 12)
-            c.drawString(50, 680, "FACTURA")
-            c.setFont("Helvetica", 10)
-            c.drawString(400, 680, f"Fecha: {venta.fecha_venta.strftime('%Y-%m-%d %H:%M') if venta.fecha_venta else 'Sin fecha'}")
-            
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(50, 660, "DATOS DEL CLIENTE:")
-            c.setFont("Helvetica", 10)
-            c.drawString(50, 645, f"Nombre: {current_user.nombre}")
-            c.drawString(50, 630, f"Email: {current_user.email or 'No proporcionado'}")
-            c.drawString(50, 615, f"Teléfono: {current_user.telefono or 'No proporcionado'}")
-
-            y = 580
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(50, y, "PRODUCTOS/SERVICIOS:")
-            c.setStrokeColorRGB(0.8, 0.8, 0.8)
-            c.line(50, y-5, 550, y-5)
-            
-            y -= 25
-            c.setFont("Helvetica", 9)
-
-            now = datetime.utcnow()
-            for detalle in detalles_venta:
-                if detalle.id_producto:
-                    producto = Producto.query.get(detalle.id_producto)
-                    promocion = Promocion.query.filter_by(id_producto=detalle.id_producto).filter(
-                        Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-                    ).first()
-                    if producto:
-                        subtotal_item = Decimal(str(detalle.cantidad)) * Decimal(str(detalle.precio_unitario))
-                        c.drawString(60, y, f"{producto.nombre} x {detalle.cantidad} - ${subtotal_item.quantize(Decimal('0.01'))}")
-                        if promocion:
-                            c.drawString(60, y-15, f"Promoción: {promocion.nombre} ({promocion.descuento}% descuento)")
-                            y -= 15
-                        y -= 20
-                elif detalle.id_servicio:
-                    servicio = Servicio.query.get(detalle.id_servicio)
-                    promocion = Promocion.query.filter_by(id_servicio=detalle.id_servicio).filter(
-                        Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-                    ).first()
-                    if servicio:
-                        subtotal_item = Decimal(str(detalle.cantidad)) * Decimal(str(detalle.precio_unitario))
-                        c.drawString(60, y, f"{servicio.nombre} x {detalle.cantidad} - ${subtotal_item.quantize(Decimal('0.01'))}")
-                        if promocion:
-                            c.drawString(60, y-15, f"Promoción: {promocion.nombre} ({promocion.descuento}% descuento)")
-                            y -= 15
-                        y -= 20
-
-            c.drawString(50, y-10, "─" * 70)
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(400, y-30, f"Subtotal: ${subtotal.quantize(Decimal('0.01'))}")
-            c.drawString(400, y-45, f"IVA (16%): ${iva.quantize(Decimal('0.01'))}")
-            c.setFont("Helvetica-Bold", 12)
-            c.drawString(400, y-65, f"TOTAL: ${total.quantize(Decimal('0.01'))}")
-            
-            c.setFont("Helvetica-Oblique", 10)
-            c.drawString(50, y-100, "¡Gracias por confiar en Casa Bella!")
-            c.drawString(50, y-115, "Tu belleza es nuestra pasión")
-            c.save()
-
-            if not os.path.exists(ruta_archivo):
-                raise FileNotFoundError(f"El archivo {ruta_archivo} no se creó correctamente.")
-
-            flash("Compra procesada con éxito. Descargando factura...", "success")
-            response = send_file(ruta_archivo, as_attachment=True, download_name=nombre_archivo)
-            if os.path.exists(ruta_archivo):
-                os.remove(ruta_archivo)
-            return response
+            # Generar factura con el motor compartido
+            nombre_archivo = f'factura_{current_user.id_usuario}_{venta.id_venta}.pdf'
+            # La factura se renderiza en segundo plano para no bloquear el checkout
+            datos = datos_factura(
+                "FACTURA", venta.fecha_venta, datos_cliente(current_user),
+                "PRODUCTOS/SERVICIOS:", lineas_factura(detalles_venta), subtotal, iva, total
+            )
+            trabajo = encolar_factura(venta.id_venta, current_user.id_usuario, nombre_archivo, datos)
+
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return jsonify({
+                    'success': True,
+                    'id_venta': venta.id_venta,
+                    'id_trabajo': trabajo.id_trabajo,
+                    'estado_url': url_for('facturas.estado_trabajo', id_trabajo=trabajo.id_trabajo)
+                })
+            flash("Compra procesada con éxito. Tu factura se descargará en cuanto esté lista.", "success")
+            return redirect(url_for('client.dashboard', trabajo_factura=trabajo.id_trabajo))
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error al procesar la compra: {str(e)}")
@@ -470,8 +462,11 @@ def dashboard():
         citas = Cita.query.filter_by(id_usuario=current_user.id_usuario).options(
             joinedload(Cita.servicio)
         ).all()
-        promociones = Promocion.query.filter(Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now).all()
-        return render_template('dashboard_cliente.html', ventas=ventas, citas=citas, promociones=promociones)
+        detalles = [detalle for venta in ventas for detalle in venta.detalle_ventas]
+        precios = precios_efectivos(
+            (d.id_producto for d in detalles), (d.id_servicio for d in detalles), momento=now
+        )
+        return render_template('dashboard_cliente.html', ventas=ventas, citas=citas, precios=precios)
     except Exception as e:
         logger.error(f"Error al cargar dashboard: {str(e)}")
         flash(f"Ocurrió un error al cargar el dashboard: {str(e)}. Por favor, intenta de nuevo.", "danger")
@@ -549,120 +544,22 @@ def descargar_factura(venta_id):
         flash("No tienes permiso para descargar esta factura.", "danger")
         return redirect(url_for('client.dashboard'))
     try:
-        total = venta.total if venta.total else Decimal('0.00')
         detalles_venta = DetalleVenta.query.filter_by(id_venta=venta_id).options(
             joinedload(DetalleVenta.producto),
             joinedload(DetalleVenta.servicio)
         ).all()
-        subtotal = sum(Decimal(str(detalle.cantidad)) * Decimal(str(detalle.precio_unitario)) for detalle in detalles_venta)
-        iva = subtotal * IVA_RATE
-
-        nombre_archivo = f'factura_{current_user.id_usuario}_{venta_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        ruta_archivo = os.path.join(os.path.dirname(__file__), '..', 'static', nombre_archivo)
-        c = canvas.Canvas(ruta_archivo, pagesize=letter)
-        c.setFont("Helvetica-Bold", 16)
-
-        # Logo circular con tamaño ajustado
-        logo_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'images', 'casa-bella-logo.jpeg')
-        if os.path.exists(logo_path):
-            def create_circular_image(image_path, size=80):
-                img = Image.open(image_path)
-                img = img.convert("RGBA")
-                img.thumbnail((size, size), Image.Resampling.LANCZOS)
-                mask = Image.new('L', (size, size), 0)
-                draw = ImageDraw.Draw(mask)
-                draw.ellipse((0, 0, size, size), fill=255)
-                output = Image.new('RGBA', (size, size), (255, 255, 255, 0))
-                output.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
-                output.putalpha(mask)
-                img_buffer = io.BytesIO()
-                output.save(img_buffer, format='PNG')
-                img_buffer.seek(0)
-                return img_buffer
-            
-            circular_logo = create_circular_image(logo_path, 80)
-            logo_x = 50
-            logo_y = 720
-            logo_size = 80
-            c.drawImage(ImageReader(circular_logo), logo_x, logo_y, logo_size, logo_size)
-
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(150, 760, "Casa Bella")
-        c.setFont("Helvetica", 14)
-        c.drawString(150, 740, "Salón de Belleza y Distribuidora")
-        
-        c.setStrokeColorRGB(0.2, 0.4, 0.8)
-        c.setLineWidth(2)
-        c.line(50, 710, 550, 710)
-
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, 680, "FACTURA")
-        c.setFont("Helvetica", 10)
-        c.drawString(400, 680, f"Fecha: {venta.fecha_venta.strftime('%Y-%m-%d %H:%M') if venta.fecha_venta else 'Sin fecha'}")
-        
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(50, 660, "DATOS DEL CLIENTE:")
-        c.setFont("Helvetica", 10)
-        c.drawString(50, 645, f"Nombre: {current_user.nombre}")
-        c.drawString(50, 630, f"Email: {current_user.email or 'No proporcionado'}")
-        c.drawString(50, 615, f"Teléfono: {current_user.telefono or 'No proporcionado'}")
-
-        y = 580
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(50, y, "PRODUCTOS/SERVICIOS:")
-        c.setStrokeColorRGB(0.8, 0.8, 0.8)
-        c.line(50, y-5, 550, y-5)
-        
-        y -= 25
-        c.setFont("Helvetica", 9)
-
-        now = datetime.utcnow()
-        for detalle in detalles_venta:
-            if detalle.id_producto:
-                producto = detalle.producto
-                promocion = Promocion.query.filter_by(id_producto=detalle.id_producto).filter(
-                    Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-                ).first()
-                if producto:
-                    subtotal_item = Decimal(str(detalle.cantidad)) * Decimal(str(detalle.precio_unitario))
-                    c.drawString(60, y, f"{producto.nombre} x {detalle.cantidad} - ${subtotal_item.quantize(Decimal('0.01'))}")
-                    if promocion:
-                        c.drawString(60, y-15, f"Promoción: {promocion.nombre} ({promocion.descuento}% descuento)")
-                        y -= 15
-                    y -= 20
-            elif detalle.id_servicio:
-                servicio = detalle.servicio
-                promocion = Promocion.query.filter_by(id_servicio=detalle.id_servicio).filter(
-                    Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-                ).first()
-                if servicio:
-                    subtotal_item = Decimal(str(detalle.cantidad)) * Decimal(str(detalle.precio_unitario))
-                    c.drawString(60, y, f"{servicio.nombre} x {detalle.cantidad} - ${subtotal_item.quantize(Decimal('0.01'))}")
-                    if promocion:
-                        c.drawString(60, y-15, f"Promoción: {promocion.nombre} ({promocion.descuento}% descuento)")
-                        y -= 15
-                    y -= 20
-
-        c.drawString(50, y-10, "─" * 70)
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(400, y-30, f"Subtotal: ${subtotal.quantize(Decimal('0.01'))}")
-        c.drawString(400, y-45, f"IVA (16%): ${iva.quantize(Decimal('0.01'))}")
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(400, y-65, f"TOTAL: ${total.quantize(Decimal('0.01'))}")
-        
-        c.setFont("Helvetica-Oblique", 10)
-        c.drawString(50, y-100, "¡Gracias por confiar en Casa Bella!")
-        c.drawString(50, y-115, "Tu belleza es nuestra pasión")
-        c.save()
-
-        if not os.path.exists(ruta_archivo):
-            raise FileNotFoundError(f"El archivo {ruta_archivo} no se creó correctamente.")
+        nombre_archivo = nombre_archivo_venta(venta)
+        datos = datos_factura_venta(venta, detalles_venta, current_user)
 
         flash("Descargando factura...", "success")
-        response = send_file(ruta_archivo, as_attachment=True, download_name=nombre_archivo)
-        if os.path.exists(ruta_archivo):
-            os.remove(ruta_archivo)
-        return response
+        # Las descargas repetidas se sirven desde la caché en disco sin volver a renderizar
+        ruta = ruta_en_cache(venta_id, datos)
+        if ruta is None:
+            pdf = pdf_desde_datos(datos)
+            ruta = guardar_en_cache(venta_id, datos, pdf)
+            if ruta is None:
+                return respuesta_factura(pdf, nombre_archivo)
+        return respuesta_factura_archivo(ruta, nombre_archivo)
     except Exception as e:
         logger.error(f"Error al descargar factura: {str(e)}")
         flash(f"Ocurrió un error al descargar la factura: {str(e)}. Por favor, intenta de nuevo.", "danger")
@@ -679,13 +576,17 @@ def borrar_compra(venta_id):
         flash("No tienes permiso para borrar esta compra.", "danger")
         return redirect(url_for('client.dashboard'))
     try:
+        # Revertir la venta en el resumen diario antes de borrar sus detalles
+        descontar_del_resumen(venta, DetalleVenta.query.filter_by(id_venta=venta_id).all())
         # Eliminar registros relacionados
         DetalleVenta.query.filter_by(id_venta=venta_id).delete()
         Pago.query.filter_by(id_venta=venta_id).delete()
+        TrabajoFactura.query.filter_by(id_venta=venta_id).delete()
         # Eliminar movimientos de inventario basados en el campo motivo
         InventarioMovimiento.query.filter(InventarioMovimiento.motivo == f'Venta ID: {venta_id}').delete()
         db.session.delete(venta)
         db.session.commit()
+        invalidar_factura(venta_id)
         flash("Compra eliminada con éxito.", "success")
     except IntegrityError as e:
         db.session.rollback()
@@ -776,7 +677,7 @@ def editar_cita(cita_id):
             db.session.rollback()
             logger.error(f"Error al editar cita: {str(e)}")
             flash(f"Ocurrió un error al editar la cita: {str(e)}. Por favor, intenta de nuevo.", "danger")
-    servicios = Servicio.query.all()
+    servicios = servicios_catalogo()
     return render_template('editar_cita.html', cita=cita, servicios=servicios)
 
 @bp.route('/reservar_cita', methods=['POST'])
@@ -967,15 +868,20 @@ def resenas(item_type, item_id):
                 comentario=comentario
             )
             db.session.add(new_review)
+            registrar_resena(new_review)
             db.session.commit()
             flash(f"Reseña para {item_name} enviada correctamente.", "success")
             return redirect(url_for('client.resenas', item_type=item_type, item_id=item_id))
-        reviews = Reseña.query.options(
-            joinedload(Reseña.usuario)
-        ).filter(
-            (Reseña.id_producto == item_id) if item_type == 'producto' else (Reseña.id_servicio == item_id)
-        ).all()
-        return render_template('reseñas.html', item_type=item_type, item_id=item_id, item_name=item_name, reviews=reviews)
+        reviews, siguiente = pagina_resenas(item_type, item_id, cursor=request.args.get('cursor'))
+        ya_reseno = db.session.query(Reseña.query.filter_by(
+            id_usuario=current_user.id_usuario,
+            id_producto=item_id if item_type == 'producto' else None,
+            id_servicio=item_id if item_type == 'servicio' else None
+        ).exists()).scalar()
+        return render_template('reseñas.html', item_type=item_type, item_id=item_id, item_name=item_name, reviews=reviews,
+                               siguiente=siguiente, ya_reseno=ya_reseno, resumen=calificacion_item(item))
+    except CursorInvalido:
+        return redirect(url_for('client.resenas', item_type=item_type, item_id=item_id))
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error al gestionar reseñas: {str(e)}")
@@ -1006,9 +912,7 @@ def generate_factura_latex(carrito, venta):
         promocion = None
         if detalle.id_producto:
             producto = Producto.query.get(detalle.id_producto)
-            promocion = Promocion.query.filter_by(id_producto=detalle.id_producto).filter(
-                Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-            ).first()
+            promocion = promocion_vigente(id_producto=detalle.id_producto, momento=now)
             if producto:
                 row = f"{escape_latex(producto.nombre)} & {detalle.cantidad or 0} & ${Decimal(str(detalle.precio_unitario or 0)).quantize(Decimal('0.01'))} & ${(Decimal(str(detalle.cantidad or 0)) * Decimal(str(detalle.precio_unitario or 0))).quantize(Decimal('0.01'))}"
                 if promocion:
@@ -1017,9 +921,7 @@ def generate_factura_latex(carrito, venta):
                 table_rows.append(row)
         elif detalle.id_servicio:
             servicio = Servicio.query.get(detalle.id_servicio)
-            promocion = Promocion.query.filter_by(id_servicio=detalle.id_servicio).filter(
-                Promocion.fecha_inicio <= now, Promocion.fecha_fin >= now
-            ).first()
+            promocion = promocion_vigente(id_servicio=detalle.id_servicio, momento=now)
             if servicio:
                 row = f"{escape_latex(servicio.nombre)} & {detalle.cantidad or 0} & ${Decimal(str(detalle.precio_unitario or 0)).quantize(Decimal('0.01'))} & ${(Decimal(str(detalle.cantidad or 0)) * Decimal(str(detalle.precio_unitario or 0))).quantize(Decimal('0.01'))}"
                 if promocion:
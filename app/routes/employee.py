@@ -1,5 +1,5 @@
 # app/routes/employee.py
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, send_file
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
 from app import db
 from app.models.citas import Cita
 from app.models.servicios import Servicio
@@ -14,13 +14,11 @@ from flask_login import login_required, current_user
 import logging
 from datetime import datetime
 from decimal import Decimal
-import os
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.lib.colors import white
-from PIL import Image, ImageDraw
-import io
+from app.services.facturas import linea_factura, datos_factura
+from app.services.facturas_ventas import IVA_RATE
+from app.services.resumen_ventas import registrar_en_resumen
+from app.services.cola_facturas import encolar_factura
+from app.services.cache_catalogo import productos_catalogo, servicios_catalogo
 import json
 from sqlalchemy.orm import joinedload
 
@@ -30,9 +28,6 @@ bp = Blueprint('employee', __name__, url_prefix='/employee')
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# IVA (16% como estándar, ajustable)
-IVA_RATE = Decimal("0.16")
-
 @bp.route('/dashboard')
 @login_required
 def empleado_dashboard():
@@ -189,93 +184,21 @@ def generar_factura(id_cita):
         precio_unitario=servicio.precio
     )
     db.session.add(detalle_venta)
+    registrar_en_resumen(venta.fecha_venta, [detalle_venta])
 
     pago = Pago(id_venta=venta.id_venta, metodo_pago='efectivo', monto=total)
     db.session.add(pago)
 
     db.session.commit()
 
-    nombre_archivo = f'factura_{cita.id_usuario}_{venta.id_venta}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-    ruta_archivo = os.path.join(os.path.dirname(__file__), '..', 'static', nombre_archivo)
-    c = canvas.Canvas(ruta_archivo, pagesize=letter)
-    c.setFont("Helvetica-Bold", 16)
-
-    logo_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'images', 'casa-bella-logo.jpeg')
-    if os.path.exists(logo_path):
-        def create_circular_image(image_path, size=80):
-            img = Image.open(image_path)
-            img = img.convert("RGBA")
-            img.thumbnail((size, size), Image.Resampling.LANCZOS)
-            mask = Image.new('L', (size, size), 0)
-            draw = ImageDraw.Draw(mask)
-            draw.ellipse((0, 0, size, size), fill=255)
-            output = Image.new('RGBA', (size, size), (255, 255, 255, 0))
-            output.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
-            output.putalpha(mask)
-            img_buffer = io.BytesIO()
-            output.save(img_buffer, format='PNG')
-            img_buffer.seek(0)
-            return img_buffer
-        
-        circular_logo = create_circular_image(logo_path, 80)
-        logo_x = 50
-        logo_y = 720
-        logo_size = 80
-        c.drawImage(ImageReader(circular_logo), logo_x, logo_y, logo_size, logo_size)
-
-    c.setFont("Helvetica-Bold", 18)
-    c.drawString(150, 760, "Casa Bella")
-    c.setFont("Helvetica", 14)
-    c.drawString(150, 740, "Salón de Belleza y Distribuidora")
-    
-    c.setStrokeColorRGB(0.2, 0.4, 0.8)
-    c.setLineWidth(2)
-    c.line(50, 710, 550, 710)
-
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, 680, "FACTURA")
-    c.setFont("Helvetica", 10)
-    c.drawString(400, 680, f"Fecha: {venta.fecha_venta.strftime('%Y-%m-%d %H:%M')}")
-    
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(50, 660, "DATOS DEL CLIENTE:")
-    c.setFont("Helvetica", 10)
-    c.drawString(50, 645, f"Nombre: {cliente.nombre}")
-    c.drawString(50, 630, f"Email: {cliente.email or 'No proporcionado'}")
-    c.drawString(50, 615, f"Teléfono: {cliente.telefono or 'No proporcionado'}")
-
-    y = 580
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(50, y, "SERVICIOS:")
-    c.setStrokeColorRGB(0.8, 0.8, 0.8)
-    c.line(50, y-5, 550, y-5)
-    
-    y -= 25
-    c.setFont("Helvetica", 9)
-    subtotal_item = Decimal(str(1)) * Decimal(str(servicio.precio))
-    c.drawString(60, y, f"{servicio.nombre} x 1 - ${subtotal_item.quantize(Decimal('0.01'))}")
-    y -= 20
-
-    c.drawString(50, y-10, "─" * 70)
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(400, y-30, f"Subtotal: ${subtotal.quantize(Decimal('0.01'))}")
-    c.drawString(400, y-45, f"IVA (16%): ${iva.quantize(Decimal('0.01'))}")
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(400, y-65, f"TOTAL: ${total.quantize(Decimal('0.01'))}")
-    
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawString(50, y-100, "¡Gracias por confiar en Casa Bella!")
-    c.drawString(50, y-115, "Tu belleza es nuestra pasión")
-    c.save()
-
-    if not os.path.exists(ruta_archivo):
-        raise FileNotFoundError(f"El archivo {ruta_archivo} no se creó correctamente.")
+    nombre_archivo = f'factura_{cita.id_usuario}_{venta.id_venta}.pdf'
+    cliente_factura = {'nombre': cliente.nombre, 'email': cliente.email, 'telefono': cliente.telefono}
+    lineas = [linea_factura(servicio.nombre, 1, servicio.precio)]
+    datos = datos_factura("FACTURA", venta.fecha_venta, cliente_factura, "SERVICIOS:", lineas, subtotal, iva, total)
+    trabajo = encolar_factura(venta.id_venta, current_user.id_usuario, nombre_archivo, datos)
 
-    flash("Factura generada con éxito. Descargando...", "success")
-    response = send_file(ruta_archivo, as_attachment=True, download_name=nombre_archivo)
-    if os.path.exists(ruta_archivo):
-        os.remove(ruta_archivo)
-    return response
+    flash("Factura generada con éxito. Se descargará en cuanto esté lista.", "success")
+    return redirect(url_for('employee.trabajar_citas', trabajo_factura=trabajo.id_trabajo))
 
 @bp.route('/generar_factura_manual', methods=['GET', 'POST'])
 @login_required
@@ -327,6 +250,7 @@ def generar_factura_manual():
                 
                 detalles_venta.append({
                     'id': item_id,
+                    'nombre': producto.nombre if producto else servicio.nombre,
                     'cantidad': cantidad,
                     'precio_unitario': producto.precio if producto else servicio.precio,
                     'es_producto': bool(producto)
@@ -348,6 +272,7 @@ def generar_factura_manual():
             db.session.rollback()
             return redirect(url_for('employee.generar_factura_manual'))
 
+        detalles_guardados = []
         for detalle in detalles_venta:
             detalle_venta = DetalleVenta(
                 id_venta=venta.id_venta,
@@ -357,95 +282,28 @@ def generar_factura_manual():
                 precio_unitario=detalle['precio_unitario']
             )
             db.session.add(detalle_venta)
+            detalles_guardados.append(detalle_venta)
+        registrar_en_resumen(venta.fecha_venta, detalles_guardados)
 
         pago = Pago(id_venta=venta.id_venta, metodo_pago='efectivo', monto=total)
         db.session.add(pago)
         db.session.commit()
 
-        nombre_archivo = f'factura_manual_{venta.id_venta}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        ruta_archivo = os.path.join(os.path.dirname(__file__), '..', 'static', nombre_archivo)
-        c = canvas.Canvas(ruta_archivo, pagesize=letter)
-        c.setFont("Helvetica-Bold", 16)
-
-        logo_path = os.path.join(os.path.dirname(__file__), '..', 'static', 'images', 'casa-bella-logo.jpeg')
-        if os.path.exists(logo_path):
-            def create_circular_image(image_path, size=80):
-                img = Image.open(image_path)
-                img = img.convert("RGBA")
-                img.thumbnail((size, size), Image.Resampling.LANCZOS)
-                mask = Image.new('L', (size, size), 0)
-                draw = ImageDraw.Draw(mask)
-                draw.ellipse((0, 0, size, size), fill=255)
-                output = Image.new('RGBA', (size, size), (255, 255, 255, 0))
-                output.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
-                output.putalpha(mask)
-                img_buffer = io.BytesIO()
-                output.save(img_buffer, format='PNG')
-                img_buffer.seek(0)
-                return img_buffer
-            
-            circular_logo = create_circular_image(logo_path, 80)
-            logo_x = 50
-            logo_y = 720
-            logo_size = 80
-            c.drawImage(ImageReader(circular_logo), logo_x, logo_y, logo_size, logo_size)
-
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(150, 760, "Casa Bella")
-        c.setFont("Helvetica", 14)
-        c.drawString(150, 740, "Salón de Belleza y Distribuidora")
-        
-        c.setStrokeColorRGB(0.2, 0.4, 0.8)
-        c.setLineWidth(2)
-        c.line(50, 710, 550, 710)
-
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, 680, "FACTURA (Cliente No Registrado)")
-        c.setFont("Helvetica", 10)
-        c.drawString(400, 680, f"Fecha: {venta.fecha_venta.strftime('%Y-%m-%d %H:%M')}")
-        
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(50, 660, "DATOS DEL CLIENTE:")
-        c.setFont("Helvetica", 10)
-        c.drawString(50, 645, f"Nombre: {nombre_cliente}")
-        c.drawString(50, 630, f"Email: {email_cliente or 'No proporcionado'}")
-        c.drawString(50, 615, f"Teléfono: {telefono_cliente or 'No proporcionado'}")
-
-        y = 580
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(50, y, "PRODUCTOS/SERVICIOS:")
-        c.setStrokeColorRGB(0.8, 0.8, 0.8)
-        c.line(50, y-5, 550, y-5)
-        
-        y -= 25
-        c.setFont("Helvetica", 9)
-        for detalle in detalles_venta:
-            item_name = Producto.query.get(detalle['id']).nombre if detalle['es_producto'] else Servicio.query.get(detalle['id']).nombre
-            subtotal_item = Decimal(str(detalle['cantidad'])) * Decimal(str(detalle['precio_unitario']))
-            c.drawString(60, y, f"{item_name} x {detalle['cantidad']} - ${subtotal_item.quantize(Decimal('0.01'))}")
-            y -= 20
-
-        c.drawString(50, y-10, "─" * 70)
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(400, y-30, f"Subtotal: ${subtotal.quantize(Decimal('0.01'))}")
-        c.drawString(400, y-45, f"IVA (16%): ${iva.quantize(Decimal('0.01'))}")
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(400, y-65, f"TOTAL: ${total.quantize(Decimal('0.01'))}")
-        
-        c.setFont("Helvetica-Oblique", 10)
-        c.drawString(50, y-100, "¡Gracias por confiar en Casa Bella!")
-        c.drawString(50, y-115, "Tu belleza es nuestra pasión")
-        c.save()
-
-        if not os.path.exists(ruta_archivo):
-            raise FileNotFoundError(f"El archivo {ruta_archivo} no se creó correctamente.")
+        nombre_archivo = f'factura_manual_{venta.id_venta}.pdf'
+        cliente_factura = {'nombre': nombre_cliente, 'email': email_cliente, 'telefono': telefono_cliente}
+        lineas = [
+            linea_factura(detalle['nombre'], detalle['cantidad'], detalle['precio_unitario'])
+            for detalle in detalles_venta
+        ]
+        datos = datos_factura(
+            "FACTURA (Cliente No Registrado)", venta.fecha_venta, cliente_factura,
+            "PRODUCTOS/SERVICIOS:", lineas, subtotal, iva, total
+        )
+        trabajo = encolar_factura(venta.id_venta, current_user.id_usuario, nombre_archivo, datos)
 
-        flash("Factura generada con éxito. Descargando...", "success")
-        response = send_file(ruta_archivo, as_attachment=True, download_name=nombre_archivo)
-        if os.path.exists(ruta_archivo):
-            os.remove(ruta_archivo)
-        return response
+        flash("Factura generada con éxito. Se descargará en cuanto esté lista.", "success")
+        return redirect(url_for('employee.generar_factura_manual', trabajo_factura=trabajo.id_trabajo))
 
-    productos = Producto.query.all()
-    servicios = Servicio.query.all()
+    productos = productos_catalogo()
+    servicios = servicios_catalogo()
     return render_template('generar_factura.html', productos=productos, servicios=servicios)
\ No newline at end of file
@@ -0,0 +1,41 @@
+# app/routes/estaticos.py
+from flask import Blueprint, abort, current_app, request, send_from_directory
+import click
+import mimetypes
+import os
+from werkzeug.security import safe_join
+from app.services.estaticos import construir, directorio_compilados
+
+bp = Blueprint('estaticos', __name__, url_prefix='/estaticos')
+
+UN_ANO = 365 * 24 * 3600
+# Preferencia del servidor entre las codificaciones que acepte el cliente
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+@bp.route('/<path:archivo>')
+def recurso(archivo):
+    """Recurso compilado con huella: la copia precomprimida que acepte el cliente y caché inmutable."""
+    directorio = directorio_compilados()
+    ruta = safe_join(directorio, archivo)
+    if ruta is None or not os.path.isfile(ruta):
+        abort(404)
+    mimetype = mimetypes.guess_type(archivo)[0] or 'application/octet-stream'
+    servido, codificacion = archivo, None
+    for nombre, extension in CODIFICACIONES:
+        if request.accept_encodings[nombre] and os.path.isfile(ruta + extension):
+            servido, codificacion = archivo + extension, nombre
+            break
+    response = send_from_directory(directorio, servido, mimetype=mimetype, max_age=UN_ANO, conditional=True)
+    if codificacion:
+        response.headers['Content-Encoding'] = codificacion
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@bp.cli.command('construir')
+@click.option('--limpiar', is_flag=True, help='Borrar los compilados que ya no están en el manifiesto.')
+def construir_estaticos(limpiar):
+    """Minifica, agrupa y pone huella a css/, js/ e images/ y genera sus copias comprimidas."""
+    manifiesto = construir(current_app, limpiar=limpiar)
+    click.echo(f"Recursos compilados: {len(manifiesto)} en {directorio_compilados()}")
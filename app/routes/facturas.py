@@ -0,0 +1,50 @@
+# app/routes/facturas.py
+from flask import Blueprint, jsonify, redirect, url_for, flash
+from flask_login import login_required, current_user
+from datetime import timedelta
+import click
+from app.models.trabajos_factura import TrabajoFactura
+from app.services.cola_facturas import reanudar_si_es_necesario, purgar_trabajos
+from app.services.facturas import respuesta_factura
+
+bp = Blueprint('facturas', __name__, url_prefix='/facturas')
+
+def _trabajo_autorizado(id_trabajo):
+    trabajo = TrabajoFactura.query.get_or_404(id_trabajo)
+    if trabajo.id_usuario != current_user.id_usuario and current_user.rol != 'admin':
+        return None
+    return trabajo
+
+@bp.route('/trabajos/<int:id_trabajo>')
+@login_required
+def estado_trabajo(id_trabajo):
+    """Estado de un trabajo de factura, pensado para consultarse periódicamente."""
+    trabajo = _trabajo_autorizado(id_trabajo)
+    if not trabajo:
+        return jsonify({'success': False, 'message': 'No tienes permiso para ver esta factura.'}), 403
+    reanudar_si_es_necesario(trabajo)
+    respuesta = {'success': True, 'id_trabajo': trabajo.id_trabajo, 'estado': trabajo.estado}
+    if trabajo.estado == 'completado':
+        respuesta['descarga_url'] = url_for('facturas.descargar_trabajo', id_trabajo=trabajo.id_trabajo)
+    elif trabajo.estado == 'error':
+        respuesta['message'] = 'No se pudo generar la factura. Intenta de nuevo más tarde.'
+    return jsonify(respuesta)
+
+@bp.route('/trabajos/<int:id_trabajo>/descargar')
+@login_required
+def descargar_trabajo(id_trabajo):
+    """Descarga el PDF de un trabajo terminado."""
+    trabajo = _trabajo_autorizado(id_trabajo)
+    if not trabajo:
+        flash("No tienes permiso para descargar esta factura.", "danger")
+        return redirect(url_for('auth.login'))
+    if trabajo.estado != 'completado' or trabajo.pdf is None:
+        return jsonify({'success': False, 'estado': trabajo.estado, 'message': 'La factura aún no está lista.'}), 409
+    return respuesta_factura(trabajo.pdf, trabajo.nombre_archivo)
+
+@bp.cli.command('purgar')
+@click.option('--horas', default=24, show_default=True, help='Antigüedad mínima de los trabajos a borrar.')
+def purgar(horas):
+    """Borra los trabajos de factura terminados."""
+    borrados = purgar_trabajos(timedelta(hours=horas))
+    click.echo(f"Trabajos eliminados: {borrados}")
@@ -3,6 +3,7 @@ from app import db
 from flask_login import login_required, current_user
 import logging
 from datetime import datetime
+from app.services.cache_http import condicional
 
 bp = Blueprint('home', __name__, url_prefix='/')
 
@@ -11,6 +12,7 @@ logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 @bp.route('/')
+@condicional()
 def index():
     return render_template('index.html')
 
@@ -0,0 +1,85 @@
+# app/routes/imagenes.py
+from flask import Blueprint, abort, current_app, send_file
+from io import BytesIO
+import click
+import logging
+import os
+import urllib.request
+from app import db
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+from app.services.imagenes import guardar_imagen, regenerar_variantes, ruta_variante
+
+bp = Blueprint('imagenes', __name__, url_prefix='/imagenes')
+logger = logging.getLogger(__name__)
+
+UN_ANO = 365 * 24 * 3600
+
+@bp.route('/<huella>/<int:ancho>.<formato>')
+def variante(huella, ancho, formato):
+    """Variante de una imagen subida; la URL lleva el hash del contenido, así que nunca cambia."""
+    ruta = ruta_variante(huella, ancho, formato)
+    if ruta is None:
+        abort(404)
+    response = send_file(ruta, mimetype='image/webp' if formato == 'webp' else 'image/jpeg',
+                         max_age=UN_ANO, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def _origen_local(item, tipo):
+    """Archivo en static que hoy se muestra para el item, si existe."""
+    candidatos = [os.path.join('images', f'{tipo}_{getattr(item, f"id_{tipo}")}.jpg')]
+    if item.imagen_url and item.imagen_url.startswith('/static/'):
+        candidatos.insert(0, item.imagen_url[len('/static/'):])
+    for relativa in candidatos:
+        ruta = os.path.join(current_app.static_folder, relativa)
+        if os.path.isfile(ruta):
+            return ruta
+    return None
+
+def _descargar(url, max_bytes):
+    with urllib.request.urlopen(url, timeout=15) as respuesta:
+        return BytesIO(respuesta.read(max_bytes + 1))
+
+@bp.cli.command('importar')
+@click.option('--descargar', is_flag=True, help='Descargar también las imagen_url remotas (http/https).')
+def importar_imagenes(descargar):
+    """Procesa las imágenes actuales de productos y servicios que aún no tienen variantes."""
+    max_bytes = current_app.config.get('IMAGENES_MAX_MB', 10) * 1024 * 1024
+    importadas = fallidas = 0
+    for modelo, tipo in ((Producto, 'producto'), (Servicio, 'servicio')):
+        for item in modelo.query.filter(modelo.imagen_hash.is_(None)).yield_per(500):
+            try:
+                ruta = _origen_local(item, tipo)
+                if ruta:
+                    with open(ruta, 'rb') as archivo:
+                        item.imagen_hash = guardar_imagen(archivo, max_bytes)
+                elif descargar and item.imagen_url and item.imagen_url.startswith(('http://', 'https://')):
+                    item.imagen_hash = guardar_imagen(_descargar(item.imagen_url, max_bytes), max_bytes)
+                else:
+                    continue
+                importadas += 1
+            except (ValueError, OSError) as e:
+                fallidas += 1
+                logger.error(f"Error al importar la imagen del {tipo} {getattr(item, f'id_{tipo}')}: {str(e)}")
+        db.session.commit()
+    click.echo(f"Imágenes importadas: {importadas}; con error: {fallidas}.")
+
+@bp.cli.command('regenerar')
+def regenerar_imagenes():
+    """Vuelve a generar las variantes de las imágenes en uso (p. ej. tras cambiar los anchos)."""
+    huellas = {huella for modelo in (Producto, Servicio)
+               for (huella,) in db.session.query(modelo.imagen_hash).filter(modelo.imagen_hash.isnot(None))}
+    regeneradas = fallidas = 0
+    for huella in sorted(huellas):
+        try:
+            if regenerar_variantes(huella):
+                regeneradas += 1
+            else:
+                fallidas += 1
+                logger.error(f"La imagen {huella} no tiene original en disco.")
+        except (ValueError, OSError) as e:
+            fallidas += 1
+            logger.error(f"Error al regenerar la imagen {huella}: {str(e)}")
+    click.echo(f"Imágenes regeneradas: {regeneradas}; con error: {fallidas}.")
@@ -0,0 +1,140 @@
+# app/services/alertas_inventario.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import logging
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import db
+from app.models.alertas_inventario import AlertaInventario
+from app.models.inventario_movimientos import InventarioMovimiento
+from app.models.notificaciones import Notificacion
+from app.models.productos import Producto
+from app.models.users import Usuario
+
+logger = logging.getLogger(__name__)
+
+# Escribir en estas tablas puede cambiar el estado de las alertas
+TABLAS_INVENTARIO = {'productos', 'inventario_movimientos'}
+
+_ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='alertas-inventario')
+_pendiente = threading.Event()
+
+
+def _condiciones(ahora):
+    """Valor actual de cada alerta y el mensaje que se enviaría."""
+    stock_bajo = Producto.query.filter(Producto.stock <= Producto.stock_minimo).count()
+    movimientos = InventarioMovimiento.query.filter(
+        InventarioMovimiento.fecha_movimiento >= ahora - timedelta(days=7)
+    ).count()
+    return {
+        'stock_bajo': (stock_bajo, f"Hay {stock_bajo} productos con stock bajo (menor o igual a stock mínimo)."),
+        'movimientos_recientes': (movimientos, f"Se han registrado {movimientos} movimientos de inventario en los últimos 7 días.")
+    }
+
+
+def _asegurar_estados(claves):
+    """Crea las filas de estado que falten sin pisar las existentes (upsert sin actualización)."""
+    modulo = postgresql if db.session.get_bind().dialect.name == 'postgresql' else sqlite
+    db.session.execute(
+        modulo.insert(AlertaInventario).on_conflict_do_nothing(index_elements=['clave']),
+        [{'clave': clave, 'activa': False, 'valor': 0} for clave in claves]
+    )
+
+
+def evaluar_alertas_inventario(ahora=None):
+    """Actualiza el estado de las alertas y notifica a los administradores solo si algo cambió.
+
+    Una alerta notifica cuando está activa y su valor difiere del último
+    notificado, siempre que haya pasado el tiempo de espera desde el aviso
+    anterior. Devuelve las claves que generaron notificación.
+    """
+    ahora = ahora or datetime.now()
+    espera = timedelta(minutes=current_app.config.get('ALERTAS_INVENTARIO_COOLDOWN_MIN', 360))
+    condiciones = _condiciones(ahora)
+    _asegurar_estados(condiciones)
+    # Bloquear las filas para que dos evaluaciones simultáneas no dupliquen avisos
+    estados = {
+        estado.clave: estado
+        for estado in AlertaInventario.query.filter(AlertaInventario.clave.in_(condiciones)).with_for_update()
+    }
+
+    notificadas = []
+    admins = None
+    for clave, (valor, mensaje) in condiciones.items():
+        estado = estados[clave]
+        activa = valor > 0
+        if activa != estado.activa:
+            estado.activa = activa
+            estado.fecha_cambio = ahora
+        estado.valor = valor
+        if not activa:
+            estado.valor_notificado = None
+            continue
+        if valor == estado.valor_notificado:
+            continue
+        if estado.fecha_notificacion and ahora - estado.fecha_notificacion < espera:
+            continue
+        if admins is None:
+            admins = [id_usuario for (id_usuario,) in db.session.query(Usuario.id_usuario).filter(Usuario.rol == 'admin')]
+        db.session.add_all([
+            Notificacion(id_usuario=id_usuario, mensaje=mensaje, tipo='inventario') for id_usuario in admins
+        ])
+        estado.valor_notificado = valor
+        estado.fecha_notificacion = ahora
+        notificadas.append(clave)
+    db.session.commit()
+    return notificadas
+
+
+def _evaluar_en_segundo_plano(app):
+    _pendiente.clear()
+    with app.app_context():
+        try:
+            evaluar_alertas_inventario()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error al evaluar alertas de inventario: {str(e)}")
+
+
+def programar_evaluacion(app):
+    """Encola una evaluación; varias escrituras seguidas se agrupan en una sola."""
+    if _pendiente.is_set():
+        return
+    _pendiente.set()
+    _ejecutor.submit(_evaluar_en_segundo_plano, app)
+
+
+_eventos_registrados = False
+
+
+def init_alertas_inventario(app):
+    """Registra la evaluación de alertas tras cada commit que toque productos o inventario."""
+    global _eventos_registrados
+    if _eventos_registrados:
+        return
+    _eventos_registrados = True
+
+    @event.listens_for(Session, 'after_flush')
+    def _marcar_escritura(session, flush_context):
+        objetos = list(session.new) + list(session.dirty) + list(session.deleted)
+        if {getattr(objeto, '__tablename__', None) for objeto in objetos} & TABLAS_INVENTARIO:
+            session.info['inventario_modificado'] = True
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def _marcar_escritura_masiva(orm_execute_state):
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            tabla = getattr(orm_execute_state.statement, 'table', None)
+            if tabla is not None and tabla.name in TABLAS_INVENTARIO:
+                orm_execute_state.session.info['inventario_modificado'] = True
+
+    @event.listens_for(Session, 'after_commit')
+    def _evaluar(session):
+        if session.info.pop('inventario_modificado', False) and has_app_context():
+            programar_evaluacion(current_app._get_current_object())
+
+    @event.listens_for(Session, 'after_rollback')
+    def _descartar(session):
+        session.info.pop('inventario_modificado', None)
@@ -0,0 +1,238 @@
+# app/services/api_catalogo.py
+import base64
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+import json
+from flask import current_app
+from sqlalchemy import or_
+from app import db
+from app.models.bajas_catalogo import BajaCatalogo
+from app.models.categorias import Categoria
+from app.models.productos import Producto
+from app.models.promociones import Promocion
+from app.models.servicios import Servicio
+from app.services.cache_catalogo import version_confirmada
+from app.services.catalogo import CursorInvalido
+from app.services.imagenes import urls_imagen
+from app.services.precios import tabla_precios
+from app.services.resenas import Calificacion
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+POR_PAGINA = 100
+MAX_POR_PAGINA = 500
+
+# Campos calculados -> columnas que necesitan; los de precio salen de PrecioItem
+CAMPOS_PRECIO = {'precio_efectivo': 'precio', 'descuento': 'descuento', 'id_promocion': 'id_promocion',
+                 'promocion': 'nombre_promocion'}
+DERIVADOS = {
+    **{campo: ('precio',) for campo in CAMPOS_PRECIO},
+    'imagenes': ('imagen_hash',),
+    'calificacion': ('resenas_cantidad', 'resenas_suma'),
+}
+
+# nombre -> modelo, columna id, campos públicos (nombre -> atributo del modelo o None si
+# es calculado), tipo para la tabla de precios y estados que no se muestran
+Recurso = namedtuple('Recurso', 'modelo id campos tipo_precio ocultos')
+
+RECURSOS = {
+    'categorias': Recurso(Categoria, Categoria.id_categoria, {
+        'id': 'id_categoria', 'nombre': 'nombre', 'descripcion': 'descripcion', 'version': 'version_catalogo',
+    }, None, ()),
+    'productos': Recurso(Producto, Producto.id_producto, {
+        'id': 'id_producto', 'nombre': 'nombre', 'descripcion': 'descripcion', 'tipo': 'tipo',
+        'id_categoria': 'id_categoria', 'precio': 'precio', 'precio_efectivo': None, 'descuento': None,
+        'id_promocion': None, 'promocion': None, 'stock': 'stock', 'estado': 'estado',
+        'imagen_url': 'imagen_url', 'imagenes': None, 'calificacion': None, 'resenas': 'resenas_cantidad',
+        'version': 'version_catalogo',
+    }, 'producto', ('inactivo',)),
+    'servicios': Recurso(Servicio, Servicio.id_servicio, {
+        'id': 'id_servicio', 'nombre': 'nombre', 'descripcion': 'descripcion', 'precio': 'precio',
+        'precio_efectivo': None, 'descuento': None, 'id_promocion': None, 'promocion': None,
+        'duracion': 'duracion', 'estado': 'estado', 'imagen_url': 'imagen_url', 'imagenes': None,
+        'calificacion': None, 'resenas': 'resenas_cantidad', 'version': 'version_catalogo',
+    }, 'servicio', ('inactivo',)),
+    'promociones': Recurso(Promocion, Promocion.id_promocion, {
+        'id': 'id_promocion', 'nombre': 'nombre', 'descripcion': 'descripcion', 'descuento': 'descuento',
+        'fecha_inicio': 'fecha_inicio', 'fecha_fin': 'fecha_fin', 'id_producto': 'id_producto',
+        'id_servicio': 'id_servicio', 'estado': 'estado', 'version': 'version_catalogo',
+    }, None, ('expirada',)),
+}
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def campos_pedidos(recurso, valor):
+    """Campos de `?campos=a,b,c` en el orden pedido; todos si no se indica ninguno."""
+    disponibles = RECURSOS[recurso].campos
+    if not valor:
+        return list(disponibles)
+    campos = list(dict.fromkeys(campo.strip() for campo in valor.split(',') if campo.strip()))
+    desconocidos = [campo for campo in campos if campo not in disponibles]
+    if desconocidos:
+        raise ParametroInvalido(f"Campos desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(disponibles)}.")
+    # El id siempre va: sin él el cliente no puede aplicar los cambios
+    return campos if 'id' in campos else ['id'] + campos
+
+
+def version_pedida(valor):
+    if valor in (None, ''):
+        return None
+    if not valor.isdigit():
+        raise ParametroInvalido("since debe ser una versión del catálogo (entero no negativo).")
+    return int(valor)
+
+
+def _codificar_cursor(version, desde, id_item):
+    datos = json.dumps([version, desde, id_item], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    try:
+        datos = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        version, desde, id_item = json.loads(datos)
+        return int(version), None if desde is None else int(desde), int(id_item)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(f"Cursor de paginación inválido: {cursor}") from e
+
+
+def _atributos(recurso, campos):
+    """Atributos del modelo a consultar: los pedidos, sus dependencias, el id y la visibilidad."""
+    definicion = RECURSOS[recurso]
+    atributos = [definicion.campos['id']]
+    if definicion.ocultos:
+        atributos.append('estado')
+    for campo in campos:
+        for atributo in (definicion.campos[campo],) if definicion.campos[campo] else DERIVADOS[campo]:
+            if atributo not in atributos:
+                atributos.append(atributo)
+    return atributos
+
+
+def _con_cambios(recurso, desde):
+    """Condición de 'cambió después de la versión `desde`'.
+
+    El precio efectivo de un producto o servicio también cambia cuando se
+    crea, edita o activa una de sus promociones sin tocar la fila del item.
+    """
+    definicion = RECURSOS[recurso]
+    condicion = definicion.modelo.version_catalogo > desde
+    if definicion.tipo_precio:
+        columna = getattr(Promocion, f'id_{definicion.tipo_precio}')
+        promociones = db.session.query(columna).filter(Promocion.version_catalogo > desde, columna.isnot(None))
+        condicion = or_(condicion, definicion.id.in_(promociones))
+    return condicion
+
+
+def _bajas(recurso, desde):
+    """Ids borrados después de `desde`; None si hubo un borrado masivo y hay que empezar de cero."""
+    ids = []
+    for (id_item,) in db.session.query(BajaCatalogo.id_item).filter(
+        BajaCatalogo.tabla == recurso, BajaCatalogo.version > desde
+    ):
+        if id_item is None:
+            return None
+        ids.append(id_item)
+    return ids
+
+
+def _serializar_filas(recurso, campos, filas, momento):
+    definicion = RECURSOS[recurso]
+    precios = {}
+    if definicion.tipo_precio and any(campo in CAMPOS_PRECIO for campo in campos):
+        precios = getattr(tabla_precios(**{f'{definicion.tipo_precio}s': {
+            getattr(fila, definicion.campos['id']): fila.precio for fila in filas
+        }}, momento=momento), f'{definicion.tipo_precio}s')
+
+    items = []
+    for fila in filas:
+        id_item = getattr(fila, definicion.campos['id'])
+        precio = precios.get(id_item)
+        item = {}
+        for campo in campos:
+            atributo = definicion.campos[campo]
+            if atributo:
+                item[campo] = getattr(fila, atributo)
+            elif campo == 'imagenes':
+                item[campo] = urls_imagen(fila.imagen_hash)
+            elif campo == 'calificacion':
+                item[campo] = Calificacion(fila.resenas_cantidad, fila.resenas_suma, ()).promedio
+            else:
+                item[campo] = getattr(precio, CAMPOS_PRECIO[campo])
+        items.append(item)
+    return items
+
+
+def pagina_recurso(recurso, campos, desde=None, cursor=None, limite=POR_PAGINA):
+    """Una página de un recurso de /api/v1, completa o solo con lo cambiado desde `desde`.
+
+    La versión confirmada del catálogo se lee antes que los datos y viaja en
+    el cursor: todas las páginas de una sincronización informan la misma
+    versión, y lo que cambie mientras el cliente pagina (o siguiera sin
+    confirmar) tendrá una versión mayor y llegará en la siguiente
+    sincronización; las filas de versión mayor que ya se vean se repiten. Sin `desde` solo se devuelven los items
+    visibles; con `desde` los que dejaron de serlo (inactivos, promociones
+    expiradas) van en `eliminados` junto con los borrados.
+    """
+    definicion = RECURSOS[recurso]
+    limite = max(1, min(int(limite), MAX_POR_PAGINA))
+    if cursor:
+        version, desde, despues = _decodificar_cursor(cursor)
+    else:
+        version, despues = version_confirmada(), None
+    # since=0 es una sincronización completa: las filas anteriores a la delta están en la versión 0
+    desde = desde or None
+
+    respuesta = {'version': version, 'desde': desde, 'items': [], 'eliminados': [], 'siguiente': None,
+                 'resincronizar': False}
+    if desde is not None and cursor is None:
+        bajas = _bajas(recurso, desde)
+        if bajas is None:
+            respuesta['resincronizar'] = True
+            return respuesta
+        respuesta['eliminados'] = bajas
+
+    atributos = _atributos(recurso, campos)
+    consulta = db.session.query(*(getattr(definicion.modelo, atributo) for atributo in atributos))
+    if desde is not None:
+        consulta = consulta.filter(_con_cambios(recurso, desde))
+    elif definicion.ocultos:
+        consulta = consulta.filter(definicion.modelo.estado.notin_(definicion.ocultos))
+    if despues is not None:
+        consulta = consulta.filter(definicion.id > despues)
+    filas = consulta.order_by(definicion.id).limit(limite + 1).all()
+    if len(filas) > limite:
+        filas = filas[:limite]
+        respuesta['siguiente'] = _codificar_cursor(version, desde, getattr(filas[-1], definicion.campos['id']))
+
+    if definicion.ocultos and desde is not None:
+        respuesta['eliminados'].extend(
+            getattr(fila, definicion.campos['id']) for fila in filas if fila.estado in definicion.ocultos
+        )
+        filas = [fila for fila in filas if fila.estado not in definicion.ocultos]
+    respuesta['items'] = _serializar_filas(recurso, campos, filas, datetime.utcnow())
+    return respuesta
+
+
+def _por_defecto(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def respuesta_json(datos, status=200):
+    """Respuesta JSON compacta: orjson si está instalado, si no json de la biblioteca estándar."""
+    if orjson is not None:
+        cuerpo = orjson.dumps(datos, default=_por_defecto)
+    else:
+        cuerpo = json.dumps(datos, default=_por_defecto, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return current_app.response_class(cuerpo, status=status, mimetype='application/json')
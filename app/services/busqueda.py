@@ -0,0 +1,385 @@
+# app/services/busqueda.py
+from bisect import bisect_left
+from collections import defaultdict, namedtuple
+import heapq
+import logging
+import math
+from operator import itemgetter
+import re
+import threading
+import time
+import unicodedata
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+from app import db
+from app.models.categorias import Categoria
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTADOS = 50
+# Peso de cada campo en el índice en memoria (equivale a los pesos A/B de setweight en PostgreSQL)
+PESOS = {'nombre': 3.0, 'categoria': 2.0, 'descripcion': 1.0}
+# Similitud de trigramas mínima para aceptar un término como corrección de una errata (la de pg_trgm);
+# los que están a una edición (a_una_edicion) se aceptan con esta similitud aunque no la alcancen
+SIMILITUD_MINIMA = 0.3
+# Términos que puede sumar cada palabra de la consulta por prefijo o por errata
+MAX_EXPANSIONES = 30
+
+# Columnas que aparecen en el índice: solo sus cambios lo dejan desactualizado
+COLUMNAS_INDEXADAS = {
+    'productos': {'nombre', 'descripcion', 'id_categoria'},
+    'servicios': {'nombre', 'descripcion'},
+    'categorias': {'nombre'},
+}
+
+# Palabras vacías: no se indexan ni se buscan, igual que con la configuración 'spanish' de PostgreSQL
+PALABRAS_VACIAS = frozenset(
+    'a al con de del el en la las lo los o para por sin su sus un una unos unas y'.split()
+)
+
+Resultado = namedtuple('Resultado', 'tipo id nombre rango')
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos ('Crema Hidratante' y 'crema hidratánte' quedan iguales)."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def palabras(texto):
+    return [palabra for palabra in re.findall(r'[a-z0-9]+', normalizar(texto)) if palabra not in PALABRAS_VACIAS]
+
+
+def raiz(palabra):
+    """Reducción mínima de plurales en español: lápices -> lapiz, collares -> collar, cremas -> crema."""
+    if len(palabra) > 4 and palabra.endswith('ces'):
+        return palabra[:-3] + 'z'
+    if len(palabra) > 4 and palabra.endswith('es') and palabra[-3] not in 'aeiou':
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith('s') and not palabra.endswith('ss'):
+        return palabra[:-1]
+    return palabra
+
+
+def trigramas(termino):
+    relleno = f'  {termino} '
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+def a_una_edicion(a, b):
+    """True si `b` sale de `a` con una sola edición de Damerau-Levenshtein.
+
+    Una inserción, un borrado, una sustitución o el intercambio de dos letras
+    vecinas ('labail' -> 'labial'). Los intercambios comparten pocos
+    trigramas y la similitud no los alcanza en palabras cortas.
+    """
+    if abs(len(a) - len(b)) > 1 or a == b:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) != len(b):
+        largo, corto = (a, b) if len(a) > len(b) else (b, a)
+        return largo[i + 1:] == corto[i:]
+    if a[i + 1:] == b[i + 1:]:
+        return True
+    return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+
+
+class IndiceBusqueda:
+    """Índice invertido en memoria de productos, servicios y categorías.
+
+    Cada raíz apunta a los documentos que la contienen con el peso del campo
+    donde aparece; un índice de trigramas sobre el vocabulario da tolerancia
+    a erratas y el vocabulario ordenado permite buscar por prefijo la última
+    palabra (búsqueda mientras se escribe). Tras un cambio se reconstruye en
+    un hilo aparte y mientras tanto se sigue respondiendo con el anterior.
+    """
+
+    def __init__(self, app, ttl=600):
+        self.app = app
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._datos = None
+        self._construido = 0.0
+        self._desactualizado = True
+        self._reconstruyendo = False
+
+    def invalidar(self):
+        self._desactualizado = True
+
+    def _vigente(self):
+        return not self._desactualizado and time.monotonic() - self._construido <= self.ttl
+
+    def _obtener_datos(self):
+        if self._datos is None:
+            with self._lock:
+                if self._datos is None:
+                    self._reconstruir()
+        elif not self._vigente() and not self._reconstruyendo:
+            self._reconstruyendo = True
+            threading.Thread(target=self._reconstruir_en_segundo_plano, name='indice-busqueda', daemon=True).start()
+        return self._datos
+
+    def _reconstruir_en_segundo_plano(self):
+        try:
+            with self.app.app_context():
+                with self._lock:
+                    self._reconstruir()
+        except Exception as e:
+            logger.error(f"Error al reconstruir el índice de búsqueda: {str(e)}")
+        finally:
+            self._reconstruyendo = False
+
+    def _reconstruir(self):
+        self._desactualizado = False
+        inicio = time.monotonic()
+        documentos = []
+        filas = db.session.query(
+            Producto.id_producto, Producto.nombre, Producto.descripcion, Categoria.nombre
+        ).outerjoin(Categoria, Categoria.id_categoria == Producto.id_categoria)
+        documentos.extend(('producto',) + tuple(fila) for fila in filas)
+        filas = db.session.query(Servicio.id_servicio, Servicio.nombre, Servicio.descripcion)
+        documentos.extend(('servicio',) + tuple(fila) + (None,) for fila in filas)
+
+        publicaciones = defaultdict(dict)
+        for posicion, (_, _, nombre, descripcion, categoria) in enumerate(documentos):
+            for campo, valor in (('nombre', nombre), ('categoria', categoria), ('descripcion', descripcion)):
+                peso = PESOS[campo]
+                for termino in {raiz(palabra) for palabra in palabras(valor)}:
+                    documentos_termino = publicaciones[termino]
+                    documentos_termino[posicion] = documentos_termino.get(posicion, 0.0) + peso
+
+        por_trigrama = defaultdict(list)
+        n_trigramas = {}
+        for termino in publicaciones:
+            propios = trigramas(termino)
+            n_trigramas[termino] = len(propios)
+            for trigrama in propios:
+                por_trigrama[trigrama].append(termino)
+
+        total = len(documentos) or 1
+        self._datos = {
+            'documentos': [(tipo, id_item, nombre) for tipo, id_item, nombre, _, _ in documentos],
+            'publicaciones': dict(publicaciones),
+            'idf': {termino: math.log(1 + total / len(docs)) for termino, docs in publicaciones.items()},
+            'vocabulario': sorted(publicaciones),
+            'trigramas': dict(por_trigrama),
+            'n_trigramas': n_trigramas,
+        }
+        self._construido = time.monotonic()
+        logger.debug(
+            f"Índice de búsqueda reconstruido: {len(documentos)} documentos, "
+            f"{len(publicaciones)} términos en {time.monotonic() - inicio:.2f}s"
+        )
+
+    def _expandir(self, datos, termino, prefijo):
+        """Términos del vocabulario que cuentan como `termino`, con su similitud (1 = exacto)."""
+        publicaciones = datos['publicaciones']
+        candidatos = {termino: 1.0} if termino in publicaciones else {}
+        if prefijo and len(termino) >= 2:
+            vocabulario = datos['vocabulario']
+            i = bisect_left(vocabulario, termino)
+            while i < len(vocabulario) and vocabulario[i].startswith(termino) and len(candidatos) < MAX_EXPANSIONES:
+                candidatos.setdefault(vocabulario[i], 0.9)
+                i += 1
+        if not candidatos and len(termino) >= 4:
+            propios = trigramas(termino)
+            compartidos = defaultdict(int)
+            for trigrama in propios:
+                for otro in datos['trigramas'].get(trigrama, ()):
+                    compartidos[otro] += 1
+            similares = []
+            for otro, comunes in compartidos.items():
+                similitud = comunes / (len(propios) + datos['n_trigramas'][otro] - comunes)
+                if similitud >= SIMILITUD_MINIMA:
+                    similares.append((similitud, otro))
+                elif a_una_edicion(termino, otro):
+                    similares.append((SIMILITUD_MINIMA, otro))
+            for similitud, otro in heapq.nlargest(MAX_EXPANSIONES, similares):
+                candidatos[otro] = 0.8 * similitud
+        return candidatos
+
+    def buscar(self, consulta, limite=20, tipo=None):
+        datos = self._obtener_datos()
+        terminos = list(dict.fromkeys(raiz(palabra) for palabra in palabras(consulta)))
+        if not terminos:
+            return []
+        publicaciones = datos['publicaciones']
+        # La última palabra puede estar a medio escribir: se acepta como prefijo
+        expansiones = [
+            self._expandir(datos, termino, prefijo=posicion == len(terminos) - 1)
+            for posicion, termino in enumerate(terminos)
+        ]
+        if not all(expansiones):
+            return []
+        # Todas las palabras deben aparecer: se cruza empezando por la más rara y, cuando ya
+        # quedan pocos documentos, se consultan solo esos en vez de recorrer publicaciones enteras
+        expansiones.sort(key=lambda candidatos: sum(len(publicaciones[c]) for c in candidatos))
+        acumulado = None
+        for candidatos in expansiones:
+            factores = [(publicaciones[c], similitud * datos['idf'][c]) for c, similitud in candidatos.items()]
+            puntos = {}
+            if acumulado is not None and len(acumulado) < sum(len(docs) for docs, _ in factores):
+                for docs, factor in factores:
+                    for documento in acumulado.keys() & docs.keys():
+                        valor = docs[documento] * factor
+                        if valor > puntos.get(documento, 0.0):
+                            puntos[documento] = valor
+                puntos = {documento: acumulado[documento] + valor for documento, valor in puntos.items()}
+            else:
+                for docs, factor in factores:
+                    if not puntos:
+                        puntos = {documento: peso * factor for documento, peso in docs.items()}
+                        continue
+                    for documento, peso in docs.items():
+                        valor = factor * peso
+                        if valor > puntos.get(documento, 0.0):
+                            puntos[documento] = valor
+                if acumulado is not None:
+                    puntos = {documento: acumulado[documento] + valor for documento, valor in puntos.items() if documento in acumulado}
+            acumulado = puntos
+            if not acumulado:
+                return []
+        documentos = datos['documentos']
+        if tipo:
+            acumulado = {documento: valor for documento, valor in acumulado.items() if documentos[documento][0] == tipo}
+        mejores = heapq.nlargest(limite, acumulado.items(), key=itemgetter(1))
+        return [Resultado(*documentos[documento], round(valor, 4)) for documento, valor in mejores]
+
+
+# Búsqueda en PostgreSQL: las funciones casabella_* y los índices GIN los crea la migración
+# d5a8e1f0b7c4; si no existen (sin permisos para las extensiones) se usa el índice en memoria.
+_SQL_PRODUCTOS = """
+    SELECT 'producto' AS tipo, p.id_producto AS id, ts_rank_cd(casabella_documento(p.nombre, p.descripcion), q.q) AS rango
+    FROM productos p, q WHERE casabella_documento(p.nombre, p.descripcion) @@ q.q
+    UNION ALL
+    SELECT 'producto', p.id_producto, 0.5 * word_similarity(:texto, casabella_unaccent(lower(p.nombre)))
+    FROM productos p WHERE :texto <% casabella_unaccent(lower(p.nombre))
+    UNION ALL
+    SELECT 'producto', p.id_producto, 0.3 * word_similarity(:texto, casabella_unaccent(lower(c.nombre)))
+    FROM categorias c JOIN productos p ON p.id_categoria = c.id_categoria
+    WHERE :texto <% casabella_unaccent(lower(c.nombre))
+"""
+_SQL_SERVICIOS = """
+    SELECT 'servicio' AS tipo, s.id_servicio AS id, ts_rank_cd(casabella_documento(s.nombre, s.descripcion), q.q) AS rango
+    FROM servicios s, q WHERE casabella_documento(s.nombre, s.descripcion) @@ q.q
+    UNION ALL
+    SELECT 'servicio', s.id_servicio, 0.5 * word_similarity(:texto, casabella_unaccent(lower(s.nombre)))
+    FROM servicios s WHERE :texto <% casabella_unaccent(lower(s.nombre))
+"""
+
+
+def _buscar_postgres(consulta, limite, tipo):
+    terminos = palabras(consulta)
+    if not terminos:
+        return []
+    partes = [sql for clave, sql in (('producto', _SQL_PRODUCTOS), ('servicio', _SQL_SERVICIOS)) if tipo in (None, clave)]
+    sql = f"""
+        WITH q AS (SELECT to_tsquery('spanish', casabella_unaccent(:tsquery)) AS q),
+        candidatos AS ({' UNION ALL '.join(partes)})
+        SELECT r.tipo, r.id, coalesce(p.nombre, s.nombre) AS nombre, r.rango
+        FROM (SELECT tipo, id, sum(rango) AS rango FROM candidatos GROUP BY tipo, id) r
+        LEFT JOIN productos p ON r.tipo = 'producto' AND p.id_producto = r.id
+        LEFT JOIN servicios s ON r.tipo = 'servicio' AND s.id_servicio = r.id
+        ORDER BY r.rango DESC, r.id
+        LIMIT :limite
+    """
+    # Umbral más bajo que el predeterminado (0.6) para tolerar erratas en palabras cortas
+    db.session.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :umbral, true)"),
+                       {'umbral': str(SIMILITUD_MINIMA)})
+    filas = db.session.execute(text(sql), {
+        # Solo caracteres [a-z0-9]: no hace falta escapar la sintaxis de tsquery
+        'tsquery': ' & '.join(f'{termino}:*' for termino in terminos),
+        'texto': ' '.join(terminos),
+        'limite': limite,
+    })
+    return [Resultado(fila.tipo, fila.id, fila.nombre, round(float(fila.rango), 4)) for fila in filas]
+
+
+def _postgres_disponible():
+    bind = db.session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return False
+    return bool(db.session.execute(text(
+        "SELECT to_regproc('casabella_documento') IS NOT NULL AND to_regproc('casabella_unaccent') IS NOT NULL"
+        " AND EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+    )).scalar())
+
+
+def motor_busqueda():
+    """'postgres' o 'memoria', según BUSQUEDA_MOTOR y lo que ofrezca la base de datos (se resuelve una vez)."""
+    extension = current_app.extensions['busqueda']
+    if extension['motor'] is None:
+        configurado = current_app.config.get('BUSQUEDA_MOTOR', 'auto')
+        if configurado == 'auto':
+            configurado = 'postgres' if _postgres_disponible() else 'memoria'
+        extension['motor'] = configurado
+        logger.info(f"Motor de búsqueda: {configurado}")
+    return extension['motor']
+
+
+def buscar(consulta, limite=20, tipo=None):
+    """Productos y servicios que coinciden con `consulta`, del más al menos relevante."""
+    limite = max(1, min(int(limite), MAX_RESULTADOS))
+    if motor_busqueda() == 'postgres':
+        return _buscar_postgres(consulta, limite, tipo)
+    return current_app.extensions['busqueda']['indice'].buscar(consulta, limite, tipo)
+
+
+def init_busqueda(app):
+    app.extensions['busqueda'] = {
+        'motor': None,
+        'indice': IndiceBusqueda(app, ttl=app.config.get('BUSQUEDA_INDICE_TTL', 600)),
+    }
+    _registrar_eventos()
+
+
+def _indexado(objeto):
+    return getattr(objeto, '__tablename__', None) in COLUMNAS_INDEXADAS
+
+
+def _cambia_indice(objeto):
+    atributos = inspect(objeto).attrs
+    return any(atributos[columna].history.has_changes() for columna in COLUMNAS_INDEXADAS[objeto.__tablename__])
+
+
+_eventos_registrados = False
+
+
+def _registrar_eventos():
+    global _eventos_registrados
+    if _eventos_registrados:
+        return
+    _eventos_registrados = True
+
+    # before_flush: el historial de atributos todavía no se ha limpiado
+    @event.listens_for(Session, 'before_flush')
+    def _marcar_escritura(session, flush_context, instances):
+        altas_bajas = any(_indexado(objeto) for objeto in list(session.new) + list(session.deleted))
+        if altas_bajas or any(_indexado(objeto) and _cambia_indice(objeto) for objeto in session.dirty):
+            session.info['busqueda_desactualizada'] = True
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def _marcar_escritura_masiva(orm_execute_state):
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            tabla = getattr(orm_execute_state.statement, 'table', None)
+            if tabla is None or tabla.name not in COLUMNAS_INDEXADAS:
+                return
+            # Los UPDATE masivos que no tocan columnas indexadas (estado, stock...) no cuentan
+            valores = getattr(orm_execute_state.statement, '_values', None) or {}
+            nombres = {getattr(columna, 'key', columna) for columna in valores}
+            if not orm_execute_state.is_update or nombres & COLUMNAS_INDEXADAS[tabla.name]:
+                orm_execute_state.session.info['busqueda_desactualizada'] = True
+
+    @event.listens_for(Session, 'after_commit')
+    def _invalidar(session):
+        if session.info.pop('busqueda_desactualizada', False) and has_app_context() and 'busqueda' in current_app.extensions:
+            current_app.extensions['busqueda']['indice'].invalidar()
+
+    @event.listens_for(Session, 'after_rollback')
+    def _descartar(session):
+        session.info.pop('busqueda_desactualizada', None)
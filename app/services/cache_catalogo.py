@@ -0,0 +1,302 @@
+# app/services/cache_catalogo.py
+from collections import namedtuple
+from contextlib import contextmanager
+import logging
+import threading
+from types import MappingProxyType
+from flask import current_app
+from sqlalchemy import event, inspect, insert, select, text, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.bajas_catalogo import BajaCatalogo
+from app.models.categorias import Categoria
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+from app.models.versiones_catalogo import VersionCatalogo, secuencia_version_catalogo
+
+logger = logging.getLogger(__name__)
+
+# Copias compactas e inmutables de los datos de referencia que se listan en formularios.
+# Solo columnas que cambian desde la administración: stock y estado se mueven con
+# cada venta o promoción y siguen leyéndose de la base donde hacen falta.
+CategoriaRef = namedtuple('CategoriaRef', 'id_categoria nombre descripcion')
+ServicioRef = namedtuple('ServicioRef', 'id_servicio nombre descripcion precio duracion')
+ProductoRef = namedtuple('ProductoRef', 'id_producto id_categoria nombre tipo precio')
+
+# tabla -> (modelo, tipo de la copia, columna de orden)
+TABLAS = {
+    'categorias': (Categoria, CategoriaRef, Categoria.nombre),
+    'servicios': (Servicio, ServicioRef, Servicio.id_servicio),
+    'productos': (Producto, ProductoRef, Producto.id_producto),
+}
+
+Instantanea = namedtuple('Instantanea', 'version items por_id')
+
+# Contador de todo lo que se ve en las páginas del catálogo (stock, estado y promociones
+# incluidos); la usan los ETag de app/services/cache_http.py, no las copias en memoria.
+# Se incrementa una vez por transacción, después del commit
+CLAVE_CATALOGO = 'catalogo'
+TABLAS_CATALOGO = {'categorias', 'productos', 'servicios', 'promociones'}
+# Cada fila de esas tablas guarda en version_catalogo la versión de su último cambio, sacada
+# de una secuencia en Postgres; sin secuencias, de esta fila de versiones_catalogo
+CLAVE_SECUENCIA = 'catalogo:secuencia'
+# Primera mitad de los candados consultivos (pg_advisory_*) de las versiones: (CLASE, 0) es la
+# compuerta entre tomar una versión y calcular la confirmada; (CLASE, v), la escritura v en curso
+CLASE_CANDADO = 0x63617461
+
+
+def _version_actual(tabla):
+    version = db.session.query(VersionCatalogo.version).filter_by(clave=tabla).scalar()
+    return version or 0
+
+
+def versiones(*claves):
+    """Versión actual de cada clave en una sola consulta; 0 si todavía no existe."""
+    if not claves:
+        return ()
+    filas = dict(db.session.query(VersionCatalogo.clave, VersionCatalogo.version).filter(VersionCatalogo.clave.in_(claves)))
+    return tuple(filas.get(clave, 0) for clave in claves)
+
+
+def _cargar(tabla, version):
+    modelo, tipo, orden = TABLAS[tabla]
+    columnas = [getattr(modelo, campo) for campo in tipo._fields]
+    items = tuple(tipo(*fila) for fila in db.session.query(*columnas).order_by(orden))
+    por_id = MappingProxyType({item[0]: item for item in items})
+    return Instantanea(version, items, por_id)
+
+
+class CacheCatalogo:
+    """Copias en memoria de categorías, servicios y productos, una por proceso.
+
+    Cada lectura compara la versión guardada con la de `versiones_catalogo`
+    (una búsqueda por clave primaria) y solo recarga la tabla si cambió. La
+    versión se lee antes que los datos: si otra escritura se cuela entre
+    ambas lecturas, la copia queda con la versión vieja y se recarga en la
+    siguiente petición.
+    """
+
+    def __init__(self):
+        self._instantaneas = {}
+        self._locks = {tabla: threading.Lock() for tabla in TABLAS}
+
+    def obtener(self, tabla):
+        version = _version_actual(tabla)
+        instantanea = self._instantaneas.get(tabla)
+        if instantanea is not None and instantanea.version == version:
+            return instantanea
+        with self._locks[tabla]:
+            instantanea = self._instantaneas.get(tabla)
+            if instantanea is None or instantanea.version != version:
+                instantanea = _cargar(tabla, version)
+                self._instantaneas[tabla] = instantanea
+                logger.debug(f"Caché de catálogo recargada: {tabla} v{version} ({len(instantanea.items)} filas)")
+        return instantanea
+
+    def invalidar(self, tabla=None):
+        if tabla is None:
+            self._instantaneas.clear()
+        else:
+            self._instantaneas.pop(tabla, None)
+
+
+def init_cache_catalogo(app):
+    """Crea la caché del proceso y registra el incremento de versión en cada escritura."""
+    app.extensions['cache_catalogo'] = CacheCatalogo()
+    _registrar_eventos()
+
+
+def obtener_catalogo(tabla):
+    return current_app.extensions['cache_catalogo'].obtener(tabla)
+
+
+def categorias_catalogo():
+    return obtener_catalogo('categorias').items
+
+
+def servicios_catalogo():
+    return obtener_catalogo('servicios').items
+
+
+def productos_catalogo():
+    return obtener_catalogo('productos').items
+
+
+def _cambia_copia(objeto, tabla):
+    atributos = inspect(objeto).attrs
+    return any(atributos[campo].history.has_changes() for campo in TABLAS[tabla][1]._fields)
+
+
+def _incrementar(conexion, clave):
+    versiones = VersionCatalogo.__table__
+    resultado = conexion.execute(
+        update(versiones).where(versiones.c.clave == clave).values(version=versiones.c.version + 1)
+    )
+    if resultado.rowcount == 0:
+        conexion.execute(insert(versiones).values(clave=clave, version=1))
+
+
+def _incrementar_versiones(session):
+    """UPDATE de las versiones pendientes en la misma transacción que la escritura."""
+    pendientes = session.info.pop('catalogo_versiones', None)
+    if not pendientes:
+        return
+    conexion = session.connection()
+    for tabla in sorted(pendientes):
+        _incrementar(conexion, tabla)
+
+
+@contextmanager
+def _compuerta(conexion, compartida):
+    """Candado de sesión (CLASE_CANDADO, 0): compartido al tomar versión, exclusivo al calcular la confirmada."""
+    sufijo = '_shared' if compartida else ''
+    conexion.execute(text(f'SELECT pg_advisory_lock{sufijo}(:clase, 0)'), {'clase': CLASE_CANDADO})
+    try:
+        yield
+    except BaseException:
+        # Un candado de sesión sobrevive al rollback: cerrar la conexión es lo que lo suelta
+        conexion.invalidate()
+        raise
+    conexion.execute(text(f'SELECT pg_advisory_unlock{sufijo}(:clase, 0)'), {'clase': CLASE_CANDADO})
+
+
+def _siguiente_version(conexion):
+    if conexion.dialect.name == 'postgresql':
+        # nextval no bloquea a nadie; el candado (CLASE, v) anuncia hasta el commit que v sigue en curso
+        with _compuerta(conexion, compartida=True):
+            version = conexion.execute(select(secuencia_version_catalogo.next_value())).scalar()
+            conexion.execute(text('SELECT pg_advisory_xact_lock_shared(:clase, :version)'),
+                             {'clase': CLASE_CANDADO, 'version': version})
+        return version
+    # SQLite (desarrollo y pruebas) ya serializa a los escritores: el contador no añade esperas
+    _incrementar(conexion, CLAVE_SECUENCIA)
+    versiones = VersionCatalogo.__table__
+    return conexion.execute(select(versiones.c.version).where(versiones.c.clave == CLAVE_SECUENCIA)).scalar()
+
+
+def _version_escritura(session):
+    """Versión con la que esta transacción marca las filas del catálogo que escribe; una por transacción."""
+    version = session.info.get('catalogo_version')
+    if version is None:
+        version = session.info['catalogo_version'] = _siguiente_version(session.connection())
+    return version
+
+
+def version_confirmada():
+    """Mayor versión N tal que toda escritura con versión <= N ya está confirmada.
+
+    Las versiones salen de la secuencia en el orden en que se piden, no en el
+    que se confirman: una transacción con la versión 5 puede seguir abierta
+    cuando ya se confirmó la 6. Por eso no basta con el último valor de la
+    secuencia; se descuenta la menor versión cuyo candado (CLASE_CANDADO, v)
+    sigue tomado. Un cliente que sincroniza hasta N nunca se pierde una fila
+    escrita con una versión menor o igual: llega en la siguiente delta.
+    """
+    conexion = db.session.connection()
+    if conexion.dialect.name != 'postgresql':
+        versiones = VersionCatalogo.__table__
+        return conexion.execute(select(versiones.c.version).where(versiones.c.clave == CLAVE_SECUENCIA)).scalar() or 0
+    # La compuerta exclusiva espera a quien esté entre nextval y tomar su candado
+    with _compuerta(conexion, compartida=False):
+        ultima, llamada = conexion.execute(
+            text(f'SELECT last_value, is_called FROM {secuencia_version_catalogo.name}')
+        ).one()
+        en_curso = conexion.execute(text(
+            "SELECT min(objid::bigint) FROM pg_locks WHERE locktype = 'advisory' AND classid = :clase"
+            " AND objsubid = 2 AND objid <> 0"
+            " AND database = (SELECT oid FROM pg_database WHERE datname = current_database())"
+        ), {'clase': CLASE_CANDADO}).scalar()
+    confirmada = ultima if llamada else ultima - 1
+    if en_curso is not None:
+        confirmada = min(confirmada, en_curso - 1)
+    return confirmada
+
+
+_eventos_registrados = False
+
+
+def _registrar_eventos():
+    global _eventos_registrados
+    if _eventos_registrados:
+        return
+    _eventos_registrados = True
+
+    # before_flush: el historial de atributos todavía no se ha limpiado
+    @event.listens_for(Session, 'before_flush')
+    def _marcar_escritura(session, flush_context, instances):
+        claves = set()
+        escritos, borrados = [], []
+        for objeto in session.new:
+            tabla = getattr(objeto, '__tablename__', None)
+            if tabla in TABLAS:
+                claves.add(tabla)
+            if tabla in TABLAS_CATALOGO:
+                escritos.append(objeto)
+        for objeto in session.deleted:
+            tabla = getattr(objeto, '__tablename__', None)
+            if tabla in TABLAS:
+                claves.add(tabla)
+            if tabla in TABLAS_CATALOGO:
+                borrados.append(objeto)
+        for objeto in session.dirty:
+            tabla = getattr(objeto, '__tablename__', None)
+            if tabla in TABLAS and tabla not in claves and _cambia_copia(objeto, tabla):
+                claves.add(tabla)
+            if tabla in TABLAS_CATALOGO and session.is_modified(objeto):
+                escritos.append(objeto)
+        if claves:
+            session.info.setdefault('catalogo_versiones', set()).update(claves)
+        if escritos or borrados:
+            version = _version_escritura(session)
+            for objeto in escritos:
+                objeto.version_catalogo = version
+            for objeto in borrados:
+                session.add(BajaCatalogo(tabla=objeto.__tablename__, id_item=inspect(objeto).identity[0], version=version))
+
+    @event.listens_for(Session, 'after_flush')
+    def _incrementar_tras_flush(session, flush_context):
+        _incrementar_versiones(session)
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def _marcar_escritura_masiva(orm_execute_state):
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            tabla = getattr(orm_execute_state.statement, 'table', None)
+            if tabla is None or tabla.name not in TABLAS_CATALOGO:
+                return
+            session = orm_execute_state.session
+            statement = orm_execute_state.statement
+            version = _version_escritura(session)
+            if orm_execute_state.is_delete:
+                # No se sabe qué filas borra: los clientes de la sincronización delta empiezan de cero
+                session.connection().execute(insert(BajaCatalogo.__table__).values(tabla=tabla.name, id_item=None, version=version))
+            else:
+                orm_execute_state.statement = statement.values(version_catalogo=version)
+            if tabla.name not in TABLAS:
+                return
+            # Los UPDATE masivos de stock o estado no cambian las copias
+            valores = getattr(statement, '_values', None) or {}
+            nombres = {getattr(columna, 'key', columna) for columna in valores}
+            if not orm_execute_state.is_update or nombres & set(TABLAS[tabla.name][1]._fields):
+                session.info.setdefault('catalogo_versiones', set()).add(tabla.name)
+
+    # Las escrituras masivas no pasan por el flush: su versión se incrementa antes del commit
+    @event.listens_for(Session, 'before_commit')
+    def _incrementar_antes_commit(session):
+        _incrementar_versiones(session)
+
+    # Fuera de la transacción: el UPDATE de la fila compartida dura lo que su propio commit
+    # y no encola checkouts ni ventas detrás de la escritura que lo provoca
+    @event.listens_for(Session, 'after_commit')
+    def _publicar_version(session):
+        if session.info.pop('catalogo_version', None) is None:
+            return
+        try:
+            with session.get_bind().begin() as conexion:
+                _incrementar(conexion, CLAVE_CATALOGO)
+        except Exception as e:
+            logger.error(f"Error al incrementar la versión del catálogo: {str(e)}")
+
+    @event.listens_for(Session, 'after_rollback')
+    def _descartar(session):
+        session.info.pop('catalogo_versiones', None)
+        session.info.pop('catalogo_version', None)
@@ -0,0 +1,89 @@
+# app/services/cache_facturas.py
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+def _directorio():
+    directorio = current_app.config.get('FACTURAS_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'casabella_facturas')
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _ruta(id_venta, datos):
+    """Ruta direccionada por contenido: id de la venta + hash de lo que se imprime."""
+    huella = hashlib.sha256(json.dumps(datos, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:32]
+    return os.path.join(_directorio(), f'{id_venta}_{huella}.pdf')
+
+
+def ruta_en_cache(id_venta, datos):
+    """Devuelve la ruta del PDF si ya existe en la caché, o None."""
+    try:
+        ruta = _ruta(id_venta, datos)
+        if os.path.exists(ruta):
+            # Actualizar mtime para que la expulsión sea LRU y no FIFO
+            os.utime(ruta, None)
+            return ruta
+    except OSError as e:
+        logger.warning(f"No se pudo leer la caché de facturas: {str(e)}")
+    return None
+
+
+def guardar_en_cache(id_venta, datos, pdf):
+    """Guarda el PDF de forma atómica y aplica el límite de tamaño; devuelve la ruta o None."""
+    try:
+        ruta = _ruta(id_venta, datos)
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as archivo:
+            archivo.write(pdf)
+        os.replace(temporal, ruta)
+        _expulsar(current_app.config.get('FACTURAS_CACHE_MAX_MB', 256) * 1024 * 1024)
+        return ruta
+    except OSError as e:
+        logger.warning(f"No se pudo escribir en la caché de facturas: {str(e)}")
+        return None
+
+
+def invalidar_factura(id_venta):
+    """Borra todas las versiones en caché de la factura de una venta."""
+    try:
+        for ruta in glob.glob(os.path.join(_directorio(), f'{id_venta}_*.pdf')):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+    except OSError as e:
+        logger.warning(f"No se pudo invalidar la factura {id_venta} en caché: {str(e)}")
+
+
+def _expulsar(limite_bytes):
+    """Elimina los PDFs usados hace más tiempo hasta quedar por debajo del 90% del límite."""
+    entradas = []
+    total = 0
+    with os.scandir(_directorio()) as it:
+        for entrada in it:
+            if not entrada.name.endswith('.pdf'):
+                continue
+            try:
+                info = entrada.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, entrada.path))
+            total += info.st_size
+    if total <= limite_bytes:
+        return
+    objetivo = limite_bytes * 0.9
+    for _, tamaño, ruta in sorted(entradas):
+        if total <= objetivo:
+            break
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+        total -= tamaño
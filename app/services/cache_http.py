@@ -0,0 +1,95 @@
+# app/services/cache_http.py
+from functools import wraps
+import hashlib
+import logging
+import os
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func
+from app import db
+from app.models.carrito import Carrito
+from app.models.detalle_carrito import DetalleCarrito
+from app.services.cache_catalogo import versiones
+
+logger = logging.getLogger(__name__)
+
+
+def _semilla_despliegue(app):
+    """Huella del código, las plantillas y el manifiesto de estáticos: un despliegue nuevo invalida todos los ETag."""
+    huella = hashlib.sha1()
+    for raiz, _, archivos in sorted(os.walk(app.root_path)):
+        for archivo in sorted(archivos):
+            if archivo.endswith(('.py', '.html', 'manifest.json')):
+                estado = os.stat(os.path.join(raiz, archivo))
+                huella.update(f'{archivo}:{estado.st_mtime_ns}:{estado.st_size};'.encode('utf-8'))
+    return huella.hexdigest()[:12]
+
+
+def init_cache_http(app):
+    app.extensions['cache_http'] = {'semilla': _semilla_despliegue(app)}
+
+
+def _partes_usuario():
+    """Lo que base.html pinta de cada usuario: datos de la cuenta y el carrito activo."""
+    if not current_user.is_authenticated:
+        return ['anonimo']
+    partes = [current_user.id_usuario, current_user.nombre, current_user.email, current_user.rol]
+    if current_user.rol == 'cliente':
+        carrito = db.session.query(Carrito.id_carrito, func.count(DetalleCarrito.id_detalle_carrito)).outerjoin(
+            DetalleCarrito, DetalleCarrito.id_carrito == Carrito.id_carrito
+        ).filter(Carrito.id_usuario == current_user.id_usuario, Carrito.estado == 'activo').group_by(Carrito.id_carrito).first()
+        partes.extend(carrito or (None, 0))
+    return partes
+
+
+def etag_peticion(claves):
+    """ETag débil de la petición actual sin renderizar nada: versiones de datos y usuario."""
+    partes = [current_app.extensions['cache_http']['semilla'], *claves, *versiones(*claves), *_partes_usuario()]
+    return hashlib.sha1('|'.join(map(str, partes)).encode('utf-8')).hexdigest()[:32]
+
+
+def _cabeceras_cache(response):
+    if current_user.is_authenticated:
+        # Solo el navegador del usuario puede guardarla, y siempre revalidando
+        response.headers['Cache-Control'] = 'private, no-cache'
+    else:
+        max_age = current_app.config.get('HTTP_CACHE_MAX_AGE_PUBLICO', 60)
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    # La misma URL se pinta distinta con y sin sesión
+    response.vary.add('Cookie')
+    return response
+
+
+def condicional(*claves):
+    """Decorador de vistas GET con validación por ETag.
+
+    El ETag se calcula antes de llamar a la vista a partir de las versiones
+    de `claves` (tabla versiones_catalogo) y de los datos del usuario. Si
+    coincide con If-None-Match se responde 304 sin ejecutar la vista ni
+    renderizar la plantilla. Las respuestas con mensajes flash pendientes no
+    se validan: el 304 los dejaría sin mostrar.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return vista(*args, **kwargs)
+            try:
+                etag = etag_peticion(claves)
+            except Exception as e:
+                logger.error(f"Error al calcular el ETag de {request.endpoint}: {str(e)}")
+                return vista(*args, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag, weak=True)
+                return _cabeceras_cache(response)
+
+            response = make_response(vista(*args, **kwargs))
+            # Redirecciones y errores no se validan
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                _cabeceras_cache(response)
+            return response
+        return envoltura
+    return decorador
@@ -0,0 +1,248 @@
+# app/services/cache_metricas.py
+import json
+import logging
+import threading
+import time
+import uuid
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Tablas de las que dependen las métricas del dashboard; escribir en ellas invalida la caché
+TABLAS_METRICAS = {
+    'usuarios', 'productos', 'servicios', 'citas', 'ventas', 'detalle_ventas',
+    'inventario_movimientos', 'resumen_ventas_diario'
+}
+
+
+class CacheLocal:
+    """Backend en memoria del proceso. También sirve de sustituto del compartido en pruebas."""
+
+    def __init__(self):
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            return valor
+
+    def set(self, clave, valor, ttl):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + ttl)
+
+    def add(self, clave, valor, ttl):
+        """Guarda solo si la clave no existe; devuelve True si la guardó."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[1] >= time.monotonic():
+                return False
+            self._datos[clave] = (valor, time.monotonic() + ttl)
+            return True
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def delete_si(self, clave, valor):
+        """Borra la clave solo si todavía guarda `valor`."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None and entrada[0] == valor:
+                del self._datos[clave]
+
+
+class CacheRedis:
+    """Backend compartido entre procesos; requiere el paquete opcional `redis`."""
+
+    # Comparar y borrar en un solo paso: no se borra un candado que ya es de otro
+    SCRIPT_DELETE_SI = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    )
+
+    def __init__(self, url):
+        import redis
+        self._cliente = redis.Redis.from_url(url)
+        self._delete_si = self._cliente.register_script(self.SCRIPT_DELETE_SI)
+
+    def get(self, clave):
+        valor = self._cliente.get(clave)
+        return json.loads(valor) if valor is not None else None
+
+    def set(self, clave, valor, ttl):
+        self._cliente.set(clave, json.dumps(valor), ex=max(int(ttl), 1))
+
+    def add(self, clave, valor, ttl):
+        return bool(self._cliente.set(clave, json.dumps(valor), ex=max(int(ttl), 1), nx=True))
+
+    def delete(self, clave):
+        self._cliente.delete(clave)
+
+    def delete_si(self, clave, valor):
+        self._delete_si(keys=[clave], args=[json.dumps(valor)])
+
+
+class CacheMetricas:
+    """Caché con TTL y recálculo de un solo vuelo para el payload del dashboard.
+
+    Dentro del proceso, solo el primer hilo que encuentra la caché vacía
+    recalcula; el resto espera su resultado. Con un backend compartido, un
+    candado con `add` evita además que varios procesos recalculen a la vez.
+    El candado guarda un token propio y dura `ttl_candado` (más que el
+    cálculo más lento): solo lo borra quien lo tomó, y solo si sigue siendo
+    suyo.
+    """
+
+    def __init__(self, backend=None, ttl=60, espera_maxima=5.0, ttl_candado=60):
+        self.backend = backend or CacheLocal()
+        self.ttl = ttl
+        self.espera_maxima = espera_maxima
+        self.ttl_candado = max(ttl_candado, espera_maxima)
+        self._lock = threading.Lock()
+        self._en_vuelo = {}
+        self._generacion = 0
+
+    def obtener(self, clave, calcular):
+        valor = self._leer(clave)
+        if valor is not None:
+            return valor
+
+        with self._lock:
+            evento = self._en_vuelo.get(clave)
+            lider = evento is None
+            if lider:
+                evento = self._en_vuelo[clave] = threading.Event()
+                generacion = self._generacion
+
+        if not lider:
+            evento.wait(self.espera_maxima)
+            valor = self._leer(clave)
+            return valor if valor is not None else calcular()
+
+        try:
+            valor = self._calcular_compartido(clave, calcular, generacion)
+        finally:
+            with self._lock:
+                self._en_vuelo.pop(clave, None)
+            evento.set()
+        return valor
+
+    def _calcular_compartido(self, clave, calcular, generacion):
+        candado = f'{clave}:calculando'
+        token = uuid.uuid4().hex
+        propio = self._escribir(self.backend.add, candado, token, self.ttl_candado)
+        if not propio:
+            # Otro proceso está recalculando: esperar su resultado un momento
+            limite = time.monotonic() + self.espera_maxima
+            while time.monotonic() < limite:
+                time.sleep(0.05)
+                valor = self._leer(clave)
+                if valor is not None:
+                    return valor
+        try:
+            valor = calcular()
+            # Si hubo una escritura durante el cálculo el resultado puede estar viejo: no guardarlo
+            if generacion == self._generacion:
+                self._escribir(self.backend.set, clave, valor, self.ttl)
+            return valor
+        finally:
+            if propio:
+                self._soltar(candado, token)
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._generacion += 1
+        self._borrar(clave)
+
+    def _leer(self, clave):
+        try:
+            return self.backend.get(clave)
+        except Exception as e:
+            logger.warning(f"No se pudo leer la caché de métricas: {str(e)}")
+            return None
+
+    def _escribir(self, operacion, clave, valor, ttl):
+        try:
+            return operacion(clave, valor, ttl)
+        except Exception as e:
+            logger.warning(f"No se pudo escribir en la caché de métricas: {str(e)}")
+            return True
+
+    def _soltar(self, candado, token):
+        try:
+            self.backend.delete_si(candado, token)
+        except Exception as e:
+            logger.warning(f"No se pudo soltar el candado de la caché de métricas: {str(e)}")
+
+    def _borrar(self, clave):
+        try:
+            self.backend.delete(clave)
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar la caché de métricas: {str(e)}")
+
+
+CLAVE_DASHBOARD = 'casabella:metricas:dashboard'
+
+
+def init_cache_metricas(app):
+    """Crea la caché según la configuración y registra la invalidación por escrituras."""
+    url = app.config.get('METRICAS_CACHE_URL')
+    backend = None
+    if url:
+        try:
+            backend = CacheRedis(url)
+        except ImportError:
+            logger.warning("METRICAS_CACHE_URL está definido pero el paquete redis no está instalado; se usa la caché local.")
+    app.extensions['cache_metricas'] = CacheMetricas(
+        backend, ttl=app.config.get('METRICAS_CACHE_TTL', 60),
+        ttl_candado=app.config.get('METRICAS_CACHE_CANDADO_TTL', 60)
+    )
+    _registrar_eventos()
+
+
+def obtener_cache():
+    return current_app.extensions['cache_metricas']
+
+
+def _tablas_afectadas(objetos):
+    return {getattr(objeto, '__tablename__', None) for objeto in objetos}
+
+
+_eventos_registrados = False
+
+
+def _registrar_eventos():
+    global _eventos_registrados
+    if _eventos_registrados:
+        return
+    _eventos_registrados = True
+
+    @event.listens_for(Session, 'after_flush')
+    def _marcar_escritura(session, flush_context):
+        if _tablas_afectadas(list(session.new) + list(session.dirty) + list(session.deleted)) & TABLAS_METRICAS:
+            session.info['metricas_sucias'] = True
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def _marcar_escritura_masiva(orm_execute_state):
+        # query.update()/delete() e inserts de Core no pasan por el flush
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            tabla = getattr(orm_execute_state.statement, 'table', None)
+            if tabla is not None and tabla.name in TABLAS_METRICAS:
+                orm_execute_state.session.info['metricas_sucias'] = True
+
+    @event.listens_for(Session, 'after_commit')
+    def _invalidar(session):
+        if session.info.pop('metricas_sucias', False) and has_app_context() and 'cache_metricas' in current_app.extensions:
+            obtener_cache().invalidar(CLAVE_DASHBOARD)
+
+    @event.listens_for(Session, 'after_rollback')
+    def _descartar(session):
+        session.info.pop('metricas_sucias', None)
@@ -0,0 +1,123 @@
+# app/services/catalogo.py
+import base64
+from decimal import Decimal, InvalidOperation
+import json
+from sqlalchemy import tuple_
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+
+POR_PAGINA = 24
+MAX_POR_PAGINA = 100
+
+# orden -> (atributo, descendente); el id desempata y sigue la misma dirección.
+# 'recientes' ordena solo por id: crece con la fecha de alta y evita comparar fechas en el cursor
+ORDENES = {
+    'nombre': ('nombre', False),
+    'precio_asc': ('precio', False),
+    'precio_desc': ('precio', True),
+    'recientes': (None, True),
+}
+
+MODELOS = {'producto': (Producto, 'id_producto'), 'servicio': (Servicio, 'id_servicio')}
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def _codificar_cursor(orden, valor, id_item):
+    valor = None if valor is None else str(valor)
+    datos = json.dumps([orden, valor, id_item], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(cursor, orden):
+    try:
+        datos = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        orden_cursor, valor, id_item = json.loads(datos)
+        atributo = ORDENES[orden][0]
+        if atributo == 'precio':
+            valor = Decimal(valor)
+        return orden_cursor, valor, int(id_item)
+    except (ValueError, TypeError, KeyError, InvalidOperation) as e:
+        raise CursorInvalido(f"Cursor de paginación inválido: {cursor}") from e
+
+
+def filtros_catalogo(args):
+    """Filtros y orden a partir de los parámetros de la URL (request.args)."""
+    def decimal_o_none(nombre):
+        try:
+            return Decimal(args[nombre]) if args.get(nombre) else None
+        except InvalidOperation:
+            return None
+
+    def entero_o_none(nombre):
+        valor = args.get(nombre)
+        return int(valor) if valor and valor.isdigit() else None
+
+    return {
+        'orden': args.get('orden') if args.get('orden') in ORDENES else 'nombre',
+        'id_categoria': entero_o_none('categoria'),
+        'tipo': args.get('tipo') or None,
+        'precio_min': decimal_o_none('precio_min'),
+        'precio_max': decimal_o_none('precio_max'),
+        'en_stock': args.get('en_stock') in ('1', 'true', 'on'),
+        'solo_promocion': args.get('filter') == 'promotions',
+    }
+
+
+def consulta_catalogo(tipo, filtros):
+    """SELECT de productos o servicios con todos los filtros aplicados en SQL."""
+    modelo, _ = MODELOS[tipo]
+    consulta = modelo.query
+    if filtros.get('solo_promocion'):
+        consulta = consulta.filter(modelo.estado == 'en_promocion')
+    if filtros.get('precio_min') is not None:
+        consulta = consulta.filter(modelo.precio >= filtros['precio_min'])
+    if filtros.get('precio_max') is not None:
+        consulta = consulta.filter(modelo.precio <= filtros['precio_max'])
+    # Categoría, tipo y stock solo existen en productos
+    if tipo == 'producto':
+        if filtros.get('id_categoria'):
+            consulta = consulta.filter(Producto.id_categoria == filtros['id_categoria'])
+        if filtros.get('tipo'):
+            consulta = consulta.filter(Producto.tipo == filtros['tipo'])
+        if filtros.get('en_stock'):
+            consulta = consulta.filter(Producto.stock > 0)
+    return consulta
+
+
+def pagina_catalogo(tipo, filtros, cursor=None, limite=POR_PAGINA):
+    """Una página del catálogo por keyset: (items, cursor de la siguiente página o None).
+
+    El cursor guarda el valor de la columna de orden y el id del último item,
+    así que cada página cuesta lo mismo sin importar lo lejos que esté.
+    """
+    modelo, nombre_id = MODELOS[tipo]
+    orden = filtros.get('orden', 'nombre')
+    atributo, descendente = ORDENES[orden]
+    columna_id = getattr(modelo, nombre_id)
+    columna = getattr(modelo, atributo) if atributo else None
+    limite = max(1, min(int(limite), MAX_POR_PAGINA))
+
+    consulta = consulta_catalogo(tipo, filtros)
+    if cursor:
+        orden_cursor, valor, id_item = _decodificar_cursor(cursor, orden)
+        if orden_cursor != orden:
+            raise CursorInvalido("El cursor corresponde a otro orden.")
+        if columna is None:
+            clave, ultimo = columna_id, id_item
+        else:
+            clave, ultimo = tuple_(columna, columna_id), tuple_(valor, id_item)
+        consulta = consulta.filter(clave < ultimo if descendente else clave > ultimo)
+    columnas = [columna_id] if columna is None else [columna, columna_id]
+    consulta = consulta.order_by(*(c.desc() if descendente else c for c in columnas))
+
+    items = consulta.limit(limite + 1).all()
+    siguiente = None
+    if len(items) > limite:
+        items = items[:limite]
+        ultimo_item = items[-1]
+        valor = getattr(ultimo_item, atributo) if atributo else None
+        siguiente = _codificar_cursor(orden, valor, getattr(ultimo_item, nombre_id))
+    return items, siguiente
@@ -0,0 +1,158 @@
+# app/services/ciclo_promociones.py
+from datetime import datetime
+import logging
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models.productos import Producto
+from app.models.promociones import Promocion
+from app.models.servicios import Servicio
+
+logger = logging.getLogger(__name__)
+
+
+def _actualizar(modelo, clave, condiciones, valores):
+    """UPDATE de las filas que cumplen `condiciones`, solo si hay alguna.
+
+    Primero se buscan por índice: si no hay nada que cambiar no se emite el
+    UPDATE y no se disparan las invalidaciones de caché asociadas a la tabla.
+    """
+    ids = [fila[0] for fila in db.session.query(clave).filter(*condiciones)]
+    if ids:
+        db.session.execute(
+            update(modelo).where(clave.in_(ids)).values(**valores).execution_options(synchronize_session=False)
+        )
+    return len(ids)
+
+
+def _sincronizar_items(modelo, clave, columna_promocion):
+    con_promocion = db.session.query(columna_promocion).filter(
+        Promocion.estado == 'activa', columna_promocion.isnot(None)
+    )
+    entran = _actualizar(modelo, clave, [modelo.estado == 'activo', clave.in_(con_promocion)], {'estado': 'en_promocion'})
+    salen = _actualizar(modelo, clave, [modelo.estado == 'en_promocion', clave.notin_(con_promocion)], {'estado': 'activo'})
+    return entran + salen
+
+
+def sincronizar_estados(ahora=None):
+    """Lleva promociones y items al estado que les corresponde en `ahora` y hace commit.
+
+    Los productos y servicios `activo` con una promoción activa pasan a
+    `en_promocion` y vuelven a `activo` cuando ya no tienen ninguna; los
+    `inactivo` no se tocan. Devuelve el número de filas cambiadas.
+    """
+    ahora = ahora or datetime.utcnow()
+    # Estados de origen explícitos (IN en vez de !=) para que usen los índices (estado, fecha)
+    cambios = _actualizar(Promocion, Promocion.id_promocion, [
+        Promocion.estado.in_(('futura', 'activa')), Promocion.fecha_fin < ahora
+    ], {'estado': 'expirada'})
+    cambios += _actualizar(Promocion, Promocion.id_promocion, [
+        Promocion.estado.in_(('futura', 'expirada')), Promocion.fecha_inicio <= ahora, Promocion.fecha_fin >= ahora
+    ], {'estado': 'activa'})
+    cambios += _actualizar(Promocion, Promocion.id_promocion, [
+        Promocion.estado.in_(('activa', 'expirada')), Promocion.fecha_inicio > ahora
+    ], {'estado': 'futura'})
+    cambios += _sincronizar_items(Producto, Producto.id_producto, Promocion.id_producto)
+    cambios += _sincronizar_items(Servicio, Servicio.id_servicio, Promocion.id_servicio)
+    db.session.commit()
+    return cambios
+
+
+def proxima_transicion(ahora=None):
+    """Instante del siguiente inicio o fin de promoción posterior a `ahora`, o None."""
+    ahora = ahora or datetime.utcnow()
+    inicio = db.session.query(func.min(Promocion.fecha_inicio)).filter(
+        Promocion.estado == 'futura', Promocion.fecha_inicio > ahora
+    ).scalar()
+    fin = db.session.query(func.min(Promocion.fecha_fin)).filter(
+        Promocion.estado == 'activa', Promocion.fecha_fin >= ahora
+    ).scalar()
+    return min((instante for instante in (inicio, fin) if instante is not None), default=None)
+
+
+class ProgramadorPromociones:
+    """Hilo que duerme hasta la próxima transición de alguna promoción y sincroniza estados.
+
+    Se despierta antes si un commit de este proceso crea o edita
+    promociones, y como máximo cada `espera_maxima` segundos para recoger
+    cambios hechos desde otros procesos. Cada proceso tiene el suyo; la
+    sincronización es idempotente, así que pueden coincidir sin problema.
+    """
+
+    def __init__(self, app, espera_maxima=300):
+        self.app = app
+        self.espera_maxima = espera_maxima
+        self._despertar = threading.Event()
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._ciclo, name='programador-promociones', daemon=True)
+                self._hilo.start()
+
+    def despertar(self):
+        self._despertar.set()
+
+    def _espera(self):
+        with self.app.app_context():
+            try:
+                cambios = sincronizar_estados()
+                if cambios:
+                    logger.info(f"Estados de promociones sincronizados: {cambios} filas")
+                ahora = datetime.utcnow()
+                siguiente = proxima_transicion(ahora)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error al sincronizar estados de promociones: {str(e)}")
+                return self.espera_maxima
+        if siguiente is None:
+            return self.espera_maxima
+        # El fin es inclusivo: la promoción expira justo después de fecha_fin
+        return min(max((siguiente - ahora).total_seconds(), 0) + 0.01, self.espera_maxima)
+
+    def _ciclo(self):
+        while True:
+            # Se limpia antes de sincronizar para no perder un aviso que llegue mientras tanto
+            self._despertar.clear()
+            self._despertar.wait(self._espera())
+
+
+def init_programador_promociones(app):
+    """Crea el programador; el hilo arranca con la primera petición que atiende el proceso."""
+    programador = ProgramadorPromociones(app, espera_maxima=app.config.get('PROMOCIONES_PROGRAMADOR_ESPERA_MAX', 300))
+    app.extensions['programador_promociones'] = programador
+    if app.config.get('PROMOCIONES_PROGRAMADOR', True):
+        # Arrancarlo al crear la app lo lanzaría también en cada comando de la CLI
+        app.before_request(programador.iniciar)
+    _registrar_eventos()
+
+
+_eventos_registrados = False
+
+
+def _registrar_eventos():
+    global _eventos_registrados
+    if _eventos_registrados:
+        return
+    _eventos_registrados = True
+
+    # Solo cambios hechos con objetos: los UPDATE masivos del propio programador no lo despiertan
+    @event.listens_for(Session, 'after_flush')
+    def _marcar_escritura(session, flush_context):
+        if any(isinstance(objeto, Promocion) for objeto in list(session.new) + list(session.dirty) + list(session.deleted)):
+            session.info['promociones_reprogramar'] = True
+
+    @event.listens_for(Session, 'after_commit')
+    def _reprogramar(session):
+        if session.info.pop('promociones_reprogramar', False) and has_app_context() and 'programador_promociones' in current_app.extensions:
+            current_app.extensions['programador_promociones'].despertar()
+
+    @event.listens_for(Session, 'after_rollback')
+    def _descartar(session):
+        session.info.pop('promociones_reprogramar', None)
@@ -0,0 +1,173 @@
+# app/services/cola_facturas.py
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from functools import partial
+import logging
+import multiprocessing
+import threading
+from flask import current_app
+from app import db
+from app.models.trabajos_factura import TrabajoFactura
+from app.services.facturas import pdf_desde_datos
+
+logger = logging.getLogger(__name__)
+
+# Un trabajo en 'procesando' más tiempo que esto se considera huérfano (p. ej. reinicio del worker)
+TRABAJO_HUERFANO = timedelta(minutes=5)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    """Crea el pool de procesos la primera vez que se necesita (o tras descartar uno roto)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn' evita heredar conexiones a la base de datos e hilos del servidor WSGI
+            _pool = ProcessPoolExecutor(
+                max_workers=current_app.config.get('FACTURAS_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def _descartar_pool(pool):
+    """Desecha un pool roto para que el siguiente obtener_pool() cree otro.
+
+    Si un worker muere (OOM, fallo de PIL o ReportLab) el ProcessPoolExecutor
+    queda roto para siempre y rechaza todo lo que se le envíe. Solo se
+    descarta si sigue siendo el pool actual: otro hilo pudo haberlo
+    reemplazado ya.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _enviar(funcion, *args):
+    """Envía la tarea al pool y devuelve (pool, futuro); si está roto lo reemplaza y reintenta una vez."""
+    pool = obtener_pool()
+    try:
+        return pool, pool.submit(funcion, *args)
+    except BrokenProcessPool:
+        logger.warning("El pool de facturas estaba roto; se crea uno nuevo.")
+        _descartar_pool(pool)
+        pool = obtener_pool()
+        return pool, pool.submit(funcion, *args)
+
+
+def enviar_al_pool(funcion, *args):
+    """Envía una tarea al pool de facturas y devuelve su futuro."""
+    return _enviar(funcion, *args)[1]
+
+
+def encolar_factura(id_venta, id_usuario, nombre_archivo, datos):
+    """Registra el trabajo en la tabla y lo envía al pool; devuelve el trabajo creado."""
+    trabajo = TrabajoFactura(
+        id_venta=id_venta,
+        id_usuario=id_usuario,
+        nombre_archivo=nombre_archivo,
+        datos=datos,
+        estado='pendiente'
+    )
+    db.session.add(trabajo)
+    db.session.commit()
+    despachar(trabajo)
+    return trabajo
+
+
+def despachar(trabajo):
+    """Reclama el trabajo de forma atómica y lo manda a renderizar.
+
+    El UPDATE condicionado al estado garantiza que, aunque varios workers vean
+    el mismo trabajo pendiente, solo uno lo procese.
+    """
+    reclamado = TrabajoFactura.query.filter_by(id_trabajo=trabajo.id_trabajo, estado='pendiente').update(
+        {'estado': 'procesando', 'fecha_inicio': datetime.utcnow()}, synchronize_session=False
+    )
+    db.session.commit()
+    if not reclamado:
+        return False
+    return _enviar_trabajo(current_app._get_current_object(), trabajo.id_trabajo, trabajo.datos, reintentar=True)
+
+
+def _enviar_trabajo(app, id_trabajo, datos, reintentar):
+    try:
+        pool, futuro = _enviar(pdf_desde_datos, datos)
+    except Exception as e:
+        logger.error(f"No se pudo enviar el trabajo {id_trabajo} al pool: {str(e)}")
+        _guardar_error(id_trabajo, str(e))
+        return False
+    futuro.add_done_callback(partial(_guardar_resultado, app, id_trabajo, datos, pool, reintentar))
+    return True
+
+
+def reanudar_si_es_necesario(trabajo):
+    """Vuelve a despachar trabajos que quedaron pendientes o huérfanos tras un reinicio."""
+    if trabajo.estado == 'procesando' and trabajo.fecha_inicio and datetime.utcnow() - trabajo.fecha_inicio > TRABAJO_HUERFANO:
+        TrabajoFactura.query.filter_by(id_trabajo=trabajo.id_trabajo, estado='procesando').update(
+            {'estado': 'pendiente'}, synchronize_session=False
+        )
+        db.session.commit()
+        db.session.refresh(trabajo)
+    if trabajo.estado == 'pendiente':
+        despachar(trabajo)
+        db.session.refresh(trabajo)
+
+
+def _guardar_resultado(app, id_trabajo, datos, pool, reintentar, futuro):
+    """Callback del pool: persiste el PDF o el error en la tabla de trabajos.
+
+    Si el worker murió a mitad del trabajo el pool queda roto: se reemplaza y
+    el trabajo se reenvía una vez antes de marcarlo como fallido.
+    """
+    with app.app_context():
+        try:
+            pdf = futuro.result()
+        except BrokenProcessPool as e:
+            _descartar_pool(pool)
+            if reintentar:
+                logger.warning(f"Un worker de facturas murió con el trabajo {id_trabajo}; se reintenta.")
+                _enviar_trabajo(app, id_trabajo, datos, reintentar=False)
+                return
+            logger.error(f"Error al renderizar la factura del trabajo {id_trabajo}: {str(e)}")
+            _guardar_error(id_trabajo, str(e))
+            return
+        except Exception as e:
+            logger.error(f"Error al renderizar la factura del trabajo {id_trabajo}: {str(e)}")
+            _guardar_error(id_trabajo, str(e))
+            return
+        try:
+            TrabajoFactura.query.filter_by(id_trabajo=id_trabajo).update(
+                {'estado': 'completado', 'pdf': pdf, 'fecha_fin': datetime.utcnow()}, synchronize_session=False
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error al guardar la factura del trabajo {id_trabajo}: {str(e)}")
+
+
+def _guardar_error(id_trabajo, mensaje):
+    try:
+        TrabajoFactura.query.filter_by(id_trabajo=id_trabajo).update(
+            {'estado': 'error', 'error': mensaje, 'fecha_fin': datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error al marcar el trabajo {id_trabajo} como fallido: {str(e)}")
+
+
+def purgar_trabajos(antiguedad=timedelta(days=1)):
+    """Elimina los trabajos terminados más antiguos que `antiguedad`."""
+    limite = datetime.utcnow() - antiguedad
+    borrados = TrabajoFactura.query.filter(
+        TrabajoFactura.estado.in_(['completado', 'error']),
+        TrabajoFactura.fecha_fin < limite
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return borrados
@@ -0,0 +1,209 @@
+# app/services/compresion.py
+import logging
+import zlib
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Solo texto: imágenes, PDF de facturas y zips ya van comprimidos y no ganarían nada
+TIPOS_COMPRIMIBLES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'application/xml', 'image/svg+xml',
+})
+# Niveles medios: la respuesta se comprime en cada petición, no una vez como los estáticos
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 5
+ESTADOS_SIN_CUERPO = (204, 206, 304)
+
+
+class _Gzip:
+    nombre = 'gzip'
+
+    def __init__(self):
+        # wbits=31: formato gzip (cabecera y CRC), no deflate crudo
+        self._compresor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 31)
+
+    def comprimir(self, datos):
+        return self._compresor.compress(datos)
+
+    def vaciar(self):
+        return self._compresor.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self):
+        return self._compresor.flush(zlib.Z_FINISH)
+
+
+class _Brotli:
+    nombre = 'br'
+
+    def __init__(self):
+        self._compresor = brotli.Compressor(quality=CALIDAD_BROTLI)
+
+    def comprimir(self, datos):
+        return self._compresor.process(datos)
+
+    def vaciar(self):
+        return self._compresor.flush()
+
+    def terminar(self):
+        return self._compresor.finish()
+
+
+def _codificacion(environ):
+    """Compresor preferido entre los que acepta el cliente, o None."""
+    aceptadas = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+    if brotli is not None and aceptadas['br']:
+        return _Brotli
+    if aceptadas['gzip']:
+        return _Gzip
+    return None
+
+
+def _cabecera(cabeceras, nombre):
+    nombre = nombre.lower()
+    for clave, valor in cabeceras:
+        if clave.lower() == nombre:
+            return valor
+    return None
+
+
+def _sin_cabeceras(cabeceras, *nombres):
+    nombres = {nombre.lower() for nombre in nombres}
+    return [(clave, valor) for clave, valor in cabeceras if clave.lower() not in nombres]
+
+
+def _con_vary(cabeceras):
+    vary = _cabecera(cabeceras, 'Vary')
+    if vary is None:
+        return cabeceras + [('Vary', 'Accept-Encoding')]
+    if 'accept-encoding' in vary.lower() or vary.strip() == '*':
+        return cabeceras
+    return _sin_cabeceras(cabeceras, 'Vary') + [('Vary', f'{vary}, Accept-Encoding')]
+
+
+class _RespuestaComprimida:
+    """Iterable WSGI que comprime el cuerpo de la aplicación.
+
+    Con Content-Length conocido el cuerpo ya está entero en memoria: se
+    comprime de una vez y se envía con su nuevo Content-Length (o sin
+    comprimir si no ocupa menos). Sin él es una respuesta en streaming
+    (exportaciones CSV/NDJSON): cada trozo se comprime y se vacía con
+    Z_SYNC_FLUSH para que el cliente lo reciba sin esperar al final.
+    """
+
+    def __init__(self, iterable, compresor, start_response, estado, cabeceras, exc_info, escritos):
+        self._iterable = iterable
+        self._compresor = compresor
+        self._start_response = start_response
+        self._estado = estado
+        self._cabeceras = cabeceras
+        self._exc_info = exc_info
+        self._escritos = escritos
+
+    def _trozos(self):
+        yield from self._escritos
+        yield from self._iterable
+
+    def __iter__(self):
+        cabeceras = _sin_cabeceras(self._cabeceras, 'Content-Length', 'Accept-Ranges')
+        cabeceras.append(('Content-Encoding', self._compresor.nombre))
+        # El cuerpo comprimido no es idéntico byte a byte al original
+        etag = _cabecera(cabeceras, 'ETag')
+        if etag and not etag.startswith('W/'):
+            cabeceras = _sin_cabeceras(cabeceras, 'ETag') + [('ETag', f'W/{etag}')]
+
+        if _cabecera(self._cabeceras, 'Content-Length') is not None:
+            original = b''.join(self._trozos())
+            comprimido = self._compresor.comprimir(original) + self._compresor.terminar()
+            if len(comprimido) >= len(original):
+                self._start_response(self._estado, self._cabeceras, self._exc_info)
+                yield original
+                return
+            cabeceras.append(('Content-Length', str(len(comprimido))))
+            self._start_response(self._estado, cabeceras, self._exc_info)
+            yield comprimido
+            return
+
+        self._start_response(self._estado, cabeceras, self._exc_info)
+        for trozo in self._trozos():
+            if trozo:
+                datos = self._compresor.comprimir(trozo) + self._compresor.vaciar()
+                if datos:
+                    yield datos
+        yield self._compresor.terminar()
+
+    def close(self):
+        cerrar = getattr(self._iterable, 'close', None)
+        if cerrar is not None:
+            cerrar()
+
+
+class MiddlewareCompresion:
+    """Middleware WSGI que comprime con brotli o gzip las respuestas de texto.
+
+    Solo se comprimen los tipos de TIPOS_COMPRIMIBLES de al menos
+    `minimo_bytes` (las respuestas en streaming siempre) que no traigan ya
+    Content-Encoding: los estáticos precomprimidos y los PDF pasan intactos.
+    Tampoco se tocan HEAD, 204/206/304, rangos ni Cache-Control: no-transform.
+    """
+
+    def __init__(self, wsgi_app, minimo_bytes=1024):
+        self.wsgi_app = wsgi_app
+        self.minimo_bytes = minimo_bytes
+
+    def _comprimible(self, estado, cabeceras):
+        codigo = int(estado.split(' ', 1)[0])
+        if codigo < 200 or codigo in ESTADOS_SIN_CUERPO:
+            return False
+        if _cabecera(cabeceras, 'Content-Encoding') or _cabecera(cabeceras, 'Content-Range'):
+            return False
+        if 'no-transform' in (_cabecera(cabeceras, 'Cache-Control') or '').lower():
+            return False
+        longitud = _cabecera(cabeceras, 'Content-Length')
+        return longitud is None or int(longitud) >= self.minimo_bytes
+
+    def __call__(self, environ, start_response):
+        compresor = _codificacion(environ)
+        if compresor is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.wsgi_app(environ, start_response)
+
+        respuesta = {}
+        escritos = []
+
+        def iniciar(estado, cabeceras, exc_info=None):
+            if respuesta.get('devuelta'):
+                # start_response llamado al iterar: el cuerpo ya se está enviando sin comprimir
+                return start_response(estado, cabeceras, exc_info)
+            tipo = (_cabecera(cabeceras, 'Content-Type') or '').split(';', 1)[0].strip().lower()
+            if tipo not in TIPOS_COMPRIMIBLES or _cabecera(cabeceras, 'Content-Encoding'):
+                respuesta.clear()
+                return start_response(estado, cabeceras, exc_info)
+            # La representación depende de Accept-Encoding aunque esta vez no se comprima
+            cabeceras = _con_vary(list(cabeceras))
+            if not self._comprimible(estado, cabeceras):
+                respuesta.clear()
+                return start_response(estado, cabeceras, exc_info)
+            # start_response real se llama al empezar a iterar, con las cabeceras finales
+            respuesta.update(estado=estado, cabeceras=cabeceras, exc_info=exc_info)
+            return escritos.append
+
+        iterable = self.wsgi_app(environ, iniciar)
+        if 'estado' not in respuesta:
+            respuesta['devuelta'] = True
+            return iterable
+        return _RespuestaComprimida(iterable, compresor(), start_response, respuesta['estado'],
+                                    respuesta['cabeceras'], respuesta['exc_info'], escritos)
+
+
+def init_compresion(app):
+    if not app.config.get('COMPRESION', True):
+        return
+    if brotli is None:
+        logger.info("El paquete brotli no está instalado; las respuestas se comprimirán solo con gzip.")
+    app.wsgi_app = MiddlewareCompresion(app.wsgi_app, app.config.get('COMPRESION_MINIMO_BYTES', 1024))
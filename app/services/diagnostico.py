@@ -0,0 +1,54 @@
+# app/services/diagnostico.py
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app import db
+from app.models.carrito import Carrito
+from app.models.citas import Cita
+from app.models.detalle_ventas import DetalleVenta
+from app.models.guardados import Guardado
+from app.models.inventario_movimientos import InventarioMovimiento
+from app.models.notificaciones import Notificacion
+from app.models.promociones import Promocion
+from app.models.reseñas import Reseña
+from app.models.ventas import Venta
+
+
+def explicar(consulta, analizar=False):
+    """Plan de ejecución de una consulta ORM como lista de líneas.
+
+    En PostgreSQL usa EXPLAIN (con ANALYZE y BUFFERS si `analizar`, lo que
+    ejecuta la consulta); en SQLite, EXPLAIN QUERY PLAN.
+    """
+    bind = db.session.get_bind()
+    sql = str(consulta.statement.compile(bind, compile_kwargs={'literal_binds': True}))
+    if bind.dialect.name == 'postgresql':
+        prefijo = 'EXPLAIN (ANALYZE, BUFFERS) ' if analizar else 'EXPLAIN '
+        return [fila[0] for fila in db.session.execute(text(prefijo + sql))]
+    return [fila[-1] for fila in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+
+
+def consultas_frecuentes(id_usuario=1, id_item=1, ahora=None):
+    """Las consultas calientes de la aplicación, con parámetros representativos."""
+    ahora = ahora or datetime.now()
+    return {
+        'citas del empleado': Cita.query.filter_by(id_empleado=id_usuario, estado='pendiente').order_by(Cita.fecha_hora),
+        'citas sin asignar': Cita.query.filter_by(estado='pendiente', id_empleado=None),
+        'notificaciones del usuario': Notificacion.query.filter_by(id_usuario=id_usuario).order_by(Notificacion.fecha_envio.desc()),
+        'notificaciones no leídas': Notificacion.query.filter_by(id_usuario=id_usuario, leida=False),
+        'carrito activo': Carrito.query.filter_by(id_usuario=id_usuario, estado='activo'),
+        'promoción vigente del producto': Promocion.query.filter_by(id_producto=id_item).filter(
+            Promocion.fecha_inicio <= ahora, Promocion.fecha_fin >= ahora
+        ),
+        'promociones vigentes': Promocion.query.filter(Promocion.fecha_inicio <= ahora, Promocion.fecha_fin >= ahora),
+        'salidas de inventario del mes': InventarioMovimiento.query.filter(
+            InventarioMovimiento.tipo_movimiento == 'salida',
+            InventarioMovimiento.fecha_movimiento >= ahora.replace(day=1),
+            InventarioMovimiento.fecha_movimiento < ahora + timedelta(days=1)
+        ),
+        'favorito del usuario': Guardado.query.filter_by(id_usuario=id_usuario, id_producto=id_item),
+        'reseñas del producto': Reseña.query.filter_by(id_producto=id_item),
+        'ventas del mes': Venta.query.filter(
+            Venta.fecha_venta >= ahora.replace(day=1), Venta.fecha_venta < ahora + timedelta(days=1)
+        ),
+        'detalles de una venta': DetalleVenta.query.filter_by(id_venta=id_item),
+    }
@@ -0,0 +1,188 @@
+# app/services/estaticos.py
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from flask import current_app, url_for
+from markupsafe import Markup, escape
+
+logger = logging.getLogger(__name__)
+
+# Paquetes de varios archivos que siempre se cargan juntos; el resto de css/, js/ e
+# images/ se compila uno a uno con el mismo nombre lógico que su ruta en static/
+PAQUETES = {
+    # Todas las páginas: tema claro/oscuro y buscador de la barra (se desactiva solo sin el buscador)
+    'js/base.js': ['js/theme-toggle.js', 'js/busqueda.js'],
+}
+CARPETAS = ('css', 'js', 'images')
+# Tipos que vale la pena guardar también comprimidos; jpeg/png ya lo están
+COMPRIMIBLES = ('.css', '.js', '.svg', '.ico')
+MANIFIESTO = 'manifest.json'
+
+
+def directorio_compilados(app=None):
+    app = app or current_app
+    return app.config.get('ESTATICOS_DIR') or os.path.join(app.static_folder, 'dist')
+
+
+def _escribir(ruta, datos):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        archivo.write(datos)
+    os.replace(temporal, ruta)
+
+
+# Cadenas y comentarios se reconocen antes que el resto para no tocar su contenido
+_TOKENS_CSS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|(/\*.*?\*/)|([^"\'/]+|/)', re.S)
+
+
+def minificar_css(texto):
+    """Quita comentarios y espacios sobrantes sin tocar cadenas ni expresiones de calc()."""
+    partes = []
+    for cadena, comentario, codigo in _TOKENS_CSS.findall(texto):
+        if cadena:
+            partes.append(cadena)
+        elif codigo:
+            codigo = re.sub(r'\s+', ' ', codigo)
+            # Alrededor de + y - los espacios son significativos dentro de calc(), y antes
+            # de ':' separan un descendiente de una pseudoclase ('.a :hover')
+            codigo = re.sub(r'\s*([{};,>~])\s*', r'\1', codigo)
+            codigo = re.sub(r':\s+', ':', codigo)
+            partes.append(codigo)
+    return re.sub(r';}', '}', ''.join(partes)).strip()
+
+
+def minificar_js(texto):
+    """Minificación conservadora: sangría, líneas vacías y comentarios de línea completa.
+
+    Los saltos de línea se conservan (la inserción automática de punto y coma
+    depende de ellos) y las líneas dentro de plantillas `...` no se tocan.
+    """
+    lineas = []
+    en_plantilla = False
+    for linea in texto.splitlines():
+        if en_plantilla:
+            lineas.append(linea)
+        else:
+            linea = linea.strip()
+            if linea and not linea.startswith('//'):
+                lineas.append(linea)
+        # Las comillas invertidas sin escapar abren o cierran una plantilla
+        if len(re.findall(r'(?<!\\)`', linea)) % 2:
+            en_plantilla = not en_plantilla
+    return '\n'.join(lineas)
+
+
+def _fuentes(static_folder):
+    """Nombre lógico -> archivos de static/ que lo forman."""
+    fuentes = {}
+    agrupados = {archivo for archivos in PAQUETES.values() for archivo in archivos}
+    for carpeta in CARPETAS:
+        raiz = os.path.join(static_folder, carpeta)
+        for directorio, _, archivos in os.walk(raiz):
+            for archivo in sorted(archivos):
+                relativa = os.path.relpath(os.path.join(directorio, archivo), static_folder).replace(os.sep, '/')
+                if relativa not in agrupados:
+                    fuentes[relativa] = [relativa]
+    fuentes.update(PAQUETES)
+    return fuentes
+
+
+def _contenido(static_folder, nombre, archivos):
+    datos = []
+    for archivo in archivos:
+        with open(os.path.join(static_folder, archivo), 'rb') as f:
+            datos.append(f.read())
+    if nombre.endswith('.css'):
+        return minificar_css(b'\n'.join(datos).decode('utf-8')).encode('utf-8')
+    if nombre.endswith('.js'):
+        # El punto y coma evita que un archivo sin él al final se una con el siguiente
+        return minificar_js('\n;\n'.join(d.decode('utf-8') for d in datos)).encode('utf-8')
+    return b''.join(datos)
+
+
+def construir(app, limpiar=False):
+    """Compila los recursos de static/ en ESTATICOS_DIR y escribe el manifiesto.
+
+    Cada recurso se guarda con el hash de su contenido en el nombre, más
+    copias .gz y .br (si está instalado el paquete opcional `brotli`) para
+    servirlas sin comprimir en cada petición. Devuelve el manifiesto.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        logger.warning("El paquete brotli no está instalado; solo se generarán copias .gz.")
+    destino = directorio_compilados(app)
+    manifiesto = {}
+    for nombre, archivos in sorted(_fuentes(app.static_folder).items()):
+        datos = _contenido(app.static_folder, nombre, archivos)
+        base, extension = os.path.splitext(nombre)
+        compilado = f'{base}.{hashlib.sha256(datos).hexdigest()[:12]}{extension}'
+        ruta = os.path.join(destino, compilado)
+        manifiesto[nombre] = compilado
+        if os.path.exists(ruta):
+            continue
+        _escribir(ruta, datos)
+        if extension in COMPRIMIBLES:
+            _escribir(ruta + '.gz', gzip.compress(datos, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _escribir(ruta + '.br', brotli.compress(datos, quality=11))
+    _escribir(os.path.join(destino, MANIFIESTO), json.dumps(manifiesto, indent=2, sort_keys=True).encode('utf-8'))
+    if limpiar:
+        # Los compilados anteriores se conservan por defecto: páginas ya servidas pueden seguir pidiéndolos
+        vigentes = set(manifiesto.values())
+        for directorio, _, archivos in os.walk(destino):
+            for archivo in archivos:
+                relativa = os.path.relpath(os.path.join(directorio, archivo), destino).replace(os.sep, '/')
+                if relativa != MANIFIESTO and re.sub(r'\.(gz|br)$', '', relativa) not in vigentes:
+                    os.remove(os.path.join(directorio, archivo))
+    return manifiesto
+
+
+def _cargar_manifiesto(app):
+    ruta = os.path.join(directorio_compilados(app), MANIFIESTO)
+    if not app.config.get('ESTATICOS_COMPILADOS', True) or not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError) as e:
+        logger.error(f"No se pudo leer el manifiesto de estáticos, se sirven los originales: {str(e)}")
+        return None
+
+
+def url_recurso(nombre):
+    """URL con huella del recurso compilado, o la de static/ si no hay compilación."""
+    manifiesto = current_app.extensions['estaticos']['manifiesto']
+    if manifiesto is not None and nombre in manifiesto:
+        return url_for('estaticos.recurso', archivo=manifiesto[nombre])
+    return url_for('static', filename=nombre)
+
+
+def _urls(nombre):
+    manifiesto = current_app.extensions['estaticos']['manifiesto']
+    if manifiesto is not None and nombre in manifiesto:
+        return [url_for('estaticos.recurso', archivo=manifiesto[nombre])]
+    # Sin compilar: los archivos originales del paquete, uno por etiqueta
+    archivos = PAQUETES.get(nombre, [nombre])
+    return [url_for('static', filename=archivo) for archivo in archivos
+            if os.path.exists(os.path.join(current_app.static_folder, archivo))]
+
+
+def recurso(nombre):
+    """Etiquetas <link>/<script> de un recurso o paquete; nada si el archivo no existe."""
+    if nombre.endswith('.css'):
+        etiquetas = [f'<link rel="stylesheet" href="{escape(url)}">' for url in _urls(nombre)]
+    else:
+        etiquetas = [f'<script src="{escape(url)}"></script>' for url in _urls(nombre)]
+    return Markup('\n'.join(etiquetas))
+
+
+def init_estaticos(app):
+    app.extensions['estaticos'] = {'manifiesto': _cargar_manifiesto(app)}
+    app.jinja_env.globals.update(recurso=recurso, url_recurso=url_recurso)
@@ -0,0 +1,143 @@
+# app/services/exportar_facturas.py
+from collections import defaultdict, deque
+import logging
+import zipfile
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.ventas import Venta
+from app.models.detalle_ventas import DetalleVenta
+from app.services.cache_facturas import ruta_en_cache, guardar_en_cache
+from app.services.cola_facturas import enviar_al_pool
+from app.services.facturas import pdf_desde_datos
+from app.services.facturas_ventas import datos_factura_venta, nombre_archivo_venta
+
+logger = logging.getLogger(__name__)
+
+# Ventas leídas por cada vuelta del cursor del servidor
+LOTE_VENTAS = 500
+# Entrada del ZIP con las facturas que no se pudieron generar
+ARCHIVO_ERRORES = 'ERRORES.txt'
+
+
+class _SalidaZip:
+    """Destino de escritura sin seek: zipfile usa descriptores de datos y
+    podemos ir entregando los bytes al cliente a medida que se generan."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _ventas_en_rango(desde, hasta):
+    """Recorre las ventas del rango con sus detalles: produce (venta, detalles).
+
+    Las ventas se leen con un cursor del servidor (yield_per) y los detalles
+    de cada lote con una sola consulta `id_venta IN (...)`: yield_per no se
+    puede combinar con selectinload de una colección.
+    """
+    consulta = (
+        select(Venta)
+        .where(Venta.fecha_venta >= desde, Venta.fecha_venta < hasta)
+        .order_by(Venta.id_venta)
+        .options(joinedload(Venta.usuario))
+        .execution_options(yield_per=LOTE_VENTAS)
+    )
+    for lote in db.session.scalars(consulta).partitions():
+        detalles = defaultdict(list)
+        for detalle in db.session.scalars(
+            select(DetalleVenta)
+            .where(DetalleVenta.id_venta.in_([venta.id_venta for venta in lote]))
+            .order_by(DetalleVenta.id_detalle)
+            .options(joinedload(DetalleVenta.producto), joinedload(DetalleVenta.servicio))
+        ):
+            detalles[detalle.id_venta].append(detalle)
+        for venta in lote:
+            yield venta, detalles[venta.id_venta]
+
+
+def _pendientes(desde, hasta):
+    """Produce (venta, nombre, datos, ruta_en_cache) sin renderizar nada todavía."""
+    for venta, detalles in _ventas_en_rango(desde, hasta):
+        datos = datos_factura_venta(venta, detalles, venta.usuario)
+        # El mapa de identidad guarda referencias débiles: al soltar la venta se libera
+        yield venta.id_venta, nombre_archivo_venta(venta), datos, ruta_en_cache(venta.id_venta, datos)
+
+
+def zip_facturas(desde, hasta):
+    """Genera el ZIP con las facturas de [desde, hasta) en bloques listos para enviar.
+
+    Las facturas que no están en caché se renderizan en el pool de procesos,
+    con un máximo de trabajos en vuelo para que la memoria quede acotada. Si
+    el pool falla se renderizan en este proceso, y las que aun así no se
+    pueden generar quedan listadas en ERRORES.txt: el archivo nunca parece
+    completo sin estarlo.
+    """
+    salida = _SalidaZip()
+    en_vuelo = deque()
+    errores = []
+    max_en_vuelo = current_app.config.get('FACTURAS_WORKERS', 2) * 4
+
+    with zipfile.ZipFile(salida, mode='w', compression=zipfile.ZIP_STORED) as archivo_zip:
+        def renderizar_aqui(id_venta, nombre, datos):
+            try:
+                archivo_zip.writestr(nombre, pdf_desde_datos(datos))
+            except Exception as e:
+                logger.error(f"Error al renderizar la factura de la venta {id_venta}: {str(e)}")
+                errores.append(f"{nombre} (venta {id_venta}): {str(e)}")
+
+        def escribir_siguiente():
+            id_venta, nombre, datos, ruta, futuro = en_vuelo.popleft()
+            if futuro is not None:
+                try:
+                    pdf = futuro.result()
+                except Exception as e:
+                    logger.warning(f"El pool no pudo renderizar la factura de la venta {id_venta}: {str(e)}")
+                    renderizar_aqui(id_venta, nombre, datos)
+                    return
+                guardar_en_cache(id_venta, datos, pdf)
+                archivo_zip.writestr(nombre, pdf)
+            else:
+                try:
+                    archivo_zip.write(ruta, nombre)
+                except FileNotFoundError:
+                    # Expulsada de la caché entre la consulta y la escritura
+                    renderizar_aqui(id_venta, nombre, datos)
+
+        for id_venta, nombre, datos, ruta in _pendientes(desde, hasta):
+            futuro = None
+            if ruta is None:
+                try:
+                    futuro = enviar_al_pool(pdf_desde_datos, datos)
+                except Exception as e:
+                    logger.warning(f"No se pudo enviar la factura de la venta {id_venta} al pool: {str(e)}")
+                    renderizar_aqui(id_venta, nombre, datos)
+                    yield salida.vaciar()
+                    continue
+            en_vuelo.append((id_venta, nombre, datos, ruta, futuro))
+            while len(en_vuelo) >= max_en_vuelo:
+                escribir_siguiente()
+                yield salida.vaciar()
+        while en_vuelo:
+            escribir_siguiente()
+            yield salida.vaciar()
+        if errores:
+            archivo_zip.writestr(ARCHIVO_ERRORES, "No se pudieron generar estas facturas:\n" + "\n".join(errores) + "\n")
+    yield salida.vaciar()
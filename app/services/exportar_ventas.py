@@ -0,0 +1,109 @@
+# app/services/exportar_ventas.py
+import csv
+from datetime import date, datetime
+from decimal import Decimal
+import io
+import json
+from sqlalchemy import case, exists, func, select
+from app import db
+from app.models.detalle_ventas import DetalleVenta
+from app.models.pagos import Pago
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+from app.models.users import Usuario
+from app.models.ventas import Venta
+
+# Filas que entrega el cursor del servidor en cada vuelta; también es el tamaño de cada bloque enviado
+LOTE_FILAS = 1000
+
+RECURSOS = ('ventas', 'detalles', 'pagos')
+FORMATOS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def _consulta(recurso):
+    if recurso == 'ventas':
+        return select(
+            Venta.id_venta, Venta.fecha_venta, Venta.id_usuario,
+            Usuario.nombre.label('cliente'), Venta.total
+        ).select_from(Venta).outerjoin(Usuario, Usuario.id_usuario == Venta.id_usuario)
+    if recurso == 'detalles':
+        return select(
+            DetalleVenta.id_detalle, DetalleVenta.id_venta, Venta.fecha_venta, Venta.id_usuario,
+            case((DetalleVenta.id_producto.isnot(None), 'producto'), else_='servicio').label('tipo'),
+            func.coalesce(DetalleVenta.id_producto, DetalleVenta.id_servicio).label('id_item'),
+            func.coalesce(Producto.nombre, Servicio.nombre).label('item'),
+            DetalleVenta.cantidad, DetalleVenta.precio_unitario,
+            (DetalleVenta.cantidad * DetalleVenta.precio_unitario).label('subtotal')
+        ).select_from(DetalleVenta).join(Venta, Venta.id_venta == DetalleVenta.id_venta).outerjoin(
+            Producto, Producto.id_producto == DetalleVenta.id_producto
+        ).outerjoin(Servicio, Servicio.id_servicio == DetalleVenta.id_servicio)
+    return select(
+        Pago.id_pago, Pago.id_venta, Venta.fecha_venta, Pago.metodo_pago,
+        Pago.monto, Pago.estado, Pago.fecha_pago
+    ).select_from(Pago).join(Venta, Venta.id_venta == Pago.id_venta)
+
+
+def consulta_exportacion(recurso, desde=None, hasta=None, id_producto=None, id_servicio=None):
+    """SELECT de columnas planas del recurso, filtrado por [desde, hasta) y por item."""
+    consulta = _consulta(recurso)
+    if desde:
+        consulta = consulta.where(Venta.fecha_venta >= desde)
+    if hasta:
+        consulta = consulta.where(Venta.fecha_venta < hasta)
+    filtros_item = []
+    if id_producto:
+        filtros_item.append(DetalleVenta.id_producto == id_producto)
+    if id_servicio:
+        filtros_item.append(DetalleVenta.id_servicio == id_servicio)
+    if filtros_item:
+        if recurso == 'detalles':
+            consulta = consulta.where(*filtros_item)
+        else:
+            # Ventas (o sus pagos) que incluyen el item
+            consulta = consulta.where(exists().where(DetalleVenta.id_venta == Venta.id_venta, *filtros_item))
+    orden = {'ventas': Venta.id_venta, 'detalles': DetalleVenta.id_detalle, 'pagos': Pago.id_pago}[recurso]
+    return consulta.order_by(orden)
+
+
+def _valor_json(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _lotes(consulta):
+    """Recorre el resultado con un cursor del servidor, un lote de filas a la vez."""
+    resultado = db.session.execute(consulta.execution_options(stream_results=True, yield_per=LOTE_FILAS))
+    try:
+        yield list(resultado.keys())
+        for lote in resultado.partitions():
+            yield lote
+    finally:
+        resultado.close()
+
+
+def exportar(consulta, formato):
+    """Genera la exportación por bloques: primero la cabecera y luego un bloque por lote.
+
+    La memoria usada depende del tamaño del lote, no del número de filas.
+    """
+    lotes = _lotes(consulta)
+    columnas = next(lotes)
+    if formato == 'csv':
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(columnas)
+        yield buffer.getvalue()
+        for lote in lotes:
+            buffer.seek(0)
+            buffer.truncate()
+            escritor.writerows(lote)
+            yield buffer.getvalue()
+    else:
+        for lote in lotes:
+            yield ''.join(
+                json.dumps(dict(zip(columnas, fila)), default=_valor_json, ensure_ascii=False) + '\n'
+                for fila in lote
+            )
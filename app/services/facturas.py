@@ -0,0 +1,241 @@
+# app/services/facturas.py
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+import io
+import os
+from flask import send_file
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from PIL import Image, ImageDraw
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), '..', 'static', 'images', 'casa-bella-logo.jpeg')
+LOGO_SIZE = 80
+
+# Nombres de los form XObjects reutilizados dentro de cada documento
+FORM_ENCABEZADO = 'encabezado_factura'
+FORM_PIE = 'pie_factura'
+
+CENTAVOS = Decimal('0.01')
+
+# Límite inferior para las líneas de detalle y alto del bloque de totales + pie
+Y_MINIMO = 80
+ALTO_TOTALES = 115
+
+
+@lru_cache(maxsize=1)
+def logo_circular(size=LOGO_SIZE):
+    """Recorta el logo en círculo una sola vez por proceso y lo deja decodificado."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+    img = Image.open(LOGO_PATH)
+    img = img.convert("RGBA")
+    img.thumbnail((size, size), Image.Resampling.LANCZOS)
+    mask = Image.new('L', (size, size), 0)
+    draw = ImageDraw.Draw(mask)
+    draw.ellipse((0, 0, size, size), fill=255)
+    output = Image.new('RGBA', (size, size), (255, 255, 255, 0))
+    output.paste(img, ((size - img.width) // 2, (size - img.height) // 2))
+    output.putalpha(mask)
+    img_buffer = io.BytesIO()
+    output.save(img_buffer, format='PNG')
+    img_buffer.seek(0)
+    reader = ImageReader(img_buffer)
+    # Forzar la decodificación ahora para que cada factura reutilice los píxeles ya listos
+    reader.getRGBData()
+    return reader
+
+
+def _definir_formularios(c):
+    """Registra en el documento el encabezado y el pie estáticos como form XObjects."""
+    c.beginForm(FORM_ENCABEZADO)
+    logo = logo_circular()
+    if logo is not None:
+        c.drawImage(logo, 50, 720, LOGO_SIZE, LOGO_SIZE, mask='auto')
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(150, 760, "Casa Bella")
+    c.setFont("Helvetica", 14)
+    c.drawString(150, 740, "Salón de Belleza y Distribuidora")
+    c.setStrokeColorRGB(0.2, 0.4, 0.8)
+    c.setLineWidth(2)
+    c.line(50, 710, 550, 710)
+    c.endForm()
+
+    # El pie se dibuja en el origen y se traslada a su posición al usarlo
+    c.beginForm(FORM_PIE)
+    c.setFont("Helvetica-Oblique", 10)
+    c.drawString(50, 15, "¡Gracias por confiar en Casa Bella!")
+    c.drawString(50, 0, "Tu belleza es nuestra pasión")
+    c.endForm()
+
+
+def linea_factura(nombre, cantidad, precio_unitario, promocion=None):
+    """Arma una línea de factura con su subtotal ya calculado."""
+    subtotal = Decimal(str(cantidad)) * Decimal(str(precio_unitario))
+    return {
+        'nombre': nombre,
+        'cantidad': cantidad,
+        'subtotal': subtotal,
+        'promocion': f"Promoción: {promocion.nombre} ({promocion.descuento}% descuento)" if promocion else None
+    }
+
+
+def _encabezado_tabla(c, y, seccion):
+    """Título de la sección de líneas; se repite al inicio de cada página."""
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(50, y, seccion)
+    c.setStrokeColorRGB(0.8, 0.8, 0.8)
+    c.setLineWidth(2)
+    c.line(50, y-5, 550, y-5)
+    c.setFont("Helvetica", 9)
+    return y - 25
+
+
+def _pie_pagina(c, pagina, acumulado=None):
+    """Cierra la página con el número y, si la factura continúa, el total que se arrastra."""
+    if acumulado is not None:
+        c.setFont("Helvetica-Bold", 9)
+        c.drawRightString(550, Y_MINIMO - 20, f"Van: ${acumulado.quantize(CENTAVOS)}")
+    c.setFont("Helvetica", 8)
+    c.drawCentredString(300, 30, f"Página {pagina}")
+
+
+def renderizar_factura(destino, titulo, fecha, cliente, seccion, lineas, subtotal, iva, total):
+    """Dibuja la factura en `destino` (ruta o archivo en memoria).
+
+    `cliente` es un diccionario con nombre, email y teléfono; `lineas` es
+    cualquier iterable de diccionarios creados con `linea_factura` y se consume
+    una sola vez, así que puede ser un generador. Cuando las líneas no caben se
+    abre otra página con el encabezado repetido y el total acumulado.
+    """
+    c = canvas.Canvas(destino, pagesize=letter)
+    _definir_formularios(c)
+    c.doForm(FORM_ENCABEZADO)
+    fecha_texto = f"Fecha: {fecha.strftime('%Y-%m-%d %H:%M') if fecha else 'Sin fecha'}"
+
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, 680, titulo)
+    c.setFont("Helvetica", 10)
+    c.drawString(400, 680, fecha_texto)
+
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(50, 660, "DATOS DEL CLIENTE:")
+    c.setFont("Helvetica", 10)
+    c.drawString(50, 645, f"Nombre: {cliente.get('nombre')}")
+    c.drawString(50, 630, f"Email: {cliente.get('email') or 'No proporcionado'}")
+    c.drawString(50, 615, f"Teléfono: {cliente.get('telefono') or 'No proporcionado'}")
+
+    pagina = 1
+    acumulado = Decimal('0.00')
+
+    def nueva_pagina():
+        _pie_pagina(c, pagina, acumulado)
+        c.showPage()
+        c.doForm(FORM_ENCABEZADO)
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(50, 680, f"{titulo} (continuación)")
+        c.setFont("Helvetica", 10)
+        c.drawString(400, 680, fecha_texto)
+        c.setFont("Helvetica-Bold", 9)
+        c.drawRightString(550, 662, f"Vienen: ${acumulado.quantize(CENTAVOS)}")
+        return _encabezado_tabla(c, 640, seccion)
+
+    y = _encabezado_tabla(c, 580, seccion)
+    for linea in lineas:
+        alto = 35 if linea.get('promocion') else 20
+        if y - alto + 20 < Y_MINIMO:
+            y = nueva_pagina()
+            pagina += 1
+        c.drawString(60, y, f"{linea['nombre']} x {linea['cantidad']} - ${linea['subtotal'].quantize(CENTAVOS)}")
+        if linea.get('promocion'):
+            c.drawString(60, y-15, linea['promocion'])
+        y -= alto
+        acumulado += linea['subtotal']
+
+    # Los totales y el pie no se separan: si no caben, pasan a una página nueva
+    if y - ALTO_TOTALES < 45:
+        y = nueva_pagina()
+        pagina += 1
+
+    c.setStrokeColorRGB(0.8, 0.8, 0.8)
+    c.setLineWidth(1)
+    c.line(50, y-5, 550, y-5)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(400, y-30, f"Subtotal: ${subtotal.quantize(CENTAVOS)}")
+    c.drawString(400, y-45, f"IVA (16%): ${iva.quantize(CENTAVOS)}")
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(400, y-65, f"TOTAL: ${total.quantize(CENTAVOS)}")
+
+    c.saveState()
+    c.translate(0, y-115)
+    c.doForm(FORM_PIE)
+    c.restoreState()
+    _pie_pagina(c, pagina)
+    c.save()
+
+
+def generar_pdf_factura(*args, **kwargs):
+    """Renderiza la factura en memoria y devuelve los bytes del PDF."""
+    buffer = io.BytesIO()
+    renderizar_factura(buffer, *args, **kwargs)
+    return buffer.getvalue()
+
+
+def respuesta_factura(pdf, nombre_archivo):
+    """Envía el PDF como descarga sin tocar el disco.
+
+    `send_file` envuelve el buffer con el file wrapper de WSGI, que lo transmite
+    por bloques en lugar de copiarlo completo en la respuesta.
+    """
+    return send_file(
+        io.BytesIO(pdf),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=nombre_archivo,
+        max_age=0
+    )
+
+
+def respuesta_factura_archivo(ruta, nombre_archivo):
+    """Envía una factura ya guardada en disco (caché) como descarga."""
+    return send_file(
+        ruta,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=nombre_archivo,
+        max_age=0
+    )
+
+
+def datos_factura(titulo, fecha, cliente, seccion, lineas, subtotal, iva, total):
+    """Empaqueta la factura en un diccionario serializable a JSON.
+
+    Es lo que se guarda con cada trabajo de la cola y lo que recibe el proceso
+    que renderiza, así el PDF no depende de la sesión de base de datos.
+    """
+    return {
+        'titulo': titulo,
+        'fecha': fecha.isoformat() if fecha else None,
+        'cliente': cliente,
+        'seccion': seccion,
+        'lineas': [dict(linea, subtotal=str(linea['subtotal'])) for linea in lineas],
+        'subtotal': str(subtotal),
+        'iva': str(iva),
+        'total': str(total)
+    }
+
+
+def pdf_desde_datos(datos):
+    """Renderiza una factura empaquetada con `datos_factura` (se ejecuta en el pool)."""
+    lineas = (dict(linea, subtotal=Decimal(linea['subtotal'])) for linea in datos['lineas'])
+    return generar_pdf_factura(
+        datos['titulo'],
+        datetime.fromisoformat(datos['fecha']) if datos['fecha'] else None,
+        datos['cliente'],
+        datos['seccion'],
+        lineas,
+        Decimal(datos['subtotal']),
+        Decimal(datos['iva']),
+        Decimal(datos['total'])
+    )
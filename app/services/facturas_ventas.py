@@ -0,0 +1,56 @@
+# app/services/facturas_ventas.py
+from datetime import datetime
+from decimal import Decimal
+from app.services.facturas import linea_factura, datos_factura
+from app.services.promociones import promocion_vigente
+
+# IVA (16% como estándar, ajustable)
+IVA_RATE = Decimal("0.16")
+
+
+def datos_cliente(usuario):
+    """Datos del cliente que se imprimen en la factura."""
+    if usuario is None:
+        return {'nombre': 'Cliente no registrado', 'email': None, 'telefono': None}
+    return {'nombre': usuario.nombre, 'email': usuario.email, 'telefono': usuario.telefono}
+
+
+def lineas_factura(detalles_venta):
+    """Convierte los detalles de una venta en líneas de factura con su promoción vigente."""
+    lineas = []
+    now = datetime.utcnow()
+    for detalle in detalles_venta:
+        if detalle.id_producto:
+            producto = detalle.producto
+            promocion = promocion_vigente(id_producto=detalle.id_producto, momento=now)
+            if producto:
+                lineas.append(linea_factura(producto.nombre, detalle.cantidad, detalle.precio_unitario, promocion))
+        elif detalle.id_servicio:
+            servicio = detalle.servicio
+            promocion = promocion_vigente(id_servicio=detalle.id_servicio, momento=now)
+            if servicio:
+                lineas.append(linea_factura(servicio.nombre, detalle.cantidad, detalle.precio_unitario, promocion))
+    return lineas
+
+
+def datos_factura_venta(venta, detalles_venta, usuario):
+    """Empaqueta la factura de una venta ya registrada.
+
+    La usan tanto la descarga del cliente como la exportación masiva, de modo
+    que ambas producen la misma clave en la caché de facturas.
+    """
+    total = venta.total if venta.total else Decimal('0.00')
+    subtotal = sum((Decimal(str(detalle.cantidad)) * Decimal(str(detalle.precio_unitario)) for detalle in detalles_venta), Decimal('0.00'))
+    iva = subtotal * IVA_RATE
+    titulo = "FACTURA" if usuario is not None else "FACTURA (Cliente No Registrado)"
+    return datos_factura(
+        titulo, venta.fecha_venta, datos_cliente(usuario),
+        "PRODUCTOS/SERVICIOS:", lineas_factura(detalles_venta), subtotal, iva, total
+    )
+
+
+def nombre_archivo_venta(venta):
+    """Nombre de descarga de la factura de una venta."""
+    if venta.id_usuario:
+        return f'factura_{venta.id_usuario}_{venta.id_venta}.pdf'
+    return f'factura_manual_{venta.id_venta}.pdf'
@@ -0,0 +1,225 @@
+# app/services/imagenes.py
+import hashlib
+from io import BytesIO
+import logging
+import os
+import re
+import tempfile
+import threading
+from flask import current_app, url_for
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Variantes por ancho máximo en píxeles; nunca se amplía una imagen más pequeña
+VARIANTES = {'miniatura': 160, 'tarjeta': 480, 'detalle': 1200}
+ANCHOS = sorted(VARIANTES.values())
+FORMATOS = ('webp', 'jpg')
+FORMATOS_ENTRADA = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+CALIDAD = {'webp': 80, 'jpg': 82}
+PATRON_HASH = re.compile(r'^[0-9a-f]{32}$')
+PATRON_VARIANTE = re.compile(r'^(\d+)\.webp$')
+
+# huella -> anchos generados; el contenido de una huella no cambia, así que no caduca
+_anchos_en_disco = {}
+_anchos_lock = threading.Lock()
+
+
+class ImagenInvalida(ValueError):
+    pass
+
+
+def _directorio():
+    directorio = current_app.config.get('IMAGENES_DIR') or os.path.join(current_app.instance_path, 'imagenes')
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _carpeta(huella):
+    return os.path.join(_directorio(), huella[:2], huella)
+
+
+def _escribir(ruta, datos):
+    """Escritura atómica: un lector concurrente nunca ve un archivo a medias."""
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as archivo:
+        archivo.write(datos)
+    os.replace(temporal, ruta)
+
+
+def _abrir(datos):
+    try:
+        imagen = Image.open(BytesIO(datos))
+        imagen.verify()
+        # verify() deja la imagen inutilizable: hay que abrirla de nuevo
+        imagen = Image.open(BytesIO(datos))
+        if imagen.format not in FORMATOS_ENTRADA:
+            raise ImagenInvalida(f"Formato de imagen no soportado: {imagen.format}.")
+        imagen.seek(0)
+        return imagen
+    except ImagenInvalida:
+        raise
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise ImagenInvalida("El archivo no es una imagen válida.") from e
+
+
+def _codificar(imagen, formato):
+    salida = BytesIO()
+    if formato == 'webp':
+        imagen.save(salida, 'WEBP', quality=CALIDAD['webp'], method=4)
+    else:
+        if imagen.mode != 'RGB':
+            # JPEG no tiene transparencia: se aplana sobre blanco
+            fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+            fondo.paste(imagen, mask=imagen.getchannel('A') if 'A' in imagen.getbands() else None)
+            imagen = fondo
+        imagen.save(salida, 'JPEG', quality=CALIDAD['jpg'], optimize=True, progressive=True)
+    return salida.getvalue()
+
+
+def _ancho_visible(imagen):
+    """Ancho tras aplicar la orientación EXIF, sin decodificar la imagen."""
+    # Orientaciones 5 a 8: la imagen está girada 90° y el ancho visible es su alto
+    return imagen.height if imagen.getexif().get(0x0112) in (5, 6, 7, 8) else imagen.width
+
+
+def anchos_para(ancho_original):
+    """Anchos de las variantes de una imagen: los de ANCHOS menores que ella y su propio ancho.
+
+    Una imagen de 300 px queda en 160 y 300, no en 480 ni en 1200: el srcset
+    anuncia el ancho real de cada archivo y el navegador elige bien.
+    """
+    anchos = [ancho for ancho in ANCHOS if ancho < min(ancho_original, ANCHOS[-1])]
+    return anchos + [min(ancho_original, ANCHOS[-1])]
+
+
+def _generar_variantes(huella, imagen):
+    """Escribe las variantes que falten, de la más grande a la más pequeña, y borra las que sobran."""
+    imagen = ImageOps.exif_transpose(imagen)
+    imagen = imagen.convert('RGBA' if 'A' in imagen.getbands() or 'transparency' in imagen.info else 'RGB')
+    carpeta = _carpeta(huella)
+    anchos = anchos_para(imagen.width)
+    for ancho in reversed(anchos):
+        if imagen.width > ancho:
+            # Cada variante sale de la anterior: reducir 1200 px a 480 es más barato que el original
+            imagen = imagen.resize((ancho, max(1, round(imagen.height * ancho / imagen.width))), Image.LANCZOS)
+        for formato in FORMATOS:
+            ruta = os.path.join(carpeta, f'{ancho}.{formato}')
+            if not os.path.exists(ruta):
+                _escribir(ruta, _codificar(imagen, formato))
+    # Variantes de versiones anteriores que ampliaban la imagen
+    for ancho in set(_anchos_generados(huella)) - set(anchos):
+        for formato in FORMATOS:
+            try:
+                os.remove(os.path.join(carpeta, f'{ancho}.{formato}'))
+            except FileNotFoundError:
+                pass
+    with _anchos_lock:
+        _anchos_en_disco[huella] = anchos
+
+
+def _anchos_generados(huella):
+    try:
+        nombres = os.listdir(_carpeta(huella))
+    except FileNotFoundError:
+        return []
+    return sorted(int(coincidencia.group(1)) for coincidencia in map(PATRON_VARIANTE.match, nombres) if coincidencia)
+
+
+def anchos_imagen(huella):
+    """Anchos de las variantes que existen para la imagen, de menor a mayor."""
+    anchos = _anchos_en_disco.get(huella)
+    if anchos is None:
+        anchos = _anchos_generados(huella)
+        if anchos:
+            with _anchos_lock:
+                _anchos_en_disco[huella] = anchos
+    return anchos
+
+
+def guardar_imagen(archivo, max_bytes=None):
+    """Guarda el original de una subida y sus variantes; devuelve el hash de contenido.
+
+    El hash identifica la imagen: subir dos veces el mismo archivo, o usarlo
+    en varios productos, reutiliza los mismos archivos sin procesarlos otra vez.
+    """
+    max_bytes = max_bytes or current_app.config.get('IMAGENES_MAX_MB', 10) * 1024 * 1024
+    datos = archivo.read(max_bytes + 1)
+    if not datos:
+        raise ImagenInvalida("El archivo de imagen está vacío.")
+    if len(datos) > max_bytes:
+        raise ImagenInvalida(f"La imagen supera el máximo de {max_bytes // (1024 * 1024)} MB.")
+    huella = hashlib.sha256(datos).hexdigest()[:32]
+    carpeta = _carpeta(huella)
+    imagen = _abrir(datos)
+    if _original(huella) and all(os.path.exists(os.path.join(carpeta, f'{ancho}.{formato}'))
+                                 for ancho in anchos_para(_ancho_visible(imagen))
+                                 for formato in FORMATOS):
+        return huella
+    if not _original(huella):
+        _escribir(os.path.join(carpeta, f'original.{FORMATOS_ENTRADA[imagen.format]}'), datos)
+    _generar_variantes(huella, imagen)
+    logger.info(f"Imagen {huella} guardada ({imagen.format} {imagen.width}x{imagen.height}, {len(datos)} bytes)")
+    return huella
+
+
+def _original(huella):
+    carpeta = _carpeta(huella)
+    for extension in FORMATOS_ENTRADA.values():
+        ruta = os.path.join(carpeta, f'original.{extension}')
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+
+def regenerar_variantes(huella):
+    """Vuelve a generar las variantes de una imagen desde su original; False si no hay original."""
+    original = _original(huella)
+    if original is None:
+        return False
+    with open(original, 'rb') as archivo:
+        _generar_variantes(huella, _abrir(archivo.read()))
+    return True
+
+
+def ruta_variante(huella, ancho, formato):
+    """Ruta de una variante ya generada, o None.
+
+    Las variantes se generan al subir o importar la imagen, nunca al servirla.
+    """
+    if not PATRON_HASH.match(huella) or formato not in FORMATOS or ancho not in anchos_imagen(huella):
+        return None
+    ruta = os.path.join(_carpeta(huella), f'{ancho}.{formato}')
+    return ruta if os.path.exists(ruta) else None
+
+
+def ancho_variante(huella, variante):
+    """Ancho real de la variante: el mayor generado que no supera el de VARIANTES."""
+    anchos = anchos_imagen(huella)
+    if not anchos:
+        return VARIANTES[variante]
+    return max((ancho for ancho in anchos if ancho <= VARIANTES[variante]), default=anchos[0])
+
+
+def url_imagen(huella, variante='tarjeta', formato='jpg'):
+    return url_for('imagenes.variante', huella=huella, ancho=ancho_variante(huella, variante), formato=formato)
+
+
+def srcset_imagen(huella, formato='jpg'):
+    """Valor del atributo srcset con los anchos que existen de la imagen."""
+    return ', '.join(f"{url_for('imagenes.variante', huella=huella, ancho=ancho, formato=formato)} {ancho}w"
+                     for ancho in anchos_imagen(huella))
+
+
+def urls_imagen(huella):
+    """URLs de todas las variantes para las respuestas JSON, o None si el item no tiene imagen."""
+    if not huella:
+        return None
+    return {variante: {formato: url_imagen(huella, variante, formato) for formato in FORMATOS}
+            for variante in VARIANTES}
+
+
+def init_imagenes(app):
+    """Funciones de plantilla para <picture>/srcset de las imágenes subidas."""
+    app.jinja_env.globals.update(url_imagen=url_imagen, srcset_imagen=srcset_imagen)
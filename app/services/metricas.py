@@ -0,0 +1,73 @@
+# app/services/metricas.py
+from datetime import datetime, timedelta
+import logging
+from sqlalchemy import func, select
+from app import db
+from app.models.users import Usuario
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+from app.models.citas import Cita
+from app.models.inventario_movimientos import InventarioMovimiento
+from app.services.resumen_ventas import ingresos_por_periodo
+from app.services.cache_metricas import obtener_cache, CLAVE_DASHBOARD
+
+logger = logging.getLogger(__name__)
+
+PERIODOS = ('hoy', 'semana', 'mes', 'ano')
+
+
+def inicios_periodo(ahora=None):
+    """Inicio de cada periodo y el límite superior (inicio de mañana) como datetimes."""
+    ahora = ahora or datetime.now()
+    hoy = datetime.combine(ahora.date(), datetime.min.time())
+    inicios = {
+        'hoy': hoy,
+        'semana': hoy - timedelta(days=hoy.weekday()),  # Lunes
+        'mes': hoy.replace(day=1),
+        'ano': hoy.replace(month=1, day=1)
+    }
+    return inicios, hoy + timedelta(days=1)
+
+
+def _contadores(ahora):
+    """Contadores e inventario en un único SELECT de subconsultas escalares."""
+    fila = db.session.execute(select(
+        select(func.count()).select_from(Usuario).scalar_subquery().label('usuarios_count'),
+        select(func.count()).select_from(Producto).scalar_subquery().label('productos_count'),
+        select(func.count()).select_from(Servicio).scalar_subquery().label('servicios_count'),
+        select(func.count()).select_from(Cita).where(Cita.estado == 'pendiente').scalar_subquery().label('citas_pendientes_count'),
+        select(func.coalesce(func.sum(Producto.stock), 0)).scalar_subquery().label('stock_total'),
+        select(func.count()).select_from(Producto).where(Producto.stock <= Producto.stock_minimo).scalar_subquery().label('stock_bajo'),
+        select(func.count()).select_from(InventarioMovimiento).where(
+            InventarioMovimiento.fecha_movimiento >= ahora - timedelta(days=7)
+        ).scalar_subquery().label('movimientos_recientes')
+    )).one()
+    return {clave: int(valor or 0) for clave, valor in fila._mapping.items()}
+
+
+def metricas_dashboard(ahora=None):
+    """Todas las métricas del panel de administrador en dos consultas.
+
+    Devuelve un diccionario serializable a JSON con los contadores y los
+    ingresos por periodo (totales, de productos y de servicios), estos
+    últimos leídos del resumen diario de ventas.
+    """
+    ahora = ahora or datetime.now()
+    inicios, fin = inicios_periodo(ahora)
+    metricas = _contadores(ahora)
+    ingresos_productos = dict.fromkeys(PERIODOS, 0.0)
+    ingresos_servicios = dict.fromkeys(PERIODOS, 0.0)
+    try:
+        ingresos_productos, ingresos_servicios = ingresos_por_periodo(inicios, fin)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error al calcular ingresos del dashboard: {str(e)}")
+    metricas['ingresos_productos'] = ingresos_productos
+    metricas['ingresos_servicios'] = ingresos_servicios
+    metricas['ingresos'] = {periodo: ingresos_productos[periodo] + ingresos_servicios[periodo] for periodo in PERIODOS}
+    return metricas
+
+
+def metricas_dashboard_en_cache():
+    """`metricas_dashboard` detrás de la caché con TTL; se invalida al escribir ventas, citas o inventario."""
+    return obtener_cache().obtener(CLAVE_DASHBOARD, metricas_dashboard)
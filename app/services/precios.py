@@ -0,0 +1,73 @@
+# app/services/precios.py
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+from app import db
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+from app.services.promociones import indice_promociones
+
+CENTAVOS = Decimal('0.01')
+
+
+class PrecioItem(namedtuple('PrecioItem', 'precio_base precio descuento nombre_promocion id_promocion')):
+    """Precio efectivo de un producto o servicio en un instante dado."""
+    __slots__ = ()
+
+    @property
+    def en_promocion(self):
+        return self.id_promocion is not None
+
+
+# Precios por id: una búsqueda en diccionario por item desde las vistas y plantillas
+Precios = namedtuple('Precios', 'productos servicios')
+
+
+def aplicar_descuento(precio_base, descuento):
+    """precio × (1 − descuento/100), redondeado a centavos."""
+    precio = Decimal(str(precio_base))
+    if descuento:
+        precio = precio * (1 - Decimal(str(descuento)) / 100)
+    return precio.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def _precio_item(indice, tipo, id_item, precio_base, momento):
+    promocion = indice.vigente(tipo, id_item, momento)
+    if promocion is None:
+        return PrecioItem(precio_base, aplicar_descuento(precio_base, None), Decimal('0'), None, None)
+    return PrecioItem(
+        precio_base, aplicar_descuento(precio_base, promocion.descuento),
+        Decimal(str(promocion.descuento or 0)), promocion.nombre, promocion.id_promocion
+    )
+
+
+def tabla_precios(productos=None, servicios=None, momento=None):
+    """Precios efectivos a partir de precios base ya cargados.
+
+    `productos` y `servicios` son diccionarios id -> precio base; las
+    promociones salen del índice en memoria, así que el costo es lineal en
+    el número de items y no depende de cuántas promociones haya.
+    """
+    indice = indice_promociones()
+    return Precios(
+        {id_item: _precio_item(indice, 'producto', id_item, precio, momento) for id_item, precio in (productos or {}).items()},
+        {id_item: _precio_item(indice, 'servicio', id_item, precio, momento) for id_item, precio in (servicios or {}).items()},
+    )
+
+
+def precios_efectivos(ids_productos=(), ids_servicios=(), momento=None):
+    """Precios efectivos de varios items por id, con una consulta por tipo para los precios base."""
+    ids_productos = {int(i) for i in ids_productos if i}
+    ids_servicios = {int(i) for i in ids_servicios if i}
+    productos = dict(db.session.query(Producto.id_producto, Producto.precio).filter(
+        Producto.id_producto.in_(ids_productos)
+    )) if ids_productos else {}
+    servicios = dict(db.session.query(Servicio.id_servicio, Servicio.precio).filter(
+        Servicio.id_servicio.in_(ids_servicios)
+    )) if ids_servicios else {}
+    return tabla_precios(productos, servicios, momento)
+
+
+def precio_efectivo(precio_base, id_producto=None, id_servicio=None, momento=None):
+    """Atajo para un solo item cuyo precio base ya se conoce."""
+    tipo, id_item = ('producto', id_producto) if id_producto else ('servicio', id_servicio)
+    return _precio_item(indice_promociones(), tipo, id_item, precio_base, momento)
@@ -0,0 +1,171 @@
+# app/services/promociones.py
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
+from datetime import datetime
+import logging
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.promociones import Promocion
+
+logger = logging.getLogger(__name__)
+
+# Copia inmutable de una promoción: se comparte entre hilos sin depender de la sesión
+PromocionVigente = namedtuple(
+    'PromocionVigente',
+    'id_promocion nombre descripcion descuento fecha_inicio fecha_fin id_producto id_servicio'
+)
+
+
+class _Intervalos:
+    """Promociones de un item ordenadas por inicio, con el máximo acumulado de fecha_fin.
+
+    Para saber qué promoción cubre un instante se busca por bisección la
+    última que empezó antes y solo se retrocede mientras alguna anterior
+    pueda seguir vigente; sin solapamientos la respuesta es O(log n).
+    """
+
+    def __init__(self, promociones):
+        self.promociones = sorted(promociones, key=lambda p: (p.fecha_inicio, p.id_promocion))
+        self.inicios = [p.fecha_inicio for p in self.promociones]
+        self.max_fin = []
+        maximo = None
+        for promocion in self.promociones:
+            maximo = promocion.fecha_fin if maximo is None or promocion.fecha_fin > maximo else maximo
+            self.max_fin.append(maximo)
+
+    def en(self, momento):
+        i = bisect_right(self.inicios, momento) - 1
+        while i >= 0 and self.max_fin[i] >= momento:
+            if self.promociones[i].fecha_fin >= momento:
+                return self.promociones[i]
+            i -= 1
+        return None
+
+
+class IndicePromociones:
+    """Índice en memoria de las promociones no expiradas, por producto y por servicio.
+
+    Se reconstruye con una sola consulta cuando se marca como desactualizado
+    (tras un commit que toca promociones), cuando vence la primera fecha_fin
+    que contiene o cuando pasa `ttl` segundos, para recoger cambios hechos
+    por otros procesos.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items = None
+        self._construido = 0.0
+        self._proxima_expiracion = None
+        self._desactualizado = True
+
+    def invalidar(self):
+        self._desactualizado = True
+
+    def _vigente(self, ahora):
+        return not (
+            self._desactualizado or self._items is None
+            or time.monotonic() - self._construido > self.ttl
+            or (self._proxima_expiracion is not None and ahora > self._proxima_expiracion)
+        )
+
+    def _items_para(self, ahora):
+        if self._vigente(ahora):
+            return self._items
+        with self._lock:
+            if not self._vigente(ahora):
+                self._reconstruir(ahora)
+            return self._items
+
+    def _reconstruir(self, ahora):
+        self._desactualizado = False
+        filas = db.session.query(
+            Promocion.id_promocion, Promocion.nombre, Promocion.descripcion, Promocion.descuento,
+            Promocion.fecha_inicio, Promocion.fecha_fin, Promocion.id_producto, Promocion.id_servicio
+        ).filter(Promocion.fecha_fin >= ahora).all()
+        por_item = defaultdict(list)
+        for fila in filas:
+            promocion = PromocionVigente(*fila)
+            if promocion.id_producto:
+                por_item[('producto', promocion.id_producto)].append(promocion)
+            elif promocion.id_servicio:
+                por_item[('servicio', promocion.id_servicio)].append(promocion)
+        self._items = {clave: _Intervalos(promociones) for clave, promociones in por_item.items()}
+        # Las expiradas se descartan en la siguiente reconstrucción, al vencer la primera
+        self._proxima_expiracion = min((fila.fecha_fin for fila in filas), default=None)
+        self._construido = time.monotonic()
+        logger.debug(f"Índice de promociones reconstruido: {len(filas)} promociones, {len(self._items)} items")
+
+    def vigente(self, tipo, id_item, momento=None):
+        """Promoción activa del item en `momento` (por defecto, ahora) o None."""
+        momento = momento or datetime.utcnow()
+        intervalos = self._items_para(momento).get((tipo, int(id_item))) if id_item else None
+        return intervalos.en(momento) if intervalos else None
+
+    def vigentes(self, momento=None):
+        """Todas las promociones activas en `momento`, una por item."""
+        momento = momento or datetime.utcnow()
+        activas = (intervalos.en(momento) for intervalos in self._items_para(momento).values())
+        return [promocion for promocion in activas if promocion is not None]
+
+    def ids_con_promocion(self, tipo, momento=None):
+        campo = 'id_producto' if tipo == 'producto' else 'id_servicio'
+        return {getattr(promocion, campo) for promocion in self.vigentes(momento) if getattr(promocion, campo)}
+
+
+def init_indice_promociones(app):
+    app.extensions['indice_promociones'] = IndicePromociones(ttl=app.config.get('PROMOCIONES_INDICE_TTL', 60))
+    _registrar_eventos()
+
+
+def indice_promociones():
+    return current_app.extensions['indice_promociones']
+
+
+def promocion_vigente(id_producto=None, id_servicio=None, momento=None):
+    """Atajo para la promoción activa de un producto o un servicio."""
+    if id_producto:
+        return indice_promociones().vigente('producto', id_producto, momento)
+    if id_servicio:
+        return indice_promociones().vigente('servicio', id_servicio, momento)
+    return None
+
+
+def promociones_vigentes(momento=None):
+    return indice_promociones().vigentes(momento)
+
+
+_eventos_registrados = False
+
+
+def _registrar_eventos():
+    global _eventos_registrados
+    if _eventos_registrados:
+        return
+    _eventos_registrados = True
+
+    @event.listens_for(Session, 'after_flush')
+    def _marcar_escritura(session, flush_context):
+        objetos = list(session.new) + list(session.dirty) + list(session.deleted)
+        if any(isinstance(objeto, Promocion) for objeto in objetos):
+            session.info['promociones_modificadas'] = True
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def _marcar_escritura_masiva(orm_execute_state):
+        if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+            tabla = getattr(orm_execute_state.statement, 'table', None)
+            if tabla is not None and tabla.name == Promocion.__tablename__:
+                orm_execute_state.session.info['promociones_modificadas'] = True
+
+    @event.listens_for(Session, 'after_commit')
+    def _invalidar(session):
+        if session.info.pop('promociones_modificadas', False) and has_app_context() and 'indice_promociones' in current_app.extensions:
+            indice_promociones().invalidar()
+
+    @event.listens_for(Session, 'after_rollback')
+    def _descartar(session):
+        session.info.pop('promociones_modificadas', None)
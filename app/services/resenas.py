@@ -0,0 +1,116 @@
+# app/services/resenas.py
+import base64
+from collections import namedtuple
+from datetime import datetime
+import json
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models.productos import Producto
+from app.models.reseñas import Reseña
+from app.models.servicios import Servicio
+from app.services.catalogo import CursorInvalido
+
+ESTRELLAS = range(1, 6)
+POR_PAGINA = 10
+
+# tipo -> (modelo, columna id del item, columna de la reseña que lo referencia)
+MODELOS = {
+    'producto': (Producto, Producto.id_producto, Reseña.id_producto),
+    'servicio': (Servicio, Servicio.id_servicio, Reseña.id_servicio),
+}
+
+
+class Calificacion(namedtuple('Calificacion', 'cantidad suma histograma')):
+    """Resumen de las reseñas de un item; `histograma` tiene la cantidad de 1 a 5 estrellas."""
+    __slots__ = ()
+
+    @property
+    def promedio(self):
+        return round(self.suma / self.cantidad, 1) if self.cantidad else None
+
+    def porcentaje(self, estrellas):
+        return round(100 * self.histograma[estrellas - 1] / self.cantidad) if self.cantidad else 0
+
+
+def calificacion_item(item):
+    """Calificación de un producto o servicio con las columnas que ya trae la fila: sin consultas."""
+    return Calificacion(
+        item.resenas_cantidad or 0, item.resenas_suma or 0,
+        tuple(getattr(item, f'resenas_{estrellas}') or 0 for estrellas in ESTRELLAS)
+    )
+
+
+def registrar_resena(resena):
+    """Suma la reseña al resumen de su item con un único UPDATE atómico.
+
+    No hace commit: se ejecuta en la misma transacción que inserta la reseña,
+    y como el incremento lo hace la base (col = col + 1) dos reseñas
+    simultáneas del mismo item no se pisan.
+    """
+    tipo = 'producto' if resena.id_producto else 'servicio'
+    modelo, columna_id, _ = MODELOS[tipo]
+    id_item = resena.id_producto or resena.id_servicio
+    estrellas = f'resenas_{int(resena.calificacion)}'
+    db.session.execute(
+        update(modelo).where(columna_id == id_item).values(
+            resenas_cantidad=modelo.resenas_cantidad + 1,
+            resenas_suma=modelo.resenas_suma + int(resena.calificacion),
+            **{estrellas: getattr(modelo, estrellas) + 1}
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def reconstruir_resumen_resenas():
+    """Recalcula el resumen de todos los productos y servicios a partir de las reseñas y hace commit.
+
+    Devuelve el número de items actualizados por tipo.
+    """
+    actualizados = {}
+    for tipo, (modelo, columna_id, columna_resena) in MODELOS.items():
+        def agregado(expresion, *condiciones):
+            return select(func.coalesce(expresion, 0)).where(columna_resena == columna_id, *condiciones).scalar_subquery()
+
+        valores = {
+            'resenas_cantidad': agregado(func.count(Reseña.id_resena)),
+            'resenas_suma': agregado(func.sum(Reseña.calificacion)),
+            **{f'resenas_{estrellas}': agregado(func.count(Reseña.id_resena), Reseña.calificacion == estrellas)
+               for estrellas in ESTRELLAS},
+        }
+        resultado = db.session.execute(update(modelo).values(**valores).execution_options(synchronize_session=False))
+        actualizados[tipo] = resultado.rowcount
+    db.session.commit()
+    return actualizados
+
+
+def _codificar_cursor(fecha, id_resena):
+    datos = json.dumps([fecha.isoformat(), id_resena], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    try:
+        fecha, id_resena = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(fecha), int(id_resena)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(f"Cursor de paginación inválido: {cursor}") from e
+
+
+def pagina_resenas(tipo, id_item, cursor=None, limite=POR_PAGINA):
+    """Reseñas de un item de la más reciente a la más antigua, por keyset: (reseñas, cursor siguiente o None)."""
+    _, _, columna_resena = MODELOS[tipo]
+    consulta = Reseña.query.options(joinedload(Reseña.usuario)).filter(columna_resena == id_item)
+    if cursor:
+        fecha, id_resena = _decodificar_cursor(cursor)
+        consulta = consulta.filter(tuple_(Reseña.fecha_resena, Reseña.id_resena) < tuple_(fecha, id_resena))
+    resenas = consulta.order_by(Reseña.fecha_resena.desc(), Reseña.id_resena.desc()).limit(limite + 1).all()
+    siguiente = None
+    if len(resenas) > limite:
+        resenas = resenas[:limite]
+        siguiente = _codificar_cursor(resenas[-1].fecha_resena, resenas[-1].id_resena)
+    return resenas, siguiente
+
+
+def init_resenas(app):
+    """Función de plantilla para mostrar la calificación de un item en los listados."""
+    app.jinja_env.globals.update(calificacion_item=calificacion_item)
@@ -0,0 +1,192 @@
+# app/services/resumen_ventas.py
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import logging
+from sqlalchemy import case, func, insert, Date
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.ventas import Venta
+from app.models.detalle_ventas import DetalleVenta
+from app.models.resumen_ventas_diario import ResumenVentaDiario
+
+logger = logging.getLogger(__name__)
+
+
+def _insert_con_upsert():
+    """INSERT del dialecto activo; ambos soportan ON CONFLICT DO UPDATE."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(ResumenVentaDiario)
+    return sqlite.insert(ResumenVentaDiario)
+
+
+def _agrupar(detalles, signo=1):
+    """Suma cantidad e ingresos por (tipo, id_item) a partir de DetalleVenta o diccionarios equivalentes."""
+    grupos = defaultdict(lambda: [0, Decimal('0.00')])
+    for detalle in detalles:
+        leer = detalle.get if isinstance(detalle, dict) else lambda campo: getattr(detalle, campo)
+        if leer('id_producto'):
+            clave = ('producto', int(leer('id_producto')))
+        elif leer('id_servicio'):
+            clave = ('servicio', int(leer('id_servicio')))
+        else:
+            continue
+        cantidad = int(leer('cantidad'))
+        grupos[clave][0] += signo * cantidad
+        grupos[clave][1] += signo * Decimal(str(cantidad)) * Decimal(str(leer('precio_unitario')))
+    return grupos
+
+
+def registrar_en_resumen(fecha_venta, detalles, signo=1):
+    """Acumula los detalles de una venta en el resumen diario.
+
+    No hace commit: se ejecuta en la misma transacción que crea (o borra) la
+    venta para que el resumen nunca quede desfasado.
+    """
+    grupos = _agrupar(detalles, signo)
+    if not grupos:
+        return
+    stmt = _insert_con_upsert()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['fecha', 'tipo', 'id_item'],
+        set_={
+            'cantidad': ResumenVentaDiario.cantidad + stmt.excluded.cantidad,
+            'ingresos': ResumenVentaDiario.ingresos + stmt.excluded.ingresos
+        }
+    )
+    db.session.execute(stmt, [
+        {'fecha': fecha_venta.date(), 'tipo': tipo, 'id_item': id_item, 'cantidad': cantidad, 'ingresos': ingresos}
+        for (tipo, id_item), (cantidad, ingresos) in grupos.items()
+    ])
+
+
+def descontar_del_resumen(venta, detalles):
+    """Revierte en el resumen una venta que se va a borrar."""
+    registrar_en_resumen(venta.fecha_venta, detalles, signo=-1)
+
+
+def reconstruir_resumen(desde=None, hasta=None):
+    """Recalcula el resumen a partir de las ventas en [desde, hasta); devuelve las filas insertadas."""
+    fecha = func.date(Venta.fecha_venta, type_=Date)
+    filtros = []
+    borrar = ResumenVentaDiario.query
+    if desde:
+        filtros.append(Venta.fecha_venta >= desde)
+        borrar = borrar.filter(ResumenVentaDiario.fecha >= desde.date())
+    if hasta:
+        filtros.append(Venta.fecha_venta < hasta)
+        borrar = borrar.filter(ResumenVentaDiario.fecha < hasta.date())
+    borrar.delete(synchronize_session=False)
+
+    tipo = case((DetalleVenta.id_producto.isnot(None), 'producto'), else_='servicio')
+    id_item = func.coalesce(DetalleVenta.id_producto, DetalleVenta.id_servicio)
+    origen = db.session.query(
+        fecha, tipo, id_item,
+        func.sum(DetalleVenta.cantidad),
+        func.sum(DetalleVenta.cantidad * DetalleVenta.precio_unitario)
+    ).join(Venta, Venta.id_venta == DetalleVenta.id_venta).filter(
+        id_item.isnot(None), *filtros
+    ).group_by(fecha, tipo, id_item)
+
+    resultado = db.session.execute(
+        insert(ResumenVentaDiario).from_select(
+            ['fecha', 'tipo', 'id_item', 'cantidad', 'ingresos'], origen.statement
+        )
+    )
+    db.session.commit()
+    return resultado.rowcount
+
+
+def ingresos_por_periodo(inicios, fin):
+    """Ingresos de productos y servicios por periodo leyendo solo el resumen.
+
+    `inicios` mapea cada periodo a su datetime de inicio; `fin` es el límite
+    superior exclusivo. Devuelve ({periodo: float}, {periodo: float}).
+    """
+    desde = min(inicios.values()).date()
+    columnas = [
+        func.coalesce(func.sum(case((ResumenVentaDiario.fecha >= inicio.date(), ResumenVentaDiario.ingresos), else_=0)), 0).label(periodo)
+        for periodo, inicio in inicios.items()
+    ]
+    filas = db.session.query(ResumenVentaDiario.tipo, *columnas).filter(
+        ResumenVentaDiario.fecha >= desde,
+        ResumenVentaDiario.fecha < fin.date()
+    ).group_by(ResumenVentaDiario.tipo).all()
+    resultado = {tipo: dict.fromkeys(inicios, 0.0) for tipo in ('producto', 'servicio')}
+    for fila in filas:
+        resultado[fila.tipo] = {periodo: float(getattr(fila, periodo)) for periodo in inicios}
+    return resultado['producto'], resultado['servicio']
+
+
+GRANULARIDADES = ('dia', 'semana', 'mes')
+
+
+def inicio_periodo(fecha, granularidad):
+    """Primer día del periodo (día, semana que empieza en lunes o mes) que contiene `fecha`."""
+    if granularidad == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if granularidad == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def _siguiente_periodo(inicio, granularidad):
+    if granularidad == 'semana':
+        return inicio + timedelta(days=7)
+    if granularidad == 'mes':
+        return (inicio + timedelta(days=32)).replace(day=1)
+    return inicio + timedelta(days=1)
+
+
+def _truncar_fecha(granularidad):
+    """Expresión SQL que lleva `fecha` al inicio de su periodo: date_trunc en PostgreSQL, date() en SQLite."""
+    columna = ResumenVentaDiario.fecha
+    if granularidad == 'dia':
+        return columna
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.date_trunc('week' if granularidad == 'semana' else 'month', columna)
+    if granularidad == 'semana':
+        return func.date(columna, 'weekday 0', '-6 days')
+    return func.date(columna, 'start of month')
+
+
+def _como_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    return valor
+
+
+def serie_ingresos(desde, hasta, granularidad='dia'):
+    """Serie continua de ingresos entre las fechas `desde` y `hasta` (inclusive).
+
+    Una sola consulta agrupada sobre el resumen diario; los periodos sin
+    ventas se rellenan con cero. Devuelve un diccionario con las etiquetas de
+    periodo y los importes de productos, servicios y total.
+    """
+    periodo = _truncar_fecha(granularidad).label('periodo')
+    filas = db.session.query(
+        periodo, ResumenVentaDiario.tipo, func.sum(ResumenVentaDiario.ingresos)
+    ).filter(
+        ResumenVentaDiario.fecha >= desde,
+        ResumenVentaDiario.fecha < hasta + timedelta(days=1)
+    ).group_by(periodo, ResumenVentaDiario.tipo).all()
+
+    importes = {(_como_fecha(inicio), tipo): float(total or 0) for inicio, tipo, total in filas}
+    periodos = []
+    inicio = inicio_periodo(desde, granularidad)
+    while inicio <= hasta:
+        periodos.append(inicio)
+        inicio = _siguiente_periodo(inicio, granularidad)
+    productos = [importes.get((inicio, 'producto'), 0.0) for inicio in periodos]
+    servicios = [importes.get((inicio, 'servicio'), 0.0) for inicio in periodos]
+    return {
+        'granularidad': granularidad,
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'periodos': [inicio.isoformat() for inicio in periodos],
+        'productos': productos,
+        'servicios': servicios,
+        'total': [round(p + s, 2) for p, s in zip(productos, servicios)]
+    }
@@ -0,0 +1,70 @@
+// static/js/busqueda.js
+// Búsqueda del catálogo en la barra de navegación: consulta /client/buscar mientras se escribe
+document.addEventListener('DOMContentLoaded', () => {
+    const contenedor = document.getElementById('busquedaCatalogo');
+    if (!contenedor) {
+        return;
+    }
+    const campo = contenedor.querySelector('input');
+    const menu = contenedor.querySelector('.dropdown-menu');
+    let temporizador = null;
+    let controlador = null;
+
+    function mostrar(resultados) {
+        menu.innerHTML = '';
+        if (!resultados.length) {
+            menu.innerHTML = '<span class="dropdown-item-text text-muted">Sin resultados</span>';
+        }
+        resultados.forEach(resultado => {
+            const enlace = document.createElement('a');
+            enlace.className = 'dropdown-item d-flex justify-content-between';
+            enlace.href = resultado.url;
+            const nombre = document.createElement('span');
+            nombre.textContent = resultado.nombre;
+            const detalle = document.createElement('small');
+            detalle.className = 'text-muted ms-2';
+            detalle.textContent = `${resultado.tipo === 'producto' ? 'Producto' : 'Servicio'}${resultado.precio ? ' · $' + resultado.precio : ''}`;
+            enlace.append(nombre, detalle);
+            menu.appendChild(enlace);
+        });
+        menu.classList.add('show');
+    }
+
+    async function buscar(consulta) {
+        // Solo cuenta la respuesta de la última consulta
+        if (controlador) {
+            controlador.abort();
+        }
+        controlador = new AbortController();
+        try {
+            const response = await fetch(`${contenedor.dataset.url}?q=${encodeURIComponent(consulta)}`, {
+                signal: controlador.signal,
+                headers: { 'Accept': 'application/json' }
+            });
+            const data = await response.json();
+            if (data.success) {
+                mostrar(data.resultados);
+            }
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Error en la búsqueda:', error);
+            }
+        }
+    }
+
+    campo.addEventListener('input', () => {
+        clearTimeout(temporizador);
+        const consulta = campo.value.trim();
+        if (consulta.length < 2) {
+            menu.classList.remove('show');
+            return;
+        }
+        temporizador = setTimeout(() => buscar(consulta), 150);
+    });
+
+    document.addEventListener('click', event => {
+        if (!contenedor.contains(event.target)) {
+            menu.classList.remove('show');
+        }
+    });
+});
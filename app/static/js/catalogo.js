@@ -0,0 +1,54 @@
+// static/js/catalogo.js
+// Scroll infinito del catálogo: pide la siguiente página por cursor (keyset) al llegar al final
+(function () {
+    const grid = document.querySelector('[data-catalogo-api]');
+    const boton = document.getElementById('cargar-mas');
+    if (!grid || !boton) {
+        return;
+    }
+    let siguiente = grid.dataset.siguiente;
+    let cargando = false;
+
+    async function cargarMas() {
+        if (!siguiente || cargando) {
+            return;
+        }
+        cargando = true;
+        boton.disabled = true;
+        // Mismos filtros y orden que la página actual, más el cursor
+        const params = new URLSearchParams(window.location.search);
+        params.set('cursor', siguiente);
+        try {
+            const response = await fetch(`${grid.dataset.catalogoApi}?${params.toString()}`, {
+                headers: { 'Accept': 'application/json' }
+            });
+            const data = await response.json();
+            if (!data.success) {
+                throw new Error(data.message);
+            }
+            const plantilla = document.createElement('template');
+            plantilla.innerHTML = data.html;
+            const tarjetas = Array.from(plantilla.content.children);
+            grid.append(plantilla.content);
+            // Un cursor que no avanza terminaría en un bucle de peticiones
+            siguiente = data.siguiente !== siguiente ? data.siguiente : null;
+            document.dispatchEvent(new CustomEvent('catalogo:pagina', { detail: tarjetas }));
+        } catch (error) {
+            console.error('Error al cargar más resultados:', error);
+        } finally {
+            cargando = false;
+            boton.disabled = false;
+            boton.hidden = !siguiente;
+        }
+    }
+
+    boton.addEventListener('click', cargarMas);
+    if ('IntersectionObserver' in window) {
+        const observador = new IntersectionObserver(entradas => {
+            if (entradas.some(entrada => entrada.isIntersecting)) {
+                cargarMas();
+            }
+        }, { rootMargin: '400px' });
+        observador.observe(boton);
+    }
+})();
@@ -0,0 +1,26 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const contenedor = document.getElementById('trabajoFactura');
+    if (!contenedor) return;
+
+    const estadoUrl = contenedor.dataset.estadoUrl;
+    const intervalo = 1500;
+    let intentos = 0;
+
+    // Consultar el estado del trabajo hasta que la factura esté lista
+    const consultar = () => {
+        fetch(estadoUrl, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(response => response.json())
+            .then(data => {
+                if (data.estado === 'completado') {
+                    window.location.href = data.descarga_url;
+                } else if (data.estado === 'error' || !data.success) {
+                    alert(data.message || 'No se pudo generar la factura.');
+                } else if (++intentos < 80) {
+                    setTimeout(consultar, intervalo);
+                }
+            })
+            .catch(error => console.error('Error al consultar la factura:', error));
+    };
+
+    consultar();
+});
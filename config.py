@@ -13,6 +13,25 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     APP_PORT: int = 8001
+    FACTURAS_WORKERS: int = 2
+    FACTURAS_CACHE_DIR: str = ""
+    FACTURAS_CACHE_MAX_MB: int = 256
+    METRICAS_CACHE_TTL: int = 60
+    METRICAS_CACHE_URL: str = ""
+    METRICAS_CACHE_CANDADO_TTL: int = 60
+    ALERTAS_INVENTARIO_COOLDOWN_MIN: int = 360
+    PROMOCIONES_INDICE_TTL: int = 60
+    PROMOCIONES_PROGRAMADOR: bool = True
+    PROMOCIONES_PROGRAMADOR_ESPERA_MAX: int = 300
+    BUSQUEDA_MOTOR: str = "auto"
+    BUSQUEDA_INDICE_TTL: int = 600
+    HTTP_CACHE_MAX_AGE_PUBLICO: int = 60
+    IMAGENES_DIR: str = ""
+    IMAGENES_MAX_MB: int = 10
+    ESTATICOS_DIR: str = ""
+    ESTATICOS_COMPILADOS: bool = True
+    COMPRESION: bool = True
+    COMPRESION_MINIMO_BYTES: int = 1024
 
     class Config:
         env_file = ".env"
@@ -29,5 +48,37 @@ settings = Settings()
 class Config:
     SQLALCHEMY_DATABASE_URI = settings.constructed_database_url
     SECRET_KEY = settings.SECRET_KEY
+    # Procesos dedicados a renderizar facturas en segundo plano
+    FACTURAS_WORKERS = settings.FACTURAS_WORKERS
+    # Caché en disco de facturas ya renderizadas (vacío = directorio temporal del sistema)
+    FACTURAS_CACHE_DIR = settings.FACTURAS_CACHE_DIR
+    FACTURAS_CACHE_MAX_MB = settings.FACTURAS_CACHE_MAX_MB
+    # Caché de métricas del dashboard (URL de Redis opcional para compartirla entre procesos)
+    METRICAS_CACHE_TTL = settings.METRICAS_CACHE_TTL
+    METRICAS_CACHE_URL = settings.METRICAS_CACHE_URL
+    # Vida máxima del candado de recálculo: debe superar el cálculo más lento del dashboard
+    METRICAS_CACHE_CANDADO_TTL = settings.METRICAS_CACHE_CANDADO_TTL
+    # Tiempo mínimo entre dos avisos de la misma alerta de inventario
+    ALERTAS_INVENTARIO_COOLDOWN_MIN = settings.ALERTAS_INVENTARIO_COOLDOWN_MIN
+    # Segundos máximos que el índice de promociones de cada proceso puede ir sin releer la tabla
+    PROMOCIONES_INDICE_TTL = settings.PROMOCIONES_INDICE_TTL
+    # Hilo que cambia el estado de promociones e items al empezar y terminar cada promoción
+    PROMOCIONES_PROGRAMADOR = settings.PROMOCIONES_PROGRAMADOR
+    PROMOCIONES_PROGRAMADOR_ESPERA_MAX = settings.PROMOCIONES_PROGRAMADOR_ESPERA_MAX
+    # Búsqueda del catálogo: 'postgres' (tsvector + trigramas), 'memoria' (índice invertido) o 'auto'
+    BUSQUEDA_MOTOR = settings.BUSQUEDA_MOTOR
+    BUSQUEDA_INDICE_TTL = settings.BUSQUEDA_INDICE_TTL
+    # Segundos que navegadores y proxies pueden servir una página pública sin revalidar su ETag
+    HTTP_CACHE_MAX_AGE_PUBLICO = settings.HTTP_CACHE_MAX_AGE_PUBLICO
+    # Imágenes subidas de productos y servicios y sus variantes (vacío = instance/imagenes)
+    IMAGENES_DIR = settings.IMAGENES_DIR
+    IMAGENES_MAX_MB = settings.IMAGENES_MAX_MB
+    # Recursos compilados con `flask estaticos construir` (vacío = static/dist); sin manifiesto,
+    # o con ESTATICOS_COMPILADOS desactivado para desarrollar, se sirven los originales de static/
+    ESTATICOS_DIR = settings.ESTATICOS_DIR
+    ESTATICOS_COMPILADOS = settings.ESTATICOS_COMPILADOS
+    # Compresión gzip/brotli de HTML, JSON y exportaciones; por debajo del mínimo no compensa
+    COMPRESION = settings.COMPRESION
+    COMPRESION_MINIMO_BYTES = settings.COMPRESION_MINIMO_BYTES
     # Agrega más configuraciones si las necesitas, por ejemplo:
     # WTF_CSRF_ENABLED = True
@@ -0,0 +1,46 @@
+"""trabajos de factura
+
+Revision ID: 1c7e4a9b2d05
+Revises:
+Create Date: 2026-10-18 08:30:00.000000
+
+Cola de facturas en PDF que se renderizan fuera de la petición
+(app/services/cola_facturas.py). Si db.create_all() ya creó la tabla no se
+toca: las revisiones funcionan antes o después de arrancar run.py.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c7e4a9b2d05'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('trabajos_factura'):
+        return
+    op.create_table('trabajos_factura',
+        sa.Column('id_trabajo', sa.Integer(), nullable=False),
+        sa.Column('id_venta', sa.Integer(), nullable=True),
+        sa.Column('id_usuario', sa.Integer(), nullable=True),
+        sa.Column('estado', sa.Enum('pendiente', 'procesando', 'completado', 'error', name='estado_trabajo_enum'), nullable=True),
+        sa.Column('datos', sa.JSON(), nullable=False),
+        sa.Column('nombre_archivo', sa.String(length=255), nullable=False),
+        sa.Column('pdf', sa.LargeBinary(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+        sa.Column('fecha_inicio', sa.DateTime(), nullable=True),
+        sa.Column('fecha_fin', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['id_usuario'], ['usuarios.id_usuario']),
+        sa.ForeignKeyConstraint(['id_venta'], ['ventas.id_venta']),
+        sa.PrimaryKeyConstraint('id_trabajo')
+    )
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('trabajos_factura'):
+        op.drop_table('trabajos_factura')
+        sa.Enum(name='estado_trabajo_enum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,41 @@
+"""resumen diario de ventas
+
+Revision ID: 2a8f5c3e9b16
+Revises: 1c7e4a9b2d05
+Create Date: 2026-10-18 08:40:00.000000
+
+Agregados por día e item que alimentan los reportes del panel
+(app/services/resumen_ventas.py). La tabla nace vacía: las ventas previas
+se cargan con `flask admin reconstruir-resumen`. Si db.create_all() ya la
+creó no se toca.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a8f5c3e9b16'
+down_revision = '1c7e4a9b2d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('resumen_ventas_diario'):
+        return
+    op.create_table('resumen_ventas_diario',
+        sa.Column('id_resumen', sa.Integer(), nullable=False),
+        sa.Column('fecha', sa.Date(), nullable=False),
+        sa.Column('tipo', sa.Enum('producto', 'servicio', name='tipo_resumen_enum'), nullable=False),
+        sa.Column('id_item', sa.Integer(), nullable=False),
+        sa.Column('cantidad', sa.Integer(), nullable=False),
+        sa.Column('ingresos', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('id_resumen'),
+        sa.UniqueConstraint('fecha', 'tipo', 'id_item', name='uq_resumen_ventas_diario')
+    )
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('resumen_ventas_diario'):
+        op.drop_table('resumen_ventas_diario')
+        sa.Enum(name='tipo_resumen_enum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,39 @@
+"""estado de las alertas de inventario
+
+Revision ID: 2d4b8e1f6a37
+Revises: 2a8f5c3e9b16
+Create Date: 2026-10-18 08:50:00.000000
+
+Una fila por alerta (app/services/alertas_inventario.py) para notificar solo
+los cambios de estado. Si db.create_all() ya creó la tabla no se toca.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d4b8e1f6a37'
+down_revision = '2a8f5c3e9b16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('alertas_inventario'):
+        return
+    op.create_table('alertas_inventario',
+        sa.Column('id_alerta', sa.Integer(), nullable=False),
+        sa.Column('clave', sa.String(length=50), nullable=False),
+        sa.Column('activa', sa.Boolean(), nullable=False),
+        sa.Column('valor', sa.Integer(), nullable=False),
+        sa.Column('valor_notificado', sa.Integer(), nullable=True),
+        sa.Column('fecha_cambio', sa.DateTime(), nullable=True),
+        sa.Column('fecha_notificacion', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id_alerta'),
+        sa.UniqueConstraint('clave')
+    )
+
+
+def downgrade():
+    if sa.inspect(op.get_bind()).has_table('alertas_inventario'):
+        op.drop_table('alertas_inventario')
@@ -0,0 +1,70 @@
+"""indices para las consultas frecuentes
+
+Revision ID: 3f9a1c2d7b40
+Revises: 2d4b8e1f6a37
+Create Date: 2026-10-18 10:30:00.000000
+
+Solo agrega índices: las tablas del esquema original ya existen y las
+nuevas (trabajos_factura y los resúmenes) las crean las revisiones
+anteriores. Los índices que db.create_all() ya creó se saltan, y en
+PostgreSQL se crean con CONCURRENTLY para no bloquear escrituras mientras
+se construyen.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b40'
+down_revision = '2d4b8e1f6a37'
+branch_labels = None
+depends_on = None
+
+
+# (nombre, tabla, columnas, condición del índice parcial en PostgreSQL)
+INDICES = [
+    ('ix_citas_empleado_estado_fecha', 'citas', ['id_empleado', 'estado', 'fecha_hora'], None),
+    ('ix_citas_usuario_fecha', 'citas', ['id_usuario', 'fecha_hora'], None),
+    ('ix_citas_pendientes_sin_asignar', 'citas', ['fecha_hora'], "estado = 'pendiente' AND id_empleado IS NULL"),
+    ('ix_notificaciones_usuario_fecha', 'notificaciones', ['id_usuario', 'fecha_envio'], None),
+    ('ix_notificaciones_no_leidas', 'notificaciones', ['id_usuario'], 'leida = false'),
+    ('ix_carrito_usuario_activo', 'carrito', ['id_usuario'], "estado = 'activo'"),
+    ('ix_detalle_carrito_carrito', 'detalle_carrito', ['id_carrito'], None),
+    ('ix_promociones_producto_vigencia', 'promociones', ['id_producto', 'fecha_fin', 'fecha_inicio'], None),
+    ('ix_promociones_servicio_vigencia', 'promociones', ['id_servicio', 'fecha_fin', 'fecha_inicio'], None),
+    ('ix_promociones_vigencia', 'promociones', ['fecha_fin', 'fecha_inicio'], None),
+    ('ix_inventario_movimientos_tipo_fecha', 'inventario_movimientos', ['tipo_movimiento', 'fecha_movimiento'], None),
+    ('ix_inventario_movimientos_fecha', 'inventario_movimientos', ['fecha_movimiento'], None),
+    ('ix_inventario_movimientos_motivo', 'inventario_movimientos', ['motivo'], None),
+    ('ix_guardados_usuario_producto', 'guardados', ['id_usuario', 'id_producto'], None),
+    ('ix_guardados_usuario_servicio', 'guardados', ['id_usuario', 'id_servicio'], None),
+    ('ix_resenas_producto_fecha', 'reseñas', ['id_producto', 'fecha_resena'], None),
+    ('ix_resenas_servicio_fecha', 'reseñas', ['id_servicio', 'fecha_resena'], None),
+    ('ix_resenas_usuario', 'reseñas', ['id_usuario'], None),
+    ('ix_ventas_fecha', 'ventas', ['fecha_venta'], None),
+    ('ix_ventas_usuario_fecha', 'ventas', ['id_usuario', 'fecha_venta'], None),
+    ('ix_detalle_ventas_venta', 'detalle_ventas', ['id_venta'], None),
+    ('ix_pagos_venta', 'pagos', ['id_venta'], None),
+    ('ix_trabajos_factura_venta', 'trabajos_factura', ['id_venta'], None),
+]
+
+
+def upgrade():
+    es_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas, condicion in INDICES:
+            opciones = {}
+            if condicion:
+                opciones['postgresql_where'] = sa.text(condicion)
+                opciones['sqlite_where'] = sa.text(condicion.replace('= false', '= 0'))
+            if es_postgres:
+                opciones['postgresql_concurrently'] = True
+            op.create_index(nombre, tabla, columnas, if_not_exists=True, **opciones)
+
+
+def downgrade():
+    es_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _, _ in reversed(INDICES):
+            opciones = {'postgresql_concurrently': True} if es_postgres else {}
+            op.drop_index(nombre, table_name=tabla, if_exists=True, **opciones)
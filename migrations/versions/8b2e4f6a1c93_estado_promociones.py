@@ -0,0 +1,56 @@
+"""estado de promociones
+
+Revision ID: 8b2e4f6a1c93
+Revises: 3f9a1c2d7b40
+Create Date: 2026-10-18 16:00:00.000000
+
+Agrega promociones.estado, lo rellena según las fechas actuales y crea los
+índices por estado de promociones, productos y servicios. Los estados de
+productos y servicios los ajusta el programador al arrancar la aplicación
+(o `flask admin sincronizar-promociones`). Si db.create_all() ya creó la
+columna solo se rellena.
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4f6a1c93'
+down_revision = '3f9a1c2d7b40'
+branch_labels = None
+depends_on = None
+
+
+estado_promocion_enum = sa.Enum('futura', 'activa', 'expirada', name='estado_promocion_enum')
+
+INDICES = [
+    ('ix_promociones_estado_inicio', 'promociones', ['estado', 'fecha_inicio']),
+    ('ix_promociones_estado_fin', 'promociones', ['estado', 'fecha_fin']),
+    ('ix_productos_estado', 'productos', ['estado']),
+    ('ix_servicios_estado', 'servicios', ['estado']),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    estado_promocion_enum.create(bind, checkfirst=True)
+    if 'estado' not in {columna['name'] for columna in sa.inspect(bind).get_columns('promociones')}:
+        op.add_column('promociones', sa.Column('estado', estado_promocion_enum, nullable=False, server_default='futura'))
+    op.execute(
+        sa.text(
+            "UPDATE promociones SET estado = CASE"
+            " WHEN fecha_inicio > :ahora THEN 'futura'"
+            " WHEN fecha_fin >= :ahora THEN 'activa'"
+            " ELSE 'expirada' END"
+        ).bindparams(ahora=datetime.utcnow())
+    )
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas, if_not_exists=True)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
+    op.drop_column('promociones', 'estado')
+    estado_promocion_enum.drop(op.get_bind(), checkfirst=True)
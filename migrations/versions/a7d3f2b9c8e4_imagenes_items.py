@@ -0,0 +1,31 @@
+"""imagenes subidas de productos y servicios
+
+Revision ID: a7d3f2b9c8e4
+Revises: f1a4d8c3e5b2
+Create Date: 2026-10-18 21:00:00.000000
+
+Hash de contenido de la imagen subida de cada producto y servicio; las
+variantes redimensionadas se guardan en disco bajo ese hash.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3f2b9c8e4'
+down_revision = 'f1a4d8c3e5b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for tabla in ('productos', 'servicios'):
+        # db.create_all() pudo haberla creado ya con la tabla
+        if 'imagen_hash' not in {columna['name'] for columna in inspector.get_columns(tabla)}:
+            op.add_column(tabla, sa.Column('imagen_hash', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    op.drop_column('servicios', 'imagen_hash')
+    op.drop_column('productos', 'imagen_hash')
@@ -0,0 +1,49 @@
+"""sincronizacion delta del catalogo
+
+Revision ID: b9e2c6a4d1f3
+Revises: a7d3f2b9c8e4
+Create Date: 2026-10-18 22:00:00.000000
+
+Versión 'catalogo' del último cambio de cada categoría, producto, servicio
+y promoción, y tabla de bajas, para que /api/v1 devuelva solo lo cambiado
+desde la versión que ya tiene el cliente. Las filas existentes quedan en la
+versión 0: solo las trae una sincronización completa.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e2c6a4d1f3'
+down_revision = 'a7d3f2b9c8e4'
+branch_labels = None
+depends_on = None
+
+TABLAS = ('categorias', 'productos', 'servicios', 'promociones')
+
+
+def upgrade():
+    # Tolera que db.create_all() (run.py) haya creado ya columnas, tabla o índices
+    inspector = sa.inspect(op.get_bind())
+    for tabla in TABLAS:
+        if 'version_catalogo' not in {columna['name'] for columna in inspector.get_columns(tabla)}:
+            op.add_column(tabla, sa.Column('version_catalogo', sa.Integer(), nullable=False, server_default='0'))
+        op.create_index(f'ix_{tabla}_version_catalogo', tabla, ['version_catalogo'], unique=False, if_not_exists=True)
+    if not inspector.has_table('bajas_catalogo'):
+        op.create_table('bajas_catalogo',
+            sa.Column('id_baja', sa.Integer(), nullable=False),
+            sa.Column('tabla', sa.String(length=50), nullable=False),
+            sa.Column('id_item', sa.Integer(), nullable=True),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id_baja')
+        )
+    op.create_index('ix_bajas_catalogo_tabla_version', 'bajas_catalogo', ['tabla', 'version'], unique=False,
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_bajas_catalogo_tabla_version', table_name='bajas_catalogo', if_exists=True)
+    op.drop_table('bajas_catalogo', if_exists=True)
+    for tabla in reversed(TABLAS):
+        op.drop_index(f'ix_{tabla}_version_catalogo', table_name=tabla, if_exists=True)
+        op.drop_column(tabla, 'version_catalogo')
@@ -0,0 +1,42 @@
+"""indices del catalogo paginado
+
+Revision ID: c41d7e93a5f2
+Revises: 8b2e4f6a1c93
+Create Date: 2026-10-18 17:00:00.000000
+
+Índices (columna de orden, id) para la paginación por keyset de productos
+y servicios, y por categoría para el filtro de productos.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e93a5f2'
+down_revision = '8b2e4f6a1c93'
+branch_labels = None
+depends_on = None
+
+
+INDICES = [
+    ('ix_productos_nombre', 'productos', ['nombre', 'id_producto']),
+    ('ix_productos_precio', 'productos', ['precio', 'id_producto']),
+    ('ix_productos_categoria', 'productos', ['id_categoria']),
+    ('ix_servicios_nombre', 'servicios', ['nombre', 'id_servicio']),
+    ('ix_servicios_precio', 'servicios', ['precio', 'id_servicio']),
+]
+
+
+def upgrade():
+    es_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            opciones = {'postgresql_concurrently': True} if es_postgres else {}
+            op.create_index(nombre, tabla, columnas, if_not_exists=True, **opciones)
+
+
+def downgrade():
+    es_postgres = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _ in reversed(INDICES):
+            opciones = {'postgresql_concurrently': True} if es_postgres else {}
+            op.drop_index(nombre, table_name=tabla, if_exists=True, **opciones)
@@ -0,0 +1,66 @@
+"""resumen de resenas por item
+
+Revision ID: c5f8a1e7b3d9
+Revises: b9e2c6a4d1f3
+Create Date: 2026-10-18 23:00:00.000000
+
+Cantidad, suma e histograma de 1 a 5 estrellas de las reseñas de cada
+producto y servicio, mantenidos al escribir cada reseña; se rellenan aquí a
+partir de las reseñas existentes. Los índices de reseñas por item incluyen
+el id para la paginación por keyset.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f8a1e7b3d9'
+down_revision = 'b9e2c6a4d1f3'
+branch_labels = None
+depends_on = None
+
+COLUMNAS = ['resenas_cantidad', 'resenas_suma'] + [f'resenas_{estrellas}' for estrellas in range(1, 6)]
+# tabla -> columna id (las reseñas la referencian con el mismo nombre)
+TABLAS = {'productos': 'id_producto', 'servicios': 'id_servicio'}
+INDICES = {'ix_resenas_producto_fecha': 'id_producto', 'ix_resenas_servicio_fecha': 'id_servicio'}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for tabla in TABLAS:
+        # db.create_all() pudo haberlas creado ya; el relleno las recalcula igualmente
+        existentes = {columna['name'] for columna in inspector.get_columns(tabla)}
+        for columna in COLUMNAS:
+            if columna not in existentes:
+                op.add_column(tabla, sa.Column(columna, sa.Integer(), nullable=False, server_default='0'))
+
+    resenas = sa.table('reseñas', sa.column('id_resena'), sa.column('id_producto'), sa.column('id_servicio'),
+                       sa.column('calificacion'))
+    for tabla, columna_id in TABLAS.items():
+        items = sa.table(tabla, sa.column(columna_id), *(sa.column(columna) for columna in COLUMNAS))
+
+        def agregado(expresion, *condiciones):
+            return sa.select(sa.func.coalesce(expresion, 0)).where(
+                resenas.c[columna_id] == items.c[columna_id], *condiciones
+            ).scalar_subquery()
+
+        valores = {
+            'resenas_cantidad': agregado(sa.func.count(resenas.c.id_resena)),
+            'resenas_suma': agregado(sa.func.sum(resenas.c.calificacion)),
+        }
+        for estrellas in range(1, 6):
+            valores[f'resenas_{estrellas}'] = agregado(sa.func.count(resenas.c.id_resena), resenas.c.calificacion == estrellas)
+        op.execute(items.update().values(**valores))
+
+    for nombre, columna in INDICES.items():
+        op.drop_index(nombre, table_name='reseñas', if_exists=True)
+        op.create_index(nombre, 'reseñas', [columna, 'fecha_resena', 'id_resena'], unique=False)
+
+
+def downgrade():
+    for nombre, columna in INDICES.items():
+        op.drop_index(nombre, table_name='reseñas')
+        op.create_index(nombre, 'reseñas', [columna, 'fecha_resena'], unique=False)
+    for tabla in reversed(list(TABLAS)):
+        for columna in reversed(COLUMNAS):
+            op.drop_column(tabla, columna)
@@ -0,0 +1,58 @@
+"""secuencia de versiones del catalogo
+
+Revision ID: d2c7f4a9e6b1
+Revises: c5f8a1e7b3d9
+Create Date: 2026-10-19 09:00:00.000000
+
+Las escrituras del catálogo dejan de incrementar la fila 'catalogo' de
+versiones_catalogo dentro de su transacción (la bloqueaba hasta el commit y
+serializaba checkouts y ventas): en Postgres la versión sale de una
+secuencia; en otras bases, de la fila 'catalogo:secuencia'. Ambas empiezan
+por encima de toda versión ya asignada.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2c7f4a9e6b1'
+down_revision = 'c5f8a1e7b3d9'
+branch_labels = None
+depends_on = None
+
+SECUENCIA = 'secuencia_version_catalogo'
+CLAVE_SECUENCIA = 'catalogo:secuencia'
+TABLAS = ('categorias', 'productos', 'servicios', 'promociones')
+
+
+def _version_maxima(bind):
+    consultas = [sa.text("SELECT max(version) FROM versiones_catalogo WHERE clave = 'catalogo'"),
+                 sa.text('SELECT max(version) FROM bajas_catalogo')]
+    consultas += [sa.text(f'SELECT max(version_catalogo) FROM {tabla}') for tabla in TABLAS]
+    return max(bind.execute(consulta).scalar() or 0 for consulta in consultas)
+
+
+def upgrade():
+    bind = op.get_bind()
+    maxima = _version_maxima(bind)
+    if bind.dialect.name == 'postgresql':
+        # db.create_all() (run.py) pudo haberla creado ya empezando en 1
+        if not sa.inspect(bind).has_sequence(SECUENCIA):
+            op.execute(sa.schema.CreateSequence(sa.Sequence(SECUENCIA)))
+        if maxima:
+            op.execute(sa.text(f"SELECT setval('{SECUENCIA}', greatest(:maxima, (SELECT last_value FROM {SECUENCIA})))")
+                       .bindparams(maxima=maxima))
+        return
+    versiones = sa.table('versiones_catalogo', sa.column('clave'), sa.column('version'))
+    existente = bind.execute(sa.select(versiones.c.version).where(versiones.c.clave == CLAVE_SECUENCIA)).scalar()
+    if existente is None:
+        op.execute(versiones.insert().values(clave=CLAVE_SECUENCIA, version=maxima))
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute(sa.schema.DropSequence(sa.Sequence(SECUENCIA), if_exists=True))
+        return
+    versiones = sa.table('versiones_catalogo', sa.column('clave'), sa.column('version'))
+    op.execute(versiones.delete().where(versiones.c.clave == CLAVE_SECUENCIA))
@@ -0,0 +1,75 @@
+"""busqueda de texto del catalogo
+
+Revision ID: d5a8e1f0b7c4
+Revises: c41d7e93a5f2
+Create Date: 2026-10-18 18:00:00.000000
+
+Solo PostgreSQL: activa unaccent y pg_trgm, define las funciones inmutables
+casabella_unaccent y casabella_documento (tsvector en español, sin acentos,
+con el nombre pesando más que la descripción) y crea los índices GIN que
+usa app/services/busqueda.py. Si el usuario de la base no puede crear las
+extensiones la revisión no falla: la aplicación usa el índice en memoria.
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8e1f0b7c4'
+down_revision = 'c41d7e93a5f2'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+FUNCIONES = [
+    # unaccent() es STABLE; el envoltorio fija el diccionario para poder usarlo en índices
+    """
+    CREATE OR REPLACE FUNCTION casabella_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION casabella_documento(nombre text, descripcion text) RETURNS tsvector
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+        SELECT setweight(to_tsvector('spanish'::regconfig, casabella_unaccent(coalesce(nombre, ''))), 'A')
+            || setweight(to_tsvector('spanish'::regconfig, casabella_unaccent(coalesce(descripcion, ''))), 'B')
+    $$
+    """,
+]
+
+INDICES = [
+    ('ix_productos_documento', 'productos', 'gin (casabella_documento(nombre, descripcion))'),
+    ('ix_productos_nombre_trgm', 'productos', 'gin (casabella_unaccent(lower(nombre)) gin_trgm_ops)'),
+    ('ix_servicios_documento', 'servicios', 'gin (casabella_documento(nombre, descripcion))'),
+    ('ix_servicios_nombre_trgm', 'servicios', 'gin (casabella_unaccent(lower(nombre)) gin_trgm_ops)'),
+    ('ix_categorias_nombre_trgm', 'categorias', 'gin (casabella_unaccent(lower(nombre)) gin_trgm_ops)'),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        try:
+            op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+            op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except sa.exc.DBAPIError as e:
+            logger.warning(f"Sin extensiones unaccent/pg_trgm, la búsqueda usará el índice en memoria: {e}")
+            return
+        for funcion in FUNCIONES:
+            op.execute(funcion)
+        for nombre, tabla, definicion in INDICES:
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {nombre} ON {tabla} USING {definicion}')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for nombre, _, _ in reversed(INDICES):
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {nombre}')
+        op.execute('DROP FUNCTION IF EXISTS casabella_documento(text, text)')
+        op.execute('DROP FUNCTION IF EXISTS casabella_unaccent(text)')
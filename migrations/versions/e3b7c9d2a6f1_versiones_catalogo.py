@@ -0,0 +1,43 @@
+"""versiones del catalogo
+
+Revision ID: e3b7c9d2a6f1
+Revises: d5a8e1f0b7c4
+Create Date: 2026-10-18 19:00:00.000000
+
+Contador de versión por tabla de referencia (categorías, servicios y
+productos). app/services/cache_catalogo.py lo incrementa en la misma
+transacción que cada escritura y cada proceso recarga su copia en memoria
+solo cuando cambia. La tabla y las claves que ya existan (db.create_all()
+en run.py) se respetan.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b7c9d2a6f1'
+down_revision = 'd5a8e1f0b7c4'
+branch_labels = None
+depends_on = None
+
+
+CLAVES = ['categorias', 'servicios', 'productos']
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table('versiones_catalogo'):
+        op.create_table(
+            'versiones_catalogo',
+            sa.Column('clave', sa.String(length=50), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('clave')
+        )
+    versiones = sa.table('versiones_catalogo', sa.column('clave', sa.String), sa.column('version', sa.Integer))
+    # Si db.create_all() creó la tabla la aplicación pudo haber insertado ya alguna clave
+    existentes = set(bind.execute(sa.select(versiones.c.clave)).scalars())
+    op.bulk_insert(versiones, [{'clave': clave, 'version': 1} for clave in CLAVES if clave not in existentes])
+
+
+def downgrade():
+    op.drop_table('versiones_catalogo', if_exists=True)
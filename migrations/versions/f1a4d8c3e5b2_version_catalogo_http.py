@@ -0,0 +1,31 @@
+"""version del catalogo para ETag
+
+Revision ID: f1a4d8c3e5b2
+Revises: e3b7c9d2a6f1
+Create Date: 2026-10-18 20:00:00.000000
+
+Fila 'catalogo' de versiones_catalogo: cambia con cualquier escritura en
+categorías, productos, servicios o promociones y alimenta los ETag de las
+páginas y endpoints JSON del catálogo.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a4d8c3e5b2'
+down_revision = 'e3b7c9d2a6f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    versiones = sa.table('versiones_catalogo', sa.column('clave', sa.String), sa.column('version', sa.Integer))
+    # La aplicación la crea con la primera escritura si arrancó antes de migrar
+    existe = op.get_bind().execute(sa.select(versiones.c.clave).where(versiones.c.clave == 'catalogo')).first()
+    if existe is None:
+        op.bulk_insert(versiones, [{'clave': 'catalogo', 'version': 1}])
+
+
+def downgrade():
+    op.execute("DELETE FROM versiones_catalogo WHERE clave = 'catalogo'")
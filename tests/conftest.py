@@ -0,0 +1,26 @@
+# tests/conftest.py
+import os
+import pytest
+
+# config.Settings se valida al importarse: base en memoria y sin tareas en segundo plano
+os.environ['DATABASE_URL'] = 'sqlite://'
+for variable in ('DATABASE_HOST', 'DATABASE_USER', 'DATABASE_PASSWORD', 'DATABASE_NAME', 'SECRET_KEY'):
+    os.environ.setdefault(variable, 'prueba')
+os.environ.setdefault('DATABASE_PORT', '5432')
+os.environ['PROMOCIONES_PROGRAMADOR'] = 'false'
+
+from app import create_app, db
+from app.services import alertas_inventario
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # La evaluación de alertas corre en otro hilo y la base en memoria es una sola conexión compartida
+    monkeypatch.setattr(alertas_inventario, 'programar_evaluacion', lambda app: None)
+    app = create_app()
+    app.config.update(TESTING=True, FACTURAS_CACHE_DIR=str(tmp_path))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
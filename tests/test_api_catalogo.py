@@ -0,0 +1,142 @@
+# tests/test_api_catalogo.py
+from decimal import Decimal
+import pytest
+from sqlalchemy.orm import Session
+import config
+from app import create_app, db
+from app.models.productos import Producto
+from app.services.api_catalogo import pagina_recurso
+from app.services.cache_catalogo import CLAVE_CATALOGO, versiones
+
+CAMPOS = ['id', 'nombre', 'version']
+
+
+def _producto(nombre, **extra):
+    return Producto(nombre=nombre, tipo='cosmético', precio=Decimal('10.00'), stock=5, **extra)
+
+
+def _sincronizar(desde=None, limite=100):
+    pagina = pagina_recurso('productos', CAMPOS, desde=desde, limite=limite)
+    items, eliminados = list(pagina['items']), list(pagina['eliminados'])
+    while pagina['siguiente']:
+        pagina = pagina_recurso('productos', CAMPOS, cursor=pagina['siguiente'], limite=limite)
+        items += pagina['items']
+        eliminados += pagina['eliminados']
+    return pagina['version'], items, eliminados, pagina['resincronizar']
+
+
+@pytest.fixture
+def productos(app):
+    filas = [_producto(nombre) for nombre in ('Brillo', 'Crema', 'Sérum')]
+    db.session.add_all(filas)
+    db.session.commit()
+    return [p.id_producto for p in filas]
+
+
+def test_since_devuelve_solo_lo_cambiado(productos):
+    version, items, _, _ = _sincronizar()
+    assert [item['id'] for item in items] == productos
+
+    producto = db.session.get(Producto, productos[1])
+    producto.nombre = 'Crema hidratante'
+    nuevo = _producto('Aceite')
+    db.session.add(nuevo)
+    db.session.commit()
+
+    version_nueva, items, eliminados, resincronizar = _sincronizar(desde=version)
+    assert [item['id'] for item in items] == [productos[1], nuevo.id_producto]
+    assert all(version < item['version'] <= version_nueva for item in items)
+    assert eliminados == [] and not resincronizar
+    assert _sincronizar(desde=version_nueva)[1] == []
+
+
+def test_una_version_por_transaccion_y_contador_compartido_tras_el_commit(productos):
+    antes = versiones(CLAVE_CATALOGO)[0]
+    primero, segundo = _producto('Rubor'), _producto('Labial')
+    db.session.add(primero)
+    db.session.flush()
+    db.session.add(segundo)
+    db.session.flush()
+    # Nada toca la fila compartida mientras la transacción sigue abierta
+    assert versiones(CLAVE_CATALOGO)[0] == antes
+    db.session.commit()
+
+    assert primero.version_catalogo == segundo.version_catalogo
+    assert versiones(CLAVE_CATALOGO)[0] == antes + 1
+
+
+def test_un_rollback_no_publica_version(productos):
+    version, antes = _sincronizar()[0], versiones(CLAVE_CATALOGO)[0]
+    db.session.add(_producto('Descartado'))
+    db.session.flush()
+    db.session.rollback()
+
+    assert versiones(CLAVE_CATALOGO)[0] == antes
+    assert _sincronizar(desde=version)[1] == []
+
+
+def test_borrados_e_inactivos_van_en_eliminados(productos):
+    version = _sincronizar()[0]
+    db.session.delete(db.session.get(Producto, productos[0]))
+    db.session.get(Producto, productos[2]).estado = 'inactivo'
+    db.session.commit()
+
+    _, items, eliminados, resincronizar = _sincronizar(desde=version, limite=1)
+    assert items == []
+    assert sorted(eliminados) == [productos[0], productos[2]]
+    assert not resincronizar
+    # La sincronización completa ya no trae ninguno de los dos
+    assert [item['id'] for item in _sincronizar()[1]] == [productos[1]]
+
+
+def test_un_borrado_masivo_pide_resincronizar(productos):
+    version = _sincronizar()[0]
+    db.session.query(Producto).filter(Producto.nombre == 'Brillo').delete()
+    db.session.commit()
+
+    _, items, _, resincronizar = _sincronizar(desde=version)
+    assert resincronizar and items == []
+    # Un cliente que ya resincronizó después del borrado no vuelve a recibir la marca
+    assert not _sincronizar(desde=_sincronizar()[0])[3]
+
+
+def test_un_update_masivo_marca_las_filas(productos):
+    version = _sincronizar()[0]
+    db.session.query(Producto).filter(Producto.id_producto == productos[2]).update({'stock': 0})
+    db.session.commit()
+
+    assert [item['id'] for item in _sincronizar(desde=version)[1]] == [productos[2]]
+
+
+@pytest.fixture
+def app_archivo(tmp_path, monkeypatch):
+    # Dos conexiones de verdad: la base en memoria de las demás pruebas es una sola compartida
+    monkeypatch.setattr(config.Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'catalogo.db'}")
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_nunca_se_pierde_una_fila_de_version_menor_o_igual(app_archivo):
+    db.session.add(_producto('Brillo'))
+    db.session.commit()
+
+    escritor = Session(db.engine)
+    pendiente = _producto('Crema')
+    escritor.add(pendiente)
+    escritor.flush()
+
+    # La escritura sin confirmar no se ve y la versión informada queda por debajo de la suya
+    version, items, _, _ = _sincronizar()
+    assert [item['nombre'] for item in items] == ['Brillo']
+    assert pendiente.version_catalogo > version
+    db.session.rollback()
+
+    escritor.commit()
+    escritor.close()
+    _, items, _, _ = _sincronizar(desde=version)
+    assert [item['nombre'] for item in items] == ['Crema']
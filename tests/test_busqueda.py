@@ -0,0 +1,68 @@
+# tests/test_busqueda.py
+from decimal import Decimal
+import pytest
+from app import db
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+from app.models.users import Usuario
+from app.services.busqueda import a_una_edicion, buscar
+
+
+@pytest.fixture
+def catalogo(app):
+    db.session.add_all([
+        Producto(nombre='Labial mate', descripcion='Color intenso de larga duración', tipo='cosmético',
+                 precio=Decimal('12.00'), stock=4),
+        Producto(nombre='Base líquida', descripcion='Cobertura media', tipo='cosmético', precio=Decimal('20.00'), stock=2),
+        Producto(nombre='Collar de plata', tipo='joya', precio=Decimal('45.00'), stock=1),
+        Servicio(nombre='Manicure spa', descripcion='Limado y esmalte', precio=Decimal('15.00'), duracion=40),
+    ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize('a, b, esperado', [
+    ('labail', 'labial', True),   # intercambio de letras vecinas
+    ('lbial', 'labial', True),    # borrado
+    ('labiall', 'labial', True),  # inserción
+    ('labual', 'labial', True),   # sustitución
+    ('ab', 'ba', True),
+    ('labial', 'labial', False),
+    ('lbaail', 'labial', False),
+    ('abcd', 'badc', False),
+])
+def test_a_una_edicion(a, b, esperado):
+    assert a_una_edicion(a, b) is esperado
+    assert a_una_edicion(b, a) is esperado
+
+
+@pytest.mark.parametrize('consulta, nombre', [
+    ('labail', 'Labial mate'), ('lbial', 'Labial mate'), ('labiall', 'Labial mate'),
+    ('manicrue', 'Manicure spa'), ('colalr', 'Collar de plata'),
+])
+def test_tolera_una_errata_aunque_la_similitud_no_alcance(catalogo, consulta, nombre):
+    assert buscar(consulta)[0].nombre == nombre
+
+
+def test_la_coincidencia_exacta_queda_por_encima_de_la_errata(catalogo):
+    exacta, = buscar('labial')
+    errata, = buscar('labail')
+    assert exacta.id == errata.id
+    assert exacta.rango > errata.rango
+
+
+def test_las_palabras_cortas_no_se_corrigen(catalogo):
+    assert buscar('bsae') != [] and buscar('bse') == []
+
+
+def test_la_ruta_de_busqueda_encuentra_la_errata(app, catalogo):
+    cliente = Usuario(nombre='Ana', email='ana@example.com', contraseña='x', rol='cliente')
+    db.session.add(cliente)
+    db.session.commit()
+    http = app.test_client()
+    with http.session_transaction() as sesion:
+        sesion['_user_id'] = str(cliente.id_usuario)
+
+    respuesta = http.get('/client/buscar?q=labail')
+
+    assert respuesta.status_code == 200
+    assert [r['nombre'] for r in respuesta.get_json()['resultados']] == ['Labial mate']
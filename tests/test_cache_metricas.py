@@ -0,0 +1,119 @@
+# tests/test_cache_metricas.py
+from decimal import Decimal
+import threading
+import time
+from app import db
+from app.models.productos import Producto
+from app.services.cache_metricas import CLAVE_DASHBOARD, CacheLocal, CacheMetricas, obtener_cache
+
+CLAVE = 'metricas:prueba'
+CANDADO = f'{CLAVE}:calculando'
+
+
+def test_un_solo_calculo_con_hilos_concurrentes():
+    cache = CacheMetricas(ttl=60)
+    llamadas = []
+    barrera = threading.Barrier(8)
+
+    def calcular():
+        llamadas.append(1)
+        time.sleep(0.2)
+        return {'total': 1}
+
+    def pedir(resultados):
+        barrera.wait()
+        resultados.append(cache.obtener(CLAVE, calcular))
+
+    resultados = []
+    hilos = [threading.Thread(target=pedir, args=(resultados,)) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert len(llamadas) == 1
+    assert resultados == [{'total': 1}] * 8
+
+
+def test_otro_proceso_espera_el_resultado_del_que_tiene_el_candado():
+    # Dos instancias sobre el mismo backend hacen de dos procesos con Redis
+    compartido = CacheLocal()
+    lider, seguidor = CacheMetricas(compartido), CacheMetricas(compartido, espera_maxima=2)
+    calculando = threading.Event()
+
+    def calcular_lento():
+        calculando.set()
+        time.sleep(0.3)
+        return 'del lider'
+
+    hilo = threading.Thread(target=lider.obtener, args=(CLAVE, calcular_lento))
+    hilo.start()
+    calculando.wait()
+    assert seguidor.obtener(CLAVE, lambda: 'del seguidor') == 'del lider'
+    hilo.join()
+    assert compartido.get(CANDADO) is None
+
+
+def test_quien_se_cansa_de_esperar_no_borra_el_candado_ajeno():
+    compartido = CacheLocal()
+    compartido.add(CANDADO, 'token-de-otro-proceso', 60)
+    cache = CacheMetricas(compartido, espera_maxima=0.1)
+
+    assert cache.obtener(CLAVE, lambda: 'calculado igual') == 'calculado igual'
+    assert compartido.get(CANDADO) == 'token-de-otro-proceso'
+
+
+def test_el_candado_dura_mas_que_la_espera():
+    compartido = CacheLocal()
+    cache = CacheMetricas(compartido, espera_maxima=0.1, ttl_candado=60)
+    duracion = []
+
+    def calcular():
+        duracion.append(compartido.get(CANDADO))
+        time.sleep(0.2)
+        # Pasada la espera máxima el candado sigue siendo del líder
+        duracion.append(compartido.get(CANDADO))
+        return 1
+
+    cache.obtener(CLAVE, calcular)
+    assert duracion[0] is not None and duracion[0] == duracion[1]
+    assert compartido.get(CANDADO) is None
+
+
+def test_soltar_no_borra_un_candado_que_ya_es_de_otro():
+    compartido = CacheLocal()
+    cache = CacheMetricas(compartido)
+
+    def calcular():
+        # El candado expiró y otro proceso lo tomó mientras se calculaba
+        compartido.set(CANDADO, 'token-nuevo', 60)
+        return 1
+
+    cache.obtener(CLAVE, calcular)
+    assert compartido.get(CANDADO) == 'token-nuevo'
+
+
+def test_una_escritura_durante_el_calculo_no_deja_un_valor_viejo():
+    cache = CacheMetricas()
+
+    def calcular():
+        cache.invalidar(CLAVE)
+        return 'viejo'
+
+    assert cache.obtener(CLAVE, calcular) == 'viejo'
+    assert cache.obtener(CLAVE, lambda: 'nuevo') == 'nuevo'
+
+
+def test_confirmar_una_escritura_invalida_el_dashboard(app):
+    cache = obtener_cache()
+    assert cache.obtener(CLAVE_DASHBOARD, lambda: 'antes') == 'antes'
+
+    # Un rollback no invalida
+    db.session.add(Producto(nombre='Rubor', tipo='cosmético', precio=Decimal('8.00'), stock=3))
+    db.session.flush()
+    db.session.rollback()
+    assert cache.obtener(CLAVE_DASHBOARD, lambda: 'despues') == 'antes'
+
+    db.session.add(Producto(nombre='Rubor', tipo='cosmético', precio=Decimal('8.00'), stock=3))
+    db.session.commit()
+    assert cache.obtener(CLAVE_DASHBOARD, lambda: 'despues') == 'despues'
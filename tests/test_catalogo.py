@@ -0,0 +1,73 @@
+# tests/test_catalogo.py
+from decimal import Decimal
+import pytest
+from app import db
+from app.models.productos import Producto
+from app.services.catalogo import CursorInvalido, _codificar_cursor, _decodificar_cursor, pagina_catalogo
+
+# Muchos empates de nombre y de precio para que los cortes de página caigan dentro de ellos
+PRODUCTOS = [
+    ('Brillo', '9.99'), ('Aceite', '10.00'), ('Brillo', '10.00'), ('Crema', '10.50'), ('Aceite', '9.99'),
+    ('Brillo', '10.00'), ('Crema', '9.99'), ('Aceite', '10.50'), ('Brillo', '10.00'), ('Delineador', '0.99'),
+]
+
+
+@pytest.fixture
+def productos(app):
+    filas = [Producto(nombre=nombre, tipo='cosmético', precio=Decimal(precio), stock=5) for nombre, precio in PRODUCTOS]
+    db.session.add_all(filas)
+    db.session.commit()
+    return [(p.id_producto, p.nombre, p.precio) for p in filas]
+
+
+def _recorrer(orden, limite, **filtros):
+    vistos, cursor, paginas = [], None, 0
+    while True:
+        items, cursor = pagina_catalogo('producto', dict(filtros, orden=orden), cursor=cursor, limite=limite)
+        vistos.extend(items)
+        paginas += 1
+        if cursor is None:
+            return vistos, paginas
+
+
+@pytest.mark.parametrize('orden, clave', [
+    ('nombre', lambda p: (p[1], p[0])),
+    ('precio_asc', lambda p: (p[2], p[0])),
+    ('precio_desc', lambda p: (-p[2], -p[0])),
+    ('recientes', lambda p: -p[0]),
+])
+@pytest.mark.parametrize('limite', [1, 3, 4, 100])
+def test_recorre_cada_item_una_vez_en_orden_con_empates(productos, orden, clave, limite):
+    vistos, paginas = _recorrer(orden, limite)
+
+    assert [p.id_producto for p in vistos] == [p[0] for p in sorted(productos, key=clave)]
+    assert paginas == -(-len(productos) // limite)
+
+
+def test_el_cursor_de_precio_conserva_el_decimal_exacto(productos):
+    items, cursor = pagina_catalogo('producto', {'orden': 'precio_asc'}, limite=2)
+    orden, valor, id_item = _decodificar_cursor(cursor, 'precio_asc')
+
+    assert orden == 'precio_asc'
+    assert isinstance(valor, Decimal) and valor == items[-1].precio == Decimal('9.99')
+    assert id_item == items[-1].id_producto
+
+
+def test_los_filtros_se_mantienen_entre_paginas(productos):
+    vistos, _ = _recorrer('precio_desc', 2, precio_min=Decimal('10.00'), precio_max=Decimal('10.00'))
+
+    assert {p.precio for p in vistos} == {Decimal('10.00')}
+    assert len(vistos) == 4
+
+
+def test_un_cursor_de_otro_orden_es_invalido(productos):
+    _, cursor = pagina_catalogo('producto', {'orden': 'nombre'}, limite=2)
+
+    with pytest.raises(CursorInvalido):
+        pagina_catalogo('producto', {'orden': 'precio_asc'}, cursor=cursor)
+
+
+@pytest.mark.parametrize('cursor', ['no-es-base64!', 'W10', _codificar_cursor('precio_asc', 'caro', 1)])
+def test_un_cursor_malformado_es_invalido(productos, cursor):
+    with pytest.raises(CursorInvalido):
+        pagina_catalogo('producto', {'orden': 'precio_asc'}, cursor=cursor)
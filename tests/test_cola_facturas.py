@@ -0,0 +1,24 @@
+# tests/test_cola_facturas.py
+from concurrent.futures.process import BrokenProcessPool
+import os
+import pytest
+from app.services import cola_facturas
+
+
+@pytest.fixture
+def pool_real(app):
+    app.config['FACTURAS_WORKERS'] = 1
+    yield
+    if cola_facturas._pool is not None:
+        cola_facturas._pool.shutdown(cancel_futures=True)
+        cola_facturas._pool = None
+
+
+def test_un_worker_muerto_no_deja_el_pool_roto(pool_real):
+    # El worker termina sin devolver nada, como tras un OOM kill
+    with pytest.raises(BrokenProcessPool):
+        cola_facturas.enviar_al_pool(os._exit, 1).result(timeout=60)
+    roto = cola_facturas._pool
+
+    assert cola_facturas.enviar_al_pool(pow, 2, 10).result(timeout=60) == 1024
+    assert cola_facturas._pool is not roto
@@ -0,0 +1,139 @@
+# tests/test_compresion.py
+import gzip
+import zlib
+import pytest
+from app.services import compresion
+from app.services.compresion import MiddlewareCompresion
+
+TEXTO = ('Champú de argán, crema hidratante y sérum facial. ' * 100).encode()
+
+
+def _app(cuerpo=TEXTO, estado='200 OK', tipo='text/html; charset=utf-8', longitud=True, **extra):
+    def app(environ, start_response):
+        cabeceras = [('Content-Type', tipo)]
+        if longitud:
+            cabeceras.append(('Content-Length', str(len(cuerpo))))
+        cabeceras.extend((nombre.replace('_', '-'), valor) for nombre, valor in extra.items())
+        start_response(estado, cabeceras)
+        return [cuerpo]
+    return app
+
+
+def _pedir(app, metodo='GET', codificacion='gzip', minimo_bytes=1024):
+    environ = {'REQUEST_METHOD': metodo, 'HTTP_ACCEPT_ENCODING': codificacion}
+    respuesta = {}
+
+    def start_response(estado, cabeceras, exc_info=None):
+        respuesta.update(estado=estado, cabeceras=dict(cabeceras))
+
+    iterable = MiddlewareCompresion(app, minimo_bytes)(environ, start_response)
+    trozos = list(iterable)
+    return respuesta['estado'], respuesta['cabeceras'], b''.join(trozos)
+
+
+@pytest.fixture(autouse=True)
+def sin_brotli(monkeypatch):
+    # Con o sin el paquete instalado las pruebas comparan contra gzip
+    monkeypatch.setattr(compresion, 'brotli', None)
+
+
+def test_comprime_con_gzip_y_ajusta_content_length():
+    estado, cabeceras, cuerpo = _pedir(_app(), codificacion='br, gzip')
+
+    assert estado == '200 OK'
+    assert cabeceras['Content-Encoding'] == 'gzip'
+    assert cabeceras['Vary'] == 'Accept-Encoding'
+    assert int(cabeceras['Content-Length']) == len(cuerpo) < len(TEXTO)
+    assert gzip.decompress(cuerpo) == TEXTO
+
+
+def test_sin_accept_encoding_no_se_toca_la_respuesta():
+    _, cabeceras, cuerpo = _pedir(_app(), codificacion='')
+
+    assert 'Content-Encoding' not in cabeceras
+    assert cuerpo == TEXTO
+
+
+def test_el_streaming_se_comprime_y_se_vacia_por_trozos():
+    filas = [f'{{"id": {i}, "nombre": "Producto {i}"}}\n'.encode() for i in range(50)]
+    entregados = []
+
+    def generar():
+        for fila in filas:
+            entregados.append(fila)
+            yield fila
+
+    def app(environ, start_response):
+        # Como Response.__call__: start_response antes de devolver el generador
+        start_response('200 OK', [('Content-Type', 'application/x-ndjson')])
+        return generar()
+
+    environ = {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': 'gzip'}
+    respuesta = {}
+
+    def start_response(estado, cabeceras, exc_info=None):
+        respuesta.update(cabeceras=dict(cabeceras))
+
+    iterable = MiddlewareCompresion(app)(environ, start_response)
+    descompresor = zlib.decompressobj(31)
+    recibido = b''
+    for trozo in iterable:
+        recibido += descompresor.decompress(trozo)
+        # Cada trozo enviado ya se puede descomprimir hasta la última fila generada
+        assert recibido == b''.join(entregados)
+
+    assert 'Content-Length' not in respuesta['cabeceras']
+    assert respuesta['cabeceras']['Content-Encoding'] == 'gzip'
+    assert recibido == b''.join(filas)
+
+
+def test_el_etag_fuerte_pasa_a_debil_y_el_debil_se_conserva():
+    _, fuerte, _ = _pedir(_app(ETag='"abc"'))
+    _, debil, _ = _pedir(_app(ETag='W/"abc"'))
+
+    assert fuerte['ETag'] == 'W/"abc"'
+    assert debil['ETag'] == 'W/"abc"'
+
+
+@pytest.mark.parametrize('vary, esperado', [
+    ('Cookie', 'Cookie, Accept-Encoding'),
+    ('accept-encoding', 'accept-encoding'),
+    ('*', '*'),
+])
+def test_vary_se_combina_con_el_existente(vary, esperado):
+    _, cabeceras, _ = _pedir(_app(Vary=vary))
+
+    assert cabeceras['Vary'] == esperado
+
+
+def test_por_debajo_del_minimo_no_comprime_pero_anuncia_vary():
+    _, cabeceras, cuerpo = _pedir(_app(b'{"ok": true}', tipo='application/json'))
+
+    assert 'Content-Encoding' not in cabeceras
+    assert cabeceras['Vary'] == 'Accept-Encoding'
+    assert cuerpo == b'{"ok": true}'
+
+
+@pytest.mark.parametrize('cuerpo, metodo, opciones', [
+    (b'', 'GET', {'estado': '304 Not Modified', 'ETag': '"abc"'}),
+    (b'', 'GET', {'estado': '204 No Content'}),
+    (TEXTO, 'HEAD', {}),
+    (TEXTO, 'GET', {'estado': '206 Partial Content', 'Content_Range': f'bytes 0-{len(TEXTO) - 1}/{len(TEXTO)}'}),
+    (TEXTO, 'GET', {'Cache_Control': 'public, no-transform'}),
+    (TEXTO, 'GET', {'tipo': 'application/pdf'}),
+], ids=['304', '204', 'head', 'rango', 'no-transform', 'pdf'])
+def test_respuestas_que_pasan_intactas(cuerpo, metodo, opciones):
+    estado, cabeceras, recibido = _pedir(_app(cuerpo, **opciones), metodo=metodo)
+
+    assert estado == opciones.get('estado', '200 OK')
+    assert 'Content-Encoding' not in cabeceras
+    assert cabeceras.get('ETag') == opciones.get('ETag')
+    assert recibido == cuerpo
+
+
+def test_no_recomprime_lo_que_ya_trae_content_encoding():
+    precomprimido = gzip.compress(TEXTO)
+    _, cabeceras, cuerpo = _pedir(_app(precomprimido, tipo='text/css', Content_Encoding='gzip'))
+
+    assert cabeceras['Content-Encoding'] == 'gzip'
+    assert cuerpo == precomprimido
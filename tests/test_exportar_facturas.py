@@ -0,0 +1,96 @@
+# tests/test_exportar_facturas.py
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from decimal import Decimal
+import io
+import zipfile
+import pytest
+from app import db
+from app.models.detalle_ventas import DetalleVenta
+from app.models.productos import Producto
+from app.models.servicios import Servicio
+from app.models.users import Usuario
+from app.models.ventas import Venta
+from app.services import cola_facturas, exportar_facturas
+
+DESDE = datetime(2026, 1, 1)
+HASTA = datetime(2026, 2, 1)
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    # Un pool de hilos basta para la prueba: evita lanzar procesos con 'spawn'
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(cola_facturas, 'obtener_pool', lambda: pool)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def venta(app):
+    usuario = Usuario(nombre='Ana Pérez', email='ana@example.com', contraseña='x', rol='cliente')
+    producto = Producto(nombre='Labial mate', tipo='cosmético', precio=Decimal('12.50'), stock=10)
+    servicio = Servicio(nombre='Manicure', precio=Decimal('20.00'), duracion=45)
+    venta = Venta(usuario=usuario, fecha_venta=datetime(2026, 1, 15, 10, 30), total=Decimal('51.80'))
+    db.session.add_all([
+        venta,
+        DetalleVenta(venta=venta, producto=producto, cantidad=2, precio_unitario=Decimal('12.50')),
+        DetalleVenta(venta=venta, servicio=servicio, cantidad=1, precio_unitario=Decimal('20.00')),
+        # Fuera del rango: no debe exportarse
+        Venta(usuario=usuario, fecha_venta=datetime(2026, 2, 3), total=Decimal('10.00')),
+    ])
+    db.session.commit()
+    return venta.id_venta, usuario.id_usuario
+
+
+def test_pendientes_incluye_los_detalles_de_la_venta(app, venta):
+    id_venta, _ = venta
+    pendientes = list(exportar_facturas._pendientes(DESDE, HASTA))
+
+    assert [pendiente[0] for pendiente in pendientes] == [id_venta]
+    datos = pendientes[0][2]
+    assert [linea['nombre'] for linea in datos['lineas']] == ['Labial mate', 'Manicure']
+    assert datos['cliente']['nombre'] == 'Ana Pérez'
+    assert Decimal(datos['subtotal']) == Decimal('45.00')
+
+
+def test_zip_facturas_exporta_la_venta_con_sus_lineas(app, venta):
+    id_venta, id_usuario = venta
+    contenido = b''.join(exportar_facturas.zip_facturas(DESDE, HASTA))
+
+    with zipfile.ZipFile(io.BytesIO(contenido)) as archivo_zip:
+        assert archivo_zip.namelist() == [f'factura_{id_usuario}_{id_venta}.pdf']
+        assert archivo_zip.read(archivo_zip.namelist()[0]).startswith(b'%PDF')
+
+
+def _futuro_fallido(*args):
+    futuro = Future()
+    futuro.set_exception(BrokenProcessPool("Un worker murió"))
+    return futuro
+
+
+def test_zip_facturas_renderiza_aqui_si_el_pool_falla(app, venta, monkeypatch):
+    id_venta, id_usuario = venta
+    monkeypatch.setattr(exportar_facturas, 'enviar_al_pool', _futuro_fallido)
+    contenido = b''.join(exportar_facturas.zip_facturas(DESDE, HASTA))
+
+    with zipfile.ZipFile(io.BytesIO(contenido)) as archivo_zip:
+        assert archivo_zip.namelist() == [f'factura_{id_usuario}_{id_venta}.pdf']
+
+
+def test_zip_facturas_lista_las_facturas_que_no_se_generaron(app, venta, monkeypatch):
+    id_venta, id_usuario = venta
+
+    def falla(datos):
+        raise RuntimeError("sin memoria")
+
+    monkeypatch.setattr(exportar_facturas, 'enviar_al_pool', _futuro_fallido)
+    monkeypatch.setattr(exportar_facturas, 'pdf_desde_datos', falla)
+    contenido = b''.join(exportar_facturas.zip_facturas(DESDE, HASTA))
+
+    with zipfile.ZipFile(io.BytesIO(contenido)) as archivo_zip:
+        assert archivo_zip.namelist() == [exportar_facturas.ARCHIVO_ERRORES]
+        errores = archivo_zip.read(exportar_facturas.ARCHIVO_ERRORES).decode('utf-8')
+    assert f'factura_{id_usuario}_{id_venta}.pdf' in errores
+    assert 'sin memoria' in errores
@@ -0,0 +1,94 @@
+# tests/test_imagenes.py
+from io import BytesIO
+import os
+from PIL import Image
+import pytest
+from app.services import imagenes
+from app.services.imagenes import anchos_imagen, guardar_imagen, regenerar_variantes, srcset_imagen, url_imagen
+
+
+@pytest.fixture
+def directorio(app, tmp_path, monkeypatch):
+    app.config['IMAGENES_DIR'] = str(tmp_path / 'imagenes')
+    monkeypatch.setattr(imagenes, '_anchos_en_disco', {})
+    return tmp_path / 'imagenes'
+
+
+def _subida(ancho, alto, formato='PNG'):
+    datos = BytesIO()
+    Image.new('RGB', (ancho, alto), (200, 80, 120)).save(datos, formato)
+    datos.seek(0)
+    return datos
+
+
+def _variantes(directorio, huella):
+    return sorted(os.listdir(directorio / huella[:2] / huella))
+
+
+def _ancho_archivo(directorio, huella, nombre):
+    with Image.open(directorio / huella[:2] / huella / nombre) as imagen:
+        return imagen.width
+
+
+def test_una_imagen_pequena_no_se_amplia(app, directorio):
+    huella = guardar_imagen(_subida(300, 200))
+
+    assert anchos_imagen(huella) == [160, 300]
+    assert _variantes(directorio, huella) == ['160.jpg', '160.webp', '300.jpg', '300.webp', 'original.png']
+    assert _ancho_archivo(directorio, huella, '300.webp') == 300
+    with app.test_request_context():
+        assert srcset_imagen(huella, 'webp') == f'/imagenes/{huella}/160.webp 160w, /imagenes/{huella}/300.webp 300w'
+        assert url_imagen(huella, 'miniatura') == f'/imagenes/{huella}/160.jpg'
+        assert url_imagen(huella, 'tarjeta') == url_imagen(huella, 'detalle') == f'/imagenes/{huella}/300.jpg'
+
+
+def test_una_imagen_grande_tiene_todos_los_anchos(app, directorio):
+    huella = guardar_imagen(_subida(2000, 1000, 'JPEG'))
+
+    assert anchos_imagen(huella) == [160, 480, 1200]
+    assert [_ancho_archivo(directorio, huella, f'{ancho}.jpg') for ancho in (160, 480, 1200)] == [160, 480, 1200]
+    with app.test_request_context():
+        assert srcset_imagen(huella).endswith(f'/imagenes/{huella}/1200.jpg 1200w')
+
+
+def test_una_imagen_menor_que_la_miniatura_queda_en_su_ancho(app, directorio):
+    huella = guardar_imagen(_subida(90, 90))
+
+    assert anchos_imagen(huella) == [90]
+    with app.test_request_context():
+        assert url_imagen(huella, 'miniatura') == f'/imagenes/{huella}/90.jpg'
+
+
+def test_la_ruta_sirve_solo_variantes_ya_generadas(app, directorio):
+    huella = guardar_imagen(_subida(300, 200))
+    http = app.test_client()
+
+    respuesta = http.get(f'/imagenes/{huella}/300.webp')
+    assert respuesta.status_code == 200
+    assert 'immutable' in respuesta.headers['Cache-Control']
+    assert http.get(f'/imagenes/{huella}/480.webp').status_code == 404
+
+    # Una variante que falta no se genera al pedirla
+    os.remove(directorio / huella[:2] / huella / '160.webp')
+    assert http.get(f'/imagenes/{huella}/160.webp').status_code == 404
+    assert '160.webp' not in _variantes(directorio, huella)
+
+
+def test_regenerar_borra_las_variantes_ampliadas_de_antes(app, directorio):
+    huella = guardar_imagen(_subida(300, 200))
+    carpeta = directorio / huella[:2] / huella
+    for nombre in ('480.jpg', '480.webp', '1200.jpg', '1200.webp'):
+        (carpeta / nombre).write_bytes(b'ampliada')
+    imagenes._anchos_en_disco.clear()
+    assert anchos_imagen(huella) == [160, 300, 480, 1200]
+
+    assert regenerar_variantes(huella)
+    assert anchos_imagen(huella) == [160, 300]
+    assert _variantes(directorio, huella) == ['160.jpg', '160.webp', '300.jpg', '300.webp', 'original.png']
+
+
+def test_subir_otra_vez_la_misma_imagen_no_la_procesa(app, directorio, monkeypatch):
+    huella = guardar_imagen(_subida(300, 200))
+    monkeypatch.setattr(imagenes, '_generar_variantes', lambda *args: pytest.fail("no debía regenerar"))
+
+    assert guardar_imagen(_subida(300, 200)) == huella
@@ -0,0 +1,117 @@
+# tests/test_promociones.py
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import text
+from app import db
+from app.models.productos import Producto
+from app.models.promociones import Promocion
+from app.services.promociones import IndicePromociones, PromocionVigente, _Intervalos, indice_promociones
+
+INICIO = datetime(2026, 3, 1)
+
+
+def _vigente(id_promocion, desde, hasta):
+    return PromocionVigente(id_promocion, f'P{id_promocion}', None, Decimal('10'), INICIO + timedelta(days=desde),
+                            INICIO + timedelta(days=hasta), 1, None)
+
+
+def _dia(dias, horas=0):
+    return INICIO + timedelta(days=dias, hours=horas)
+
+
+def test_intervalos_con_solapamientos_y_anidados():
+    larga, corta, despues = _vigente(1, 0, 30), _vigente(2, 5, 6), _vigente(3, 40, 45)
+    intervalos = _Intervalos([despues, corta, larga])
+
+    assert intervalos.en(_dia(-1)) is None
+    assert intervalos.en(_dia(1)) == larga
+    # La última que empezó gana mientras siga vigente
+    assert intervalos.en(_dia(5, 12)) == corta
+    # Al vencer la corta se vuelve a la larga, que empezó antes
+    assert intervalos.en(_dia(10)) == larga
+    assert intervalos.en(_dia(35)) is None
+    assert intervalos.en(_dia(42)) == despues
+
+
+def test_intervalos_incluyen_los_extremos():
+    promocion = _vigente(1, 0, 2)
+    intervalos = _Intervalos([promocion])
+
+    assert intervalos.en(promocion.fecha_inicio) == promocion
+    assert intervalos.en(promocion.fecha_fin) == promocion
+    assert intervalos.en(promocion.fecha_fin + timedelta(microseconds=1)) is None
+
+
+def _producto():
+    producto = Producto(nombre='Esmalte', tipo='cosmético', precio=Decimal('5.00'), stock=10)
+    db.session.add(producto)
+    db.session.commit()
+    return producto.id_producto
+
+
+def _promocion(id_producto, nombre, desde, hasta):
+    promocion = Promocion(nombre=nombre, descuento=Decimal('15'), fecha_inicio=desde, fecha_fin=hasta,
+                          id_producto=id_producto)
+    db.session.add(promocion)
+    db.session.commit()
+    return promocion.id_promocion
+
+
+def _contar_reconstrucciones(indice, monkeypatch):
+    llamadas = []
+    original = indice._reconstruir
+
+    def reconstruir(ahora):
+        llamadas.append(ahora)
+        original(ahora)
+
+    monkeypatch.setattr(indice, '_reconstruir', reconstruir)
+    return llamadas
+
+
+def test_se_reconstruye_al_vencer_la_primera_promocion(app, monkeypatch):
+    id_producto = _producto()
+    primera = _promocion(id_producto, 'Semana 1', _dia(0), _dia(7))
+    segunda = _promocion(id_producto, 'Semana 2', _dia(8), _dia(14))
+    indice = IndicePromociones(ttl=3600)
+    reconstrucciones = _contar_reconstrucciones(indice, monkeypatch)
+
+    assert indice.vigente('producto', id_producto, _dia(1)).id_promocion == primera
+    assert indice.vigente('producto', id_producto, _dia(6)).id_promocion == primera
+    assert len(reconstrucciones) == 1
+
+    # Pasada la primera fecha_fin el índice descarta la expirada
+    assert indice.vigente('producto', id_producto, _dia(9)).id_promocion == segunda
+    assert len(reconstrucciones) == 2
+    assert [p.id_promocion for p in indice.vigentes(_dia(9))] == [segunda]
+    assert indice.vigente('producto', id_producto, _dia(15)) is None
+
+
+def test_un_commit_que_toca_promociones_invalida_el_indice(app):
+    id_producto = _producto()
+    assert indice_promociones().vigente('producto', id_producto, _dia(1)) is None
+
+    id_promocion = _promocion(id_producto, 'Nueva', _dia(0), _dia(7))
+    assert indice_promociones().vigente('producto', id_producto, _dia(1)).id_promocion == id_promocion
+    assert indice_promociones().ids_con_promocion('producto', _dia(1)) == {id_producto}
+
+    Promocion.query.filter_by(id_promocion=id_promocion).delete()
+    db.session.commit()
+    assert indice_promociones().vigente('producto', id_producto, _dia(1)) is None
+
+
+def test_los_cambios_de_otro_proceso_llegan_al_pasar_el_ttl(app, monkeypatch):
+    id_producto = _producto()
+    indice = IndicePromociones(ttl=3600)
+    assert indice.vigente('producto', id_producto, _dia(1)) is None
+
+    # SQL crudo, como si lo escribiera otro proceso: no pasa por los eventos de la sesión
+    db.session.execute(text(
+        "INSERT INTO promociones (nombre, descuento, fecha_inicio, fecha_fin, id_producto, estado, version_catalogo)"
+        " VALUES ('Externa', 10, :desde, :hasta, :id, 'activa', 0)"
+    ), {'desde': _dia(0), 'hasta': _dia(7), 'id': id_producto})
+    db.session.commit()
+    assert indice.vigente('producto', id_producto, _dia(1)) is None
+
+    monkeypatch.setattr(indice, 'ttl', 0)
+    assert indice.vigente('producto', id_producto, _dia(1)).nombre == 'Externa'